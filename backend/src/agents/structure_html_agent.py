@@ -1,9 +1,142 @@
 import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from src.lib.logger.index import logger
 from src.lib.openai.index import CLIENT
+from src.utils.ratelimit import RateLimiter
 
+# characters of page text sent to the LLM when the page metadata has no title
+TITLE_EXCERPT_CHARS = 2000
+TITLE_MAX_CHARS = 200
+# pages named by one chat completion in batch mode, with a shorter excerpt each
+TITLE_BATCH_SIZE = 10
+TITLE_BATCH_EXCERPT_CHARS = 1000
+TITLE_BATCH_CONCURRENCY = 3
+# chat completions per second, across every thread of the process
+TITLE_REQUESTS_PER_SECOND = 2
+TITLE_RATE_LIMITER = RateLimiter(TITLE_REQUESTS_PER_SECOND)
+# separators between a page title and the site name in <title>
+TITLE_SEPARATORS = re.compile(r"\s+[|\-–—·•]\s+")
+# titles that name a page template or an error rather than the content
+GENERIC_TITLES = {
+    "home",
+    "homepage",
+    "index",
+    "untitled",
+    "document",
+    "page",
+    "login",
+    "log in",
+    "sign in",
+    "just a moment...",
+    "access denied",
+    "attention required!",
+    "403 forbidden",
+    "404 not found",
+    "page not found",
+}
 
-def process_html(raw_html_content):
 
+def clean_title(value: Optional[str]) -> Optional[str]:
+    title = " ".join((value or "").split())[:TITLE_MAX_CHARS]
+    if len(title) < 3 or title.lower() in GENERIC_TITLES:
+        return None
+    return title
+
+
+def json_ld_headlines(document) -> List[str]:
+    """
+    The headline of every JSON-LD item on the page, including items of an @graph.
+    """
+    headlines = []
+    for script in document.xpath("//script[@type='application/ld+json']"):
+        try:
+            data = json.loads(script.text_content())
+        except ValueError:
+            continue
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            if isinstance(item, dict):
+                graph = item.get("@graph")
+                nodes = [item] + (graph if isinstance(graph, list) else [])
+                headlines += [
+                    node["headline"]
+                    for node in nodes
+                    if isinstance(node, dict) and isinstance(node.get("headline"), str)
+                ]
+    return headlines
+
+
+def title_candidates(document) -> Dict[str, Any]:
+    def meta(name: str) -> Optional[str]:
+        values = document.xpath(
+            f"//meta[@property='{name}' or @name='{name}']/@content"
+        )
+        return clean_title(values[0]) if values else None
+
+    titles = document.xpath("//title")
+    h1s = [clean_title(h1.text_content()) for h1 in document.xpath("//h1")]
+    headlines = [clean_title(headline) for headline in json_ld_headlines(document)]
+    return {
+        "title": clean_title(titles[0].text_content()) if titles else None,
+        "ogTitle": meta("og:title") or meta("twitter:title"),
+        "siteName": meta("og:site_name") or meta("application-name"),
+        "headline": next((headline for headline in headlines if headline), None),
+        # several headings give no single title
+        "h1": h1s[0] if len(h1s) == 1 else None,
+    }
+
+
+def title_from_metadata(document, url: Optional[str] = None) -> Optional[str]:
+    """
+    Read a page's title from its markup, in the "{title} - {source}" format of
+    process_html: og:title, the JSON-LD headline, <title> or the only <h1>,
+    followed by og:site_name, the site name suffix of <title> or the host name.
+
+    Must run before extract_main_text, which drops the head and scripts.
+
+    Args:
+        document: A document parsed with parse_html.
+        url (str, optional): The URL of the page, the source of last resort.
+
+    Returns:
+        Optional[str]: The title, or None when the page has no usable title and
+        the LLM has to read its content.
+    """
+    candidates = title_candidates(document)
+    page_title, suffix = candidates["title"], None
+    if page_title:
+        # "Article | Site" or "Article - Site"
+        separators = list(TITLE_SEPARATORS.finditer(page_title))
+        if separators and len(page_title) - separators[-1].end() <= 40:
+            suffix = clean_title(page_title[separators[-1].end() :])
+            page_title = clean_title(page_title[: separators[-1].start()]) or page_title
+    site = candidates["siteName"] or suffix
+    title = (
+        candidates["ogTitle"]
+        or candidates["headline"]
+        or page_title
+        or candidates["h1"]
+    )
+    if not title:
+        return None
+
+    if not site and url:
+        site = (urlsplit(url).hostname or "").removeprefix("www.") or None
+    if site and site.lower() not in title.lower():
+        return f"{title} - {site}"
+    return title
+
+
+def process_html(raw_html_content) -> Optional[str]:
+    """
+    Extract the title of a page with the LLM.
+
+    Returns:
+        Optional[str]: The title, or None if the request failed.
+    """
     try:
         prompt = (
             "Extract the title or main idea from the following HTML content.\n\n"
@@ -15,7 +148,8 @@ def process_html(raw_html_content):
             "If the title, main content, or source is not clear or not enough data is provided, return 'Unititled Source'.\n\n"
             "Otherwise return the result in this format:\n\n"
             "{title} - {source}\n\n"
-            f"HTML Content:\n{raw_html_content}"
+            # the beginning of a page is enough to name it
+            f"HTML Content:\n{raw_html_content[:TITLE_EXCERPT_CHARS]}"
         )
 
         response = CLIENT.chat.completions.create(
@@ -34,5 +168,93 @@ def process_html(raw_html_content):
         return content
 
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
-        return "Error processing HTML content"
+        logger.error(f"Error extracting a page title: {e}")
+        return None
+
+
+def process_html_batch(raw_html_contents: List[str]) -> List[Optional[str]]:
+    """
+    Extract the titles of several pages with a single chat completion. The
+    excerpts are numbered and the model answers with a JSON object keyed by
+    those numbers.
+
+    Args:
+        raw_html_contents (List[str]): The text of each page.
+
+    Returns:
+        List[Optional[str]]: The title of each page, None for the pages the
+        answer has no title for, or all None if the request failed.
+    """
+    pages = "\n\n".join(
+        f"[{i}]\n{content[:TITLE_BATCH_EXCERPT_CHARS]}"
+        for i, content in enumerate(raw_html_contents)
+    )
+    prompt = (
+        "Extract the title or main idea of each of the following numbered pages.\n\n"
+        "Usually, the title will be available, but if not, try to extract the main idea.\n\n"
+        "This means ignore any other text such as ads that are not part of the title or main idea.\n\n"
+        "For the case of discussions like on reddit, try to extract the title of the discussion.\n\n"
+        "Try to include the source of the content if possible, in this format:\n\n"
+        "{title} - {source}\n\n"
+        "If the title, main content, or source of a page is not clear, use 'Unititled Source'.\n\n"
+        'Return only a JSON object mapping each page number to its title, e.g. {"0": "...", "1": "..."}.\n\n'
+        f"Pages:\n{pages}"
+    )
+    try:
+        TITLE_RATE_LIMITER.acquire()
+        response = CLIENT.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an AI that extracts titles or main ideas from HTML content.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=50 * len(raw_html_contents),
+        )
+        titles = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        logger.error(f"Error extracting {len(raw_html_contents)} page titles: {e}")
+        return [None] * len(raw_html_contents)
+
+    if not isinstance(titles, dict):
+        return [None] * len(raw_html_contents)
+    results = []
+    for i in range(len(raw_html_contents)):
+        title = titles.get(str(i))
+        # missing or empty answers are retried on their own
+        results.append((title.strip() or None) if isinstance(title, str) else None)
+    return results
+
+
+def process_html_many(raw_html_contents: List[str]) -> List[Optional[str]]:
+    """
+    Extract the titles of many pages, TITLE_BATCH_SIZE pages per chat completion
+    with up to TITLE_BATCH_CONCURRENCY completions in flight. Pages a batch
+    returned no title for are retried one by one with process_html.
+
+    Args:
+        raw_html_contents (List[str]): The text of each page.
+
+    Returns:
+        List[Optional[str]]: The title of each page in order, None for the pages
+        whose single request failed too.
+    """
+    batches = [
+        raw_html_contents[i : i + TITLE_BATCH_SIZE]
+        for i in range(0, len(raw_html_contents), TITLE_BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=TITLE_BATCH_CONCURRENCY) as executor:
+        titles = [
+            title
+            for batch_titles in executor.map(process_html_batch, batches)
+            for title in batch_titles
+        ]
+
+    for i, title in enumerate(titles):
+        if title is None:
+            TITLE_RATE_LIMITER.acquire()
+            titles[i] = process_html(raw_html_contents[i])
+    return titles
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 import os
 from dotenv import load_dotenv
@@ -20,9 +21,27 @@ class Settings(BaseSettings):
     next_url: str
     pinecone_api_key: str
     pinecone_index_name: str
+    vector_store: str = "pinecone"  # "pinecone", "memory" or "hnsw"
+    vector_store_path: str = (
+        "data/vectors"  # hnsw graphs, quantized store scratch files
+    )
+    vector_store_quantization: Optional[str] = None  # "int8" or "pq", memory store only
+    hnsw_params: Dict[str, Dict[str, int]] = {}  # namespace -> M, ef_construction, ef
+    embedder: str = "pinecone"  # "pinecone", or "local" for an ONNX model on the CPU
+    embedding_model_path: str = (
+        "models/multilingual-e5-large"  # model.onnx, tokenizer.json
+    )
+    embedding_batch_size: int = 32
+    embedding_batch_wait_ms: float = 5
+    embedding_workers: int = 2
     openai_api_key: str
     s3_bucket_name: str
     cloudfront_domain: str
+    # a CloudFront key pair to sign URLs with, S3 presigned URLs are used without one
+    cloudfront_key_id: Optional[str] = None
+    cloudfront_private_key_path: Optional[str] = None
+    signed_url_expiry_seconds: int = 3600
+    image_workers: int = 2  # processes resizing bucket images
     youtube_api_key: str
 
     class Config:
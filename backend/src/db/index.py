@@ -1,9 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.db.mongodb import get_item_by_id, client as mongo_client
+from src.db.indexes import ensure_indexes
+from src.workers.trending import run_trending_job
+from src.workers.deletion import run_deletion_worker
+from src.workers.embeddings import (
+    enqueue_all_bucket_embeddings,
+    run_embedding_worker,
+)
+from src.workers.passages import enqueue_all_source_passages, run_passage_worker
+from src.workers.images import run_image_worker, shutdown_image_pool
+from src.workers.uploads import run_upload_sweeper
+from src.lib.pinecone.index import VECTOR_STORE
+from src.workers.keyword_index import run_keyword_index_sync
+from src.workers.analytics import SEARCH_ANALYTICS
+from src.utils.search import warm_search_cache
 
 # from src.db.neo4j import driver as neo4j_driver, run_query
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import logging
 
 
@@ -11,7 +26,29 @@ import logging
 async def lifespan(app: FastAPI):
     mongo_client.server_info()  # Connect to both
     logging.info("Successfully connected to MongoDB")
+    ensure_indexes()
+    SEARCH_ANALYTICS.start()
+    if not VECTOR_STORE.persistent:
+        await asyncio.to_thread(enqueue_all_bucket_embeddings)
+        await asyncio.to_thread(enqueue_all_source_passages)
+    workers = [
+        asyncio.create_task(run_trending_job()),
+        asyncio.create_task(run_deletion_worker()),
+        asyncio.create_task(run_embedding_worker()),
+        asyncio.create_task(run_passage_worker()),
+        asyncio.create_task(run_image_worker()),
+        asyncio.create_task(run_upload_sweeper()),
+        asyncio.create_task(run_keyword_index_sync()),
+        asyncio.create_task(asyncio.to_thread(warm_search_cache)),
+    ]
     yield  # Disconnect from both
+    for worker in workers:
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+    await asyncio.to_thread(SEARCH_ANALYTICS.stop)  # flush buffered searches
+    await asyncio.to_thread(VECTOR_STORE.close)
+    await asyncio.to_thread(shutdown_image_pool)
     mongo_client.close()
     # neo4j_driver.close()
     logging.info("Disconnected from MongoDB")
@@ -0,0 +1,121 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from src.db.mongodb import get_collection
+
+# compound indexes backing the keyset pagination in src/utils/pagination.py,
+# each one ends with the (sort field, tiebreak field) pair its endpoint walks
+INDEXES = {
+    "buckets": [
+        IndexModel([("bucketId", ASCENDING)]),
+        IndexModel(
+            [("userId", ASCENDING), ("updated", DESCENDING), ("bucketId", DESCENDING)]
+        ),
+        IndexModel(
+            [
+                ("userId", ASCENDING),
+                ("visibility", ASCENDING),
+                ("updated", DESCENDING),
+                ("bucketId", DESCENDING),
+            ]
+        ),
+        IndexModel(
+            [
+                ("visibility", ASCENDING),
+                ("updated", DESCENDING),
+                ("bucketId", DESCENDING),
+            ]
+        ),
+        IndexModel(
+            [("likes", ASCENDING), ("updated", DESCENDING), ("bucketId", DESCENDING)]
+        ),
+        # popular / trending feeds and the trending refresh job
+        IndexModel(
+            [
+                ("visibility", ASCENDING),
+                ("likesCount", DESCENDING),
+                ("bucketId", DESCENDING),
+            ]
+        ),
+        IndexModel(
+            [
+                ("visibility", ASCENDING),
+                ("trendingScore", DESCENDING),
+                ("bucketId", DESCENDING),
+            ]
+        ),
+        IndexModel(
+            [("trendingStale", ASCENDING)],
+            partialFilterExpression={"trendingStale": True},
+        ),
+        # keyword index catch-up
+        IndexModel([("updated", DESCENDING)]),
+    ],
+    "sources": [
+        IndexModel([("sourceId", ASCENDING)]),
+        # batch URL signing and shared file lookups on deletion
+        IndexModel([("url", ASCENDING)]),
+        IndexModel(
+            [("bucketId", ASCENDING), ("updated", DESCENDING), ("sourceId", DESCENDING)]
+        ),
+    ],
+    "contents": [
+        IndexModel([("hash", ASCENDING)], unique=True),
+    ],
+    "connections": [
+        IndexModel([("connectionId", ASCENDING)]),
+        IndexModel(
+            [
+                ("bucketId", ASCENDING),
+                ("updated", DESCENDING),
+                ("connectionId", DESCENDING),
+            ]
+        ),
+    ],
+    "jobs": [
+        IndexModel([("jobId", ASCENDING)], unique=True),
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("created", ASCENDING)]),
+    ],
+    "outbox": [
+        IndexModel([("bucketId", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("nextAttempt", ASCENDING)]),
+        IndexModel([("claim", ASCENDING)]),
+    ],
+    "passage_outbox": [
+        IndexModel([("sourceId", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("nextAttempt", ASCENDING)]),
+        IndexModel([("claim", ASCENDING)]),
+        IndexModel([("bucketId", ASCENDING)]),
+    ],
+    "source_passages": [
+        IndexModel([("sourceId", ASCENDING)], unique=True),
+        IndexModel([("bucketId", ASCENDING)]),
+    ],
+    "images": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("nextAttempt", ASCENDING)]),
+        IndexModel([("claim", ASCENDING)]),
+        IndexModel([("bucketId", ASCENDING)]),
+        IndexModel([("hash", ASCENDING)]),
+    ],
+    "pages": [
+        IndexModel([("url", ASCENDING)], unique=True),
+    ],
+    "upload_sessions": [
+        IndexModel([("uploadId", ASCENDING)], unique=True),
+        # sessions are dropped a day after they started, finished or not. Pending
+        # ones are aborted in S3 by src/workers/uploads.py an hour before
+        IndexModel([("expires", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "searches": [
+        IndexModel([("userId", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("timestamp", DESCENDING)]),
+    ],
+}
+
+
+def ensure_indexes():
+    """
+    Create the indexes every collection relies on. Safe to run on each startup,
+    Mongo skips indexes that already exist with the same definition.
+    """
+    for collection_name, indexes in INDEXES.items():
+        get_collection(collection_name).create_indexes(indexes)
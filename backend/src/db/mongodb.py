@@ -12,6 +12,15 @@ def get_collection(collection_name: str) -> Collection:
     return db[collection_name]
 
 
+def run_in_transaction(callback):
+    """
+    Run callback(session) in a transaction, retrying it on transient errors.
+    Returns whatever the callback returns.
+    """
+    with client.start_session() as session:
+        return session.with_transaction(callback)
+
+
 ### getters ###
 
 
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from src.lib.embeddings.index import Embedder, InputType
+
+
+class BatchingEmbedder(Embedder):
+    """
+    Coalesce concurrent embed calls into batched calls to another Embedder.
+
+    A collector thread per input type waits for a first input, then keeps
+    collecting inputs of the same type for up to max_wait seconds or until
+    max_batch_size inputs are collected, so query and passage inputs never share
+    a batch. The batch runs on a pool of `workers` threads while the next one is
+    collected, and each caller gets back the results for its own inputs.
+
+    An input that is already waiting or being embedded is not sent again: the
+    caller shares the pending result instead.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        workers: int = 2,
+    ):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.inputs = 0
+        self.deduplicated = 0
+        self._queues: Dict[str, queue.Queue] = {
+            "query": queue.Queue(),
+            "passage": queue.Queue(),
+        }
+        # (input type, text) -> the result of an input waiting or being embedded
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._collectors: Dict[str, threading.Thread] = {}
+
+    def embed(self, inputs: List[str], input_type: InputType) -> List[List[float]]:
+        if not inputs:
+            return []
+        self._start(input_type)
+        futures = []
+        with self._lock:
+            for text in inputs:
+                future = self._in_flight.get((input_type, text))
+                if future is None:
+                    future = self._in_flight[(input_type, text)] = Future()
+                    self._queues[input_type].put(text)
+                else:
+                    self.deduplicated += 1
+                futures.append(future)
+        return [future.result() for future in futures]
+
+    def _start(self, input_type: InputType):
+        with self._lock:
+            if input_type not in self._collectors:
+                collector = threading.Thread(
+                    target=self._collect,
+                    args=(input_type,),
+                    name=f"embedding-batcher-{input_type}",
+                    daemon=True,
+                )
+                self._collectors[input_type] = collector
+                collector.start()
+
+    def _collect(self, input_type: InputType):
+        texts = self._queues[input_type]
+        while True:
+            batch = [texts.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(texts.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run, batch, input_type)
+
+    def _run(self, batch: List[str], input_type: InputType):
+        try:
+            values = self.embedder.embed(batch, input_type)
+        except Exception as e:
+            with self._lock:
+                for text in batch:
+                    self._in_flight.pop((input_type, text)).set_exception(e)
+            return
+
+        with self._lock:
+            self.batches += 1
+            self.inputs += len(batch)
+            for text, value in zip(batch, values):
+                self._in_flight.pop((input_type, text)).set_result(value)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of batches and inputs embedded, and of inputs that
+        shared the result of an identical input in flight.
+        """
+        return {
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "deduplicated": self.deduplicated,
+            "averageBatchSize": self.inputs / self.batches if self.batches else 0,
+        }
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import List, Literal
+
+InputType = Literal["query", "passage"]
+
+
+class Embedder(ABC):
+    """
+    Turns texts into embeddings. e5 models embed search queries and the passages
+    they are matched against differently, so every call states which it embeds.
+    """
+
+    @abstractmethod
+    def embed(self, inputs: List[str], input_type: InputType) -> List[List[float]]:
+        """
+        Embed texts, returning one embedding per input in the same order.
+        """
+
+
+class PineconeEmbedder(Embedder):
+    """
+    An Embedder calling the hosted Pinecone inference API.
+    """
+
+    BATCH_LIMIT = 96  # max inputs per embed call for multilingual-e5-large
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+
+    def embed(self, inputs: List[str], input_type: InputType) -> List[List[float]]:
+        # inputs are batched with other callers' inputs, so an input over the
+        # model's token limit is truncated rather than failing the whole batch
+        parameters = {"input_type": input_type, "truncate": "END"}
+        values = []
+        for start in range(0, len(inputs), self.BATCH_LIMIT):
+            embeddings = self.client.inference.embed(
+                model=self.model,
+                inputs=inputs[start : start + self.BATCH_LIMIT],
+                parameters=parameters,
+            )
+            values += [embedding.values for embedding in embeddings.data]
+        return values
@@ -0,0 +1,55 @@
+import os
+from typing import List
+import numpy as np
+import onnxruntime
+from tokenizers import Tokenizer
+from src.lib.embeddings.index import Embedder, InputType
+
+
+class LocalEmbedder(Embedder):
+    """
+    An Embedder running an ONNX export of an e5 model on the CPU.
+
+    model_dir holds model.onnx and tokenizer.json, e.g. as exported by
+    `optimum-cli export onnx --model intfloat/multilingual-e5-large`. Inputs get the
+    "query: " / "passage: " prefixes e5 was trained with, the token embeddings are
+    mean pooled and the result is L2 normalized.
+    """
+
+    def __init__(self, model_dir: str, max_length: int = 512, threads: int = 0):
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        pad_token = (
+            "<pad>" if self.tokenizer.token_to_id("<pad>") is not None else "[PAD]"
+        )
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token
+        )
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads  # 0 lets onnxruntime pick
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {input.name for input in self.session.get_inputs()}
+
+    def embed(self, inputs: List[str], input_type: InputType) -> List[List[float]]:
+        if not inputs:
+            return []
+        encodings = self.tokenizer.encode_batch(
+            [f"{input_type}: {text}" for text in inputs]
+        )
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.tolist()
@@ -0,0 +1,102 @@
+import io
+from typing import Any, Dict, FrozenSet, List
+from PIL import Image, ImageOps, features
+
+# widths of the resized variants, an image narrower than one of them gets a
+# variant at its own width instead
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_FORMATS = ("webp", "avif")
+DERIVATIVE_QUALITY = {"webp": 80, "avif": 60}
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def derivative_key(digest: str, width: int, format: str) -> str:
+    """
+    The S3 key of a variant. Keys are derived from the hash of the original, so
+    identical images share their variants and regenerating them is a no-op.
+    """
+    return f"derivatives/{digest}/{width}.{format}"
+
+
+def derivative_widths(width: int) -> List[int]:
+    return sorted({min(target, width) for target in DERIVATIVE_WIDTHS})
+
+
+def available_formats() -> List[str]:
+    return [format for format in DERIVATIVE_FORMATS if features.check(format)]
+
+
+def render_derivatives(
+    data: bytes, digest: str, existing: FrozenSet[str] = frozenset()
+) -> Dict[str, Any]:
+    """
+    Resize an image to every derivative width and encode each size in every
+    available format. Runs in a worker process: it only takes and returns bytes.
+
+    Args:
+        data (bytes): The original image.
+        digest (str): The hash of the original, used in the variant keys.
+        existing (FrozenSet[str]): Variant keys already stored, not encoded again.
+
+    Returns:
+        dict: The original's width and height, and its variants, each with its
+        width, height, format, key and encoded body (None for existing keys).
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        width, height = image.size
+
+        variants = []
+        for target in derivative_widths(width):
+            size = (target, max(1, round(height * target / width)))
+            resized = (
+                image
+                if target == width
+                else image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+            )
+            for format in available_formats():
+                key = derivative_key(digest, target, format)
+                body = None
+                if key not in existing:
+                    buffer = io.BytesIO()
+                    resized.save(
+                        buffer, format.upper(), quality=DERIVATIVE_QUALITY[format]
+                    )
+                    body = buffer.getvalue()
+                variants.append(
+                    {
+                        "width": target,
+                        "height": resized.height,
+                        "format": format,
+                        "key": key,
+                        "body": body,
+                    }
+                )
+    return {"width": width, "height": height, "variants": variants}
+
+
+def pick_variant(
+    variants: List[Dict[str, Any]], width: int, format: str = "webp"
+) -> Dict[str, Any]:
+    """
+    Pick the smallest variant of a format at least width pixels wide, or the
+    widest one if none is.
+
+    Args:
+        variants (List[dict]): The variants of an image.
+        width (int): The width the image is displayed at.
+        format (str): The format to pick from.
+
+    Returns:
+        dict: The variant, or None if the image has none in that format.
+    """
+    candidates = sorted(
+        (variant for variant in variants if variant["format"] == format),
+        key=lambda variant: variant["width"],
+    )
+    for variant in candidates:
+        if variant["width"] >= width:
+            return variant
+    return candidates[-1] if candidates else None
@@ -1,14 +1,79 @@
+from typing import List
 from pinecone import Pinecone
 from src.core.config import settings
+from src.lib.embeddings.batching import BatchingEmbedder
+from src.lib.embeddings.index import Embedder, PineconeEmbedder
+from src.lib.vectorstore.index import PineconeVectorStore, VectorStore
+from src.lib.vectorstore.memory import InMemoryVectorStore
+from src.utils.cache import LRUCache
 
 PC = Pinecone(api_key=settings.pinecone_api_key)
-PCINDEX = PC.Index(name=settings.pinecone_index_name)
+
+EMBEDDING_MODEL = "multilingual-e5-large"
+EMBEDDING_BATCH_LIMIT = PineconeEmbedder.BATCH_LIMIT  # inputs per outbox batch
+
+
+def create_vector_store(backend: str) -> VectorStore:
+    """
+    Create the vector store selected by the VECTOR_STORE setting.
+    """
+    if backend == "memory":
+        return InMemoryVectorStore(
+            settings.vector_store_quantization, settings.vector_store_path
+        )
+    if backend == "hnsw":
+        from src.lib.vectorstore.hnsw import HNSWVectorStore
+
+        return HNSWVectorStore(settings.vector_store_path, settings.hnsw_params)
+    if backend == "pinecone":
+        return PineconeVectorStore(PC.Index(name=settings.pinecone_index_name))
+    raise ValueError(f"Unknown vector store: {backend}")
+
+
+VECTOR_STORE = create_vector_store(settings.vector_store)
+
+
+def create_embedder(backend: str) -> Embedder:
+    """
+    Create the embedder selected by the EMBEDDER setting.
+    """
+    if backend == "pinecone":
+        # one hosted request per window instead of one per caller
+        return BatchingEmbedder(
+            PineconeEmbedder(PC, EMBEDDING_MODEL),
+            max_batch_size=PineconeEmbedder.BATCH_LIMIT,
+            max_wait=settings.embedding_batch_wait_ms / 1000,
+            workers=settings.embedding_workers,
+        )
+    if backend == "local":
+        from src.lib.embeddings.local import LocalEmbedder
+
+        return BatchingEmbedder(
+            LocalEmbedder(settings.embedding_model_path),
+            max_batch_size=settings.embedding_batch_size,
+            max_wait=settings.embedding_batch_wait_ms / 1000,
+            workers=settings.embedding_workers,
+        )
+    raise ValueError(f"Unknown embedder: {backend}")
+
+
+EMBEDDER: BatchingEmbedder = create_embedder(settings.embedder)
+
+# normalized query text -> embedding, queries are embedded once an hour at most
+QUERY_EMBEDDING_CACHE = LRUCache(maxsize=4096, ttl=3600)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query string so that trivially different spellings share a cache entry.
+    """
+    return " ".join(query.lower().split())
 
 
 def get_query_embedding(query: str):
     """
-    Generate a vector embedding for a given query string using the Pinecone
-    multilingual-e5-large model.
+    Generate a vector embedding for a given query string with the configured
+    embedder. Embeddings are cached by normalized query text.
 
     Args:
         query (str): The query string to generate an embedding for.
@@ -16,12 +81,41 @@ def get_query_embedding(query: str):
     Returns:
         List[float]: A list of float values representing the embedding of the query.
     """
-    embedding = PC.inference.embed(
-        model="multilingual-e5-large",
-        inputs=[query],
-        parameters={"input_type": "query"},
-    )
-    return embedding[0].values
+    key = normalize_query(query)
+    cached = QUERY_EMBEDDING_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    embedding = EMBEDDER.embed([key], "query")[0]
+    QUERY_EMBEDDING_CACHE.set(key, embedding)
+    return embedding
+
+
+def warm_query_embeddings(queries: List[str]) -> int:
+    """
+    Embed queries that are not cached yet, EMBEDDING_BATCH_LIMIT per embed call,
+    and add them to the query embedding cache.
+
+    Args:
+        queries (List[str]): The queries to warm the cache with.
+
+    Returns:
+        int: The number of queries embedded.
+    """
+    keys = list(dict.fromkeys(normalize_query(query) for query in queries))
+    keys = [key for key in keys if key and QUERY_EMBEDDING_CACHE.get(key) is None]
+    for start in range(0, len(keys), EMBEDDING_BATCH_LIMIT):
+        batch = keys[start : start + EMBEDDING_BATCH_LIMIT]
+        for key, embedding in zip(batch, EMBEDDER.embed(batch, "query")):
+            QUERY_EMBEDDING_CACHE.set(key, embedding)
+    return len(keys)
+
+
+def bucket_embedding_input(name: str, description: str, header_weight: int = 3) -> str:
+    """
+    Build the text embedded for a bucket, giving more weight to the header.
+    """
+    return (name + " ") * header_weight + description
 
 
 def generate_bucket_embeddings(
@@ -30,10 +124,18 @@ def generate_bucket_embeddings(
     """
     Generate vector embeddings by giving more weight to the header.
     """
-    weighted_input = (name + " ") * header_weight + description
-    embeddings = PC.inference.embed(
-        model="multilingual-e5-large",
-        inputs=[weighted_input],
-        parameters={"input_type": "passage", "truncate": "END"},
-    )
-    return embeddings.data[0].values
+    weighted_input = bucket_embedding_input(name, description, header_weight)
+    return generate_passage_embeddings([weighted_input])[0]
+
+
+def generate_passage_embeddings(inputs: List[str]) -> List[List[float]]:
+    """
+    Generate passage embeddings for many inputs.
+
+    Args:
+        inputs (List[str]): The texts to embed.
+
+    Returns:
+        List[List[float]]: One embedding per input, in the same order.
+    """
+    return EMBEDDER.embed(inputs, "passage")
@@ -1,6 +1,39 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 
+MB = 1024 * 1024
+
+# uploads are sent as multipart uploads of 8 MB parts, at most 4 parts in flight
+# per file, so the memory an upload holds does not depend on the file size
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=8 * MB,
+    max_concurrency=4,
+    use_threads=True,
+)
+# files of one request uploaded at the same time
+UPLOAD_PARALLEL_FILES = 4
+
+
+def multipart_etag(part_etags: List[str]) -> str:
+    """
+    Compute the ETag S3 gives an object completed from parts with the given
+    ETags: the MD5 of the concatenated binary part MD5s, followed by the number
+    of parts.
+
+    Args:
+        part_etags (list[str]): The ETags of the parts, in part number order.
+
+    Returns:
+        str: The quoted ETag of the completed object.
+    """
+    digests = b"".join(bytes.fromhex(etag.strip('"')) for etag in part_etags)
+    return f'"{hashlib.md5(digests).hexdigest()}-{len(part_etags)}"'
+
 
 class S3Bucket:
     def __init__(self, bucket_name: str, region_name="us-east-1"):
@@ -42,6 +75,217 @@ class S3Bucket:
         except ClientError as e:
             print(f"Error uploading file: {e}")
 
+    def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        object_name: str,
+        content_type: Optional[str] = None,
+    ) -> int:
+        """
+        Streams a file object to S3, reading it part by part, e.g. the spooled
+        file of an UploadFile. Nothing is written to disk and the file is never
+        held in memory whole.
+
+        Args:
+            fileobj (BinaryIO): A readable binary file object, positioned at the start.
+            object_name (str): Name of the object in S3.
+            content_type (str, optional): The Content-Type to store with the object.
+
+        Returns:
+            int: The number of bytes uploaded.
+
+        Raises:
+            ClientError: If there's an error uploading the file.
+        """
+        # measured first, the transfer closes the file once a single part upload
+        # is sent
+        start = fileobj.tell()
+        size = fileobj.seek(0, 2) - start
+        fileobj.seek(start)
+        extra_args = {"ContentType": content_type} if content_type else None
+        self.bucket.upload_fileobj(
+            fileobj, object_name, ExtraArgs=extra_args, Config=UPLOAD_TRANSFER_CONFIG
+        )
+        return size
+
+    def upload_fileobjs(
+        self, uploads: List[Tuple[BinaryIO, str, Optional[str]]]
+    ) -> List[int]:
+        """
+        Streams several file objects to S3 in parallel, UPLOAD_PARALLEL_FILES at a time.
+
+        Args:
+            uploads (list[tuple]): (file object, object name, content type) triples.
+
+        Returns:
+            list[int]: The number of bytes uploaded for each file, in order.
+
+        Raises:
+            ClientError: If any upload fails, after the others finished.
+        """
+        if len(uploads) == 1:
+            return [self.upload_fileobj(*uploads[0])]
+        with ThreadPoolExecutor(
+            max_workers=min(len(uploads), UPLOAD_PARALLEL_FILES)
+        ) as pool:
+            futures = [pool.submit(self.upload_fileobj, *upload) for upload in uploads]
+        return [future.result() for future in futures]
+
+    def create_multipart_upload(
+        self, object_name: str, content_type: Optional[str] = None
+    ) -> str:
+        """
+        Starts a multipart upload whose parts clients send directly to S3.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            content_type (str, optional): The Content-Type to store with the object.
+
+        Returns:
+            str: The S3 upload ID.
+        """
+        extra_args = {"ContentType": content_type} if content_type else {}
+        response = self.s3.meta.client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=object_name, **extra_args
+        )
+        return response["UploadId"]
+
+    def presign_upload_part(
+        self, object_name: str, upload_id: str, part_number: int, expires_in=3600
+    ) -> str:
+        """
+        Signs a URL a client can PUT one part of a multipart upload to.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            upload_id (str): The S3 upload ID.
+            part_number (int): The number of the part, from 1.
+            expires_in (int, optional): Seconds the URL is valid for. Defaults to 3600.
+
+        Returns:
+            str: The presigned URL.
+        """
+        return self.s3.meta.client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket_name,
+                "Key": object_name,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    def list_uploaded_parts(
+        self, object_name: str, upload_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Lists the parts of a multipart upload S3 received so far.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            upload_id (str): The S3 upload ID.
+
+        Returns:
+            list[dict]: The PartNumber, ETag and Size of every received part.
+        """
+        paginator = self.s3.meta.client.get_paginator("list_parts")
+        return [
+            {
+                "PartNumber": part["PartNumber"],
+                "ETag": part["ETag"],
+                "Size": part["Size"],
+            }
+            for page in paginator.paginate(
+                Bucket=self.bucket_name, Key=object_name, UploadId=upload_id
+            )
+            for part in page.get("Parts", [])
+        ]
+
+    def complete_multipart_upload(
+        self, object_name: str, upload_id: str, parts: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Assembles the uploaded parts into the object.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            upload_id (str): The S3 upload ID.
+            parts (list[dict]): The PartNumber and ETag of every part, in order.
+
+        Returns:
+            str: The ETag of the completed object.
+
+        Raises:
+            ClientError: If a part is missing or its ETag does not match.
+        """
+        response = self.s3.meta.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=object_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        return response["ETag"]
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str):
+        """
+        Aborts a multipart upload and frees the parts uploaded so far.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            upload_id (str): The S3 upload ID.
+        """
+        self.s3.meta.client.abort_multipart_upload(
+            Bucket=self.bucket_name, Key=object_name, UploadId=upload_id
+        )
+
+    def head_object(self, object_name: str) -> Dict[str, Any]:
+        """
+        Reads the metadata of an object, e.g. its ContentLength and ETag.
+
+        Args:
+            object_name (str): Name of the object in S3.
+
+        Returns:
+            dict: The HeadObject response.
+        """
+        return self.s3.meta.client.head_object(Bucket=self.bucket_name, Key=object_name)
+
+    def get_object_bytes(self, object_name: str) -> bytes:
+        """
+        Reads a whole object into memory, for small objects such as images.
+
+        Args:
+            object_name (str): Name of the object in S3.
+
+        Returns:
+            bytes: The object's body.
+        """
+        return self.bucket.Object(object_name).get()["Body"].read()
+
+    def put_object(
+        self,
+        object_name: str,
+        body: bytes,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ):
+        """
+        Writes a small object in a single request.
+
+        Args:
+            object_name (str): Name of the object in S3.
+            body (bytes): The object's body.
+            content_type (str, optional): The Content-Type to store with the object.
+            cache_control (str, optional): The Cache-Control to serve the object with.
+        """
+        extra_args = {}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        self.bucket.put_object(Key=object_name, Body=body, **extra_args)
+
     def download_file(self, object_name, file_path):
         """
         Downloads a file from S3.
@@ -92,6 +336,29 @@ class S3Bucket:
         except ClientError as e:
             print(f"Error deleting object: {e}")
 
+    def delete_objects(self, object_names, batch_size=1000):
+        """
+        Deletes many objects from the S3 bucket, batch_size keys per DeleteObjects call.
+
+        Args:
+            object_names (list[str]): Names of the objects in S3.
+            batch_size (int, optional): Keys per request, at most 1000. Defaults to 1000.
+
+        Returns:
+            list[str]: Names of the objects that could not be deleted.
+
+        Raises:
+            ClientError: If a DeleteObjects request fails.
+        """
+        failed = []
+        for start in range(0, len(object_names), batch_size):
+            batch = object_names[start : start + batch_size]
+            response = self.bucket.delete_objects(
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+            )
+            failed += [error["Key"] for error in response.get("Errors", [])]
+        return failed
+
     def download_file_object(self, key: str, file_object: str):
         """
         Downloads a file from S3.
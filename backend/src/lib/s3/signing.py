@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote
+from pytz import UTC
+from src.utils.cache import LRUCache
+
+SIGNED_URL_EXPIRY_SECONDS = 3600
+# cached URLs are handed out until this many seconds before they expire
+SIGNED_URL_REFRESH_MARGIN_SECONDS = 300
+SIGNED_URL_CACHE_SIZE = 20000
+
+
+def load_cloudfront_signer(key_id: str, private_key_path: str):
+    """
+    Build a botocore CloudFrontSigner from a key pair registered with a
+    CloudFront key group. Requires the cryptography package.
+    """
+    from botocore.signers import CloudFrontSigner
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    with open(private_key_path, "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+
+    def rsa_signer(message: bytes) -> bytes:
+        return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+
+    return CloudFrontSigner(key_id, rsa_signer)
+
+
+class URLSigner:
+    """
+    Sign URLs to objects of an S3 bucket, caching each URL until shortly before
+    it expires so a key is signed once per expiry period instead of per request.
+
+    Objects are signed as S3 presigned URLs, or as CloudFront signed URLs on
+    cloudfront_domain when a CloudFront key pair is configured. Both are computed
+    locally, without a request to AWS.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket_name: str,
+        cloudfront_domain: Optional[str] = None,
+        cloudfront_signer=None,
+        expires_in: int = SIGNED_URL_EXPIRY_SECONDS,
+    ):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.cloudfront_domain = cloudfront_domain
+        self.cloudfront_signer = cloudfront_signer
+        self.expires_in = expires_in
+        self.cache = LRUCache(
+            SIGNED_URL_CACHE_SIZE,
+            ttl=max(expires_in - SIGNED_URL_REFRESH_MARGIN_SECONDS, 0),
+        )
+
+    def sign(self, key: str, content_type: Optional[str] = None) -> str:
+        """
+        Return a signed URL to read an object.
+
+        Args:
+            key (str): The key of the object.
+            content_type (str, optional): The Content-Type S3 should serve the
+                object with, inline. Ignored for CloudFront URLs, which serve the
+                stored Content-Type.
+
+        Returns:
+            str: The signed URL, valid for at least the refresh margin.
+        """
+        cache_key = (key, content_type)
+        url = self.cache.get(cache_key)
+        if url is None:
+            url = self._sign(key, content_type)
+            self.cache.set(cache_key, url)
+        return url
+
+    def sign_many(
+        self, keys: Iterable[str], content_type: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Return a signed URL for each of many keys.
+        """
+        return {key: self.sign(key, content_type) for key in keys}
+
+    def public_url(self, key: str) -> str:
+        """
+        Return the CloudFront URL of an object, signed if a key pair is configured.
+        """
+        if self.cloudfront_signer:
+            return self.sign(key)
+        return f"https://{self.cloudfront_domain}/{key}"
+
+    def _sign(self, key: str, content_type: Optional[str]) -> str:
+        if self.cloudfront_signer and self.cloudfront_domain:
+            return self.cloudfront_signer.generate_presigned_url(
+                f"https://{self.cloudfront_domain}/{quote(key)}",
+                date_less_than=datetime.now(UTC) + timedelta(seconds=self.expires_in),
+            )
+        params = {"Bucket": self.bucket_name, "Key": key}
+        if content_type:
+            params["ResponseContentDisposition"] = "inline"
+            params["ResponseContentType"] = content_type
+        return self.s3_client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=self.expires_in
+        )
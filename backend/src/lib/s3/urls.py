@@ -0,0 +1,18 @@
+import boto3
+from src.core.config import settings
+from src.lib.s3.signing import URLSigner, load_cloudfront_signer
+
+# signed URLs to user files, shared by every route that hands them out
+URL_SIGNER = URLSigner(
+    boto3.client("s3"),
+    settings.s3_bucket_name,
+    cloudfront_domain=settings.cloudfront_domain,
+    cloudfront_signer=(
+        load_cloudfront_signer(
+            settings.cloudfront_key_id, settings.cloudfront_private_key_path
+        )
+        if settings.cloudfront_key_id and settings.cloudfront_private_key_path
+        else None
+    ),
+    expires_in=settings.signed_url_expiry_seconds,
+)
@@ -0,0 +1,408 @@
+import fcntl
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence
+import hnswlib
+import numpy as np
+from src.lib.vectorstore.index import Vector, VectorStore
+from src.lib.vectorstore.memory import MetadataIndex, normalize_rows
+
+DEFAULT_HNSW_PARAMS = {"M": 16, "ef_construction": 200, "ef": 64}
+INITIAL_CAPACITY = 1024
+# logged operations replayed at startup before the namespace is checkpointed again
+CHECKPOINT_EVERY = 1000
+# filters matching at most this many vectors are scored exactly instead of walking
+# the graph, which degrades when most of the neighbours it visits are filtered out
+EXACT_SEARCH_LIMIT = 4096
+
+
+def file_version(path: str) -> Optional[tuple]:
+    """
+    Identify the version of a file replaced atomically, without reading it.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class HNSWNamespace:
+    """
+    The HNSW graph of one namespace, persisted in a directory as:
+
+    {name}.{n}.hnsw  the graph and vectors at checkpoint n
+    {name}.json      the id, label and metadata maps at the last checkpoint, and
+                     the name of its graph file
+    {name}.log       the operations applied since, one JSON line each, after a
+                     header naming the checkpoint they apply to
+
+    A checkpoint writes a new graph file, then replaces the state file, which
+    commits it, then starts a new log. A log whose header names another
+    checkpoint was left by a crash before the new log was started, and its
+    operations are all in the checkpoint, so it is discarded.
+
+    Loading replays the log on top of the checkpoint, so the graph is never
+    rebuilt. Several processes can share a directory: writes are serialized by
+    an exclusive lock on {name}.lock, and every process replays the operations
+    the others appended to the log before it reads or writes.
+    """
+
+    def __init__(self, directory: str, name: str, params: Dict[str, int]):
+        self.path = os.path.join(directory, name or "default")
+        self.state_path = f"{self.path}.json"
+        self.log_path = f"{self.path}.log"
+        self.params = {**DEFAULT_HNSW_PARAMS, **params}
+        self.lock_file = open(f"{self.path}.lock", "a")
+        self.thread_lock = threading.RLock()
+        self.reset()
+        with self.locked():
+            self.sync()
+
+    def reset(self):
+        self.index: Optional[hnswlib.Index] = None
+        self.labels: Dict[str, int] = {}
+        self.ids: Dict[int, str] = {}
+        self.metadata: Dict[int, Dict[str, Any]] = {}
+        self.filter_index = MetadataIndex()
+        self.next_label = 0
+        self.tombstones = 0  # deleted slots add_items can reuse
+        self.checkpoint = 0
+        self.index_file = None
+        self.state_version = None
+        self.log_inode = None
+        self.log_offset = 0
+        self.logged = 0
+
+    @contextmanager
+    def locked(self):
+        with self.thread_lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def sync(self):
+        """
+        Catch up with the files: reload the checkpoint if another process wrote a
+        new one, then replay the log. Must hold the lock.
+        """
+        if file_version(self.state_path) != self.state_version:
+            self.load()
+        self.replay()
+
+    def load(self):
+        """
+        Load the last checkpoint.
+        """
+        self.reset()
+        if not os.path.exists(self.state_path):
+            return
+        self.state_version = file_version(self.state_path)
+        with open(self.state_path) as f:
+            state = json.load(f)
+        # checkpoints written before graph files were numbered
+        self.index_file = state.get("index", f"{os.path.basename(self.path)}.hnsw")
+        self.index = hnswlib.Index(space="cosine", dim=state["dimension"])
+        self.index.load_index(
+            os.path.join(os.path.dirname(self.path), self.index_file),
+            allow_replace_deleted=True,
+        )
+        self.index.set_ef(self.params["ef"])
+        self.labels = state["labels"]
+        self.ids = {label: id for id, label in self.labels.items()}
+        self.metadata = {int(label): md for label, md in state["metadata"].items()}
+        for label, metadata in self.metadata.items():
+            self.filter_index.add(label, metadata)
+        self.next_label = state["nextLabel"]
+        self.tombstones = state["tombstones"]
+        self.checkpoint = state["checkpoint"]
+
+    def replay(self):
+        """
+        Apply the operations appended to the log since it was last read. Must hold
+        the lock and be in sync with the state file.
+        """
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path) as f:
+            header = json.loads(f.readline() or "{}")
+            stale = header.get("checkpoint") != self.checkpoint
+            if not stale:
+                self.log_inode = os.fstat(f.fileno()).st_ino
+                f.seek(max(self.log_offset, f.tell()))
+                while (line := f.readline()).endswith("\n"):
+                    self.apply(json.loads(line))
+                    self.logged += 1
+                    self.log_offset = f.tell()
+        if stale:
+            self.start_log()
+
+    def refresh(self):
+        """
+        Catch up with writes from other processes, if there were any.
+        """
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self.log_inode or stat.st_size != self.log_offset:
+            with self.locked():
+                self.sync()
+
+    def write(self, operation: Dict[str, Any]):
+        """
+        Apply an operation and append it to the log.
+        """
+        with self.locked():
+            self.sync()
+            self.apply(operation)
+            if not os.path.exists(self.log_path):
+                self.start_log()
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(operation) + "\n")
+                self.log_offset = f.tell()
+            self.logged += 1
+            if self.logged >= CHECKPOINT_EVERY:
+                self.save()
+
+    def start_log(self):
+        with open(f"{self.log_path}.tmp", "w") as f:
+            f.write(json.dumps({"checkpoint": self.checkpoint}) + "\n")
+            self.log_offset = f.tell()
+        os.replace(f"{self.log_path}.tmp", self.log_path)
+        self.log_inode = os.stat(self.log_path).st_ino
+        self.logged = 0
+
+    def save(self):
+        """
+        Checkpoint the namespace and start an empty log. Must hold the lock.
+        """
+        if self.index is None:
+            return
+        checkpoint = self.checkpoint + 1
+        index_file = f"{os.path.basename(self.path)}.{checkpoint}.hnsw"
+        self.index.save_index(os.path.join(os.path.dirname(self.path), index_file))
+        with open(f"{self.state_path}.tmp", "w") as f:
+            json.dump(
+                {
+                    "dimension": self.index.dim,
+                    "index": index_file,
+                    "labels": self.labels,
+                    "metadata": self.metadata,
+                    "nextLabel": self.next_label,
+                    "tombstones": self.tombstones,
+                    "checkpoint": checkpoint,
+                },
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+        self.index_file = index_file
+        self.checkpoint = checkpoint
+        self.state_version = file_version(self.state_path)
+        self.start_log()
+        self.remove_old_graphs()
+
+    def remove_old_graphs(self):
+        """
+        Delete the graph files of earlier checkpoints, including those left by a
+        crash during a checkpoint.
+        """
+        directory, name = os.path.split(self.path)
+        pattern = re.compile(rf"{re.escape(name)}(\.\d+)?\.hnsw")
+        for file in os.listdir(directory):
+            if pattern.fullmatch(file) and file != self.index_file:
+                try:
+                    os.remove(os.path.join(directory, file))
+                except FileNotFoundError:
+                    pass
+
+    def apply(self, operation: Dict[str, Any]):
+        if operation["op"] == "upsert":
+            self.apply_upsert(operation["vectors"])
+        elif operation["op"] == "update":
+            label = self.labels.get(operation["id"])
+            if label is not None:
+                self.set_metadata(
+                    label, {**self.metadata[label], **operation["metadata"]}
+                )
+        elif operation["op"] == "delete":
+            for id in operation["ids"]:
+                label = self.labels.pop(id, None)
+                if label is None:
+                    continue
+                try:
+                    self.index.mark_deleted(label)
+                except RuntimeError:  # already deleted in a checkpoint being replayed
+                    pass
+                self.filter_index.remove(label, self.metadata.pop(label))
+                del self.ids[label]
+                self.tombstones += 1
+
+    def apply_upsert(self, vectors: List[Vector]):
+        values = np.asarray([vector[1] for vector in vectors], dtype=np.float32)
+        if self.index is None:
+            self.index = hnswlib.Index(space="cosine", dim=values.shape[1])
+            self.index.init_index(
+                max_elements=INITIAL_CAPACITY,
+                M=self.params["M"],
+                ef_construction=self.params["ef_construction"],
+                allow_replace_deleted=True,
+            )
+            self.index.set_ef(self.params["ef"])
+
+        labels = []
+        added = 0
+        for id, _, metadata in vectors:
+            label = self.labels.get(id)
+            if label is None:
+                label = self.labels[id] = self.next_label
+                self.ids[label] = id
+                self.metadata[label] = {}
+                self.next_label += 1
+                added += 1
+            labels.append(label)
+            self.set_metadata(label, dict(metadata or {}))
+
+        appended = max(0, added - self.tombstones)
+        needed = self.index.element_count + appended
+        if needed > self.index.max_elements:
+            self.index.resize_index(max(needed, 2 * self.index.max_elements))
+        self.tombstones -= added - appended
+        self.index.add_items(values, labels, replace_deleted=True)
+
+    def set_metadata(self, label: int, metadata: Dict[str, Any]):
+        self.filter_index.remove(label, self.metadata[label])
+        self.metadata[label] = metadata
+        self.filter_index.add(label, metadata)
+
+    def query(
+        self, vector: Sequence[float], top_k: int, filter: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        self.refresh()
+        query = normalize_rows(np.asarray(vector, dtype=np.float32))
+        with self.thread_lock:
+            if self.index is None or not self.labels:
+                return []
+            allowed = self.filter_index.resolve(filter, self.ids) if filter else None
+            k = min(top_k, len(allowed) if allowed is not None else len(self.labels))
+            if k <= 0:
+                return []
+
+            labels = scores = None
+            if allowed is None or len(allowed) > EXACT_SEARCH_LIMIT:
+                self.index.set_ef(max(self.params["ef"], k))
+                try:
+                    found, distances = self.index.knn_query(
+                        query, k=k, filter=allowed.__contains__ if allowed else None
+                    )
+                    labels, scores = found[0], 1 - distances[0]
+                except RuntimeError:  # the graph walk found fewer than k matches
+                    pass
+            if labels is None:
+                allowed = allowed if allowed is not None else self.ids
+                labels = np.fromiter(allowed, dtype=np.int64)
+                values = self.index.get_items(labels.tolist(), return_type="numpy")
+                scores = values @ query
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                labels, scores = labels[top], scores[top]
+
+            return [
+                {
+                    "id": self.ids[label],
+                    "score": float(score),
+                    "metadata": dict(self.metadata[label]),
+                }
+                for label, score in zip(labels.tolist(), scores)
+            ]
+
+    def fetch(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        self.refresh()
+        with self.thread_lock:
+            found = [id for id in ids if id in self.labels]
+            if not found:
+                return {}
+            labels = [self.labels[id] for id in found]
+            values = self.index.get_items(labels, return_type="numpy")
+            return {
+                id: {
+                    "id": id,
+                    "values": row.tolist(),
+                    "metadata": dict(self.metadata[label]),
+                }
+                for id, label, row in zip(found, labels, values)
+            }
+
+
+class HNSWVectorStore(VectorStore):
+    """
+    A self-hosted, persistent VectorStore answering queries with an approximate
+    nearest neighbour search on an HNSW graph (hnswlib), for catalogues too large
+    for the exact in-memory store.
+
+    Deletes mark vectors as tombstones that later inserts reuse, so vectors can be
+    added and removed one at a time without rebuilding the graph. M, ef_construction
+    and ef can be set per namespace.
+    """
+
+    def __init__(self, directory: str, params: Dict[str, Dict[str, int]] = None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.params = params or {}
+        self._namespaces: Dict[str, HNSWNamespace] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str) -> HNSWNamespace:
+        with self._lock:
+            space = self._namespaces.get(name)
+            if space is None:
+                space = self._namespaces[name] = HNSWNamespace(
+                    self.directory, name, self.params.get(name, {})
+                )
+            return space
+
+    def upsert(self, vectors: List[Vector], namespace: str):
+        if vectors:
+            vectors = [
+                [id, [float(value) for value in values], metadata]
+                for id, values, metadata in vectors
+            ]
+            self.namespace(namespace).write({"op": "upsert", "vectors": vectors})
+
+    def update(self, id: str, set_metadata: Dict[str, Any], namespace: str):
+        self.namespace(namespace).write(
+            {"op": "update", "id": id, "metadata": set_metadata}
+        )
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        return self.namespace(namespace).query(vector, top_k, filter)
+
+    def delete(self, ids: List[str], namespace: str):
+        if ids:
+            self.namespace(namespace).write({"op": "delete", "ids": list(ids)})
+
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        return self.namespace(namespace).fetch(ids)
+
+    def close(self):
+        """
+        Checkpoint every namespace, so the next startup has no log to replay.
+        """
+        for space in list(self._namespaces.values()):
+            with space.locked():
+                space.sync()
+                if space.logged:
+                    space.save()
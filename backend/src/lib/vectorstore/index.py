@@ -0,0 +1,128 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (id, values, metadata), the tuple format accepted by Pinecone's upsert
+Vector = Tuple[str, Sequence[float], Dict[str, Any]]
+
+
+class VectorStore(ABC):
+    """
+    The vector index used for semantic search, split into namespaces.
+
+    Filters use Pinecone's metadata filter syntax, e.g. {"visibility": {"$eq": "Public"}},
+    and matches are returned as {"id", "score", "metadata"} dicts, best first.
+    """
+
+    # whether vectors survive a restart; non persistent stores are refilled at startup
+    persistent = True
+
+    @abstractmethod
+    def upsert(self, vectors: List[Vector], namespace: str):
+        """
+        Insert vectors, replacing the values and metadata of existing ids.
+        """
+
+    @abstractmethod
+    def update(self, id: str, set_metadata: Dict[str, Any], namespace: str):
+        """
+        Merge fields into the metadata of a vector.
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the top_k vectors most similar to vector that match the filter.
+        """
+
+    @abstractmethod
+    def delete(self, ids: List[str], namespace: str):
+        """
+        Delete vectors by id, ignoring ids that do not exist.
+        """
+
+    @abstractmethod
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the {"id", "values", "metadata"} of the existing vectors among ids.
+        """
+
+    def close(self):
+        """
+        Flush anything the store keeps in memory, called at shutdown.
+        """
+
+
+class PineconeVectorStore(VectorStore):
+    """
+    A VectorStore backed by a hosted Pinecone index.
+    """
+
+    UPSERT_BATCH_SIZE = 100  # keeps upsert requests well under Pinecone's 2MB limit
+    DELETE_BATCH_SIZE = 1000  # Pinecone's limit on ids per delete
+    FETCH_BATCH_SIZE = 100  # ids are sent in the query string
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors: List[Vector], namespace: str):
+        for start in range(0, len(vectors), self.UPSERT_BATCH_SIZE):
+            self.index.upsert(
+                vectors=vectors[start : start + self.UPSERT_BATCH_SIZE],
+                namespace=namespace,
+            )
+
+    def update(self, id: str, set_metadata: Dict[str, Any], namespace: str):
+        self.index.update(id=id, set_metadata=set_metadata, namespace=namespace)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        response = self.index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace,
+            filter=filter,
+        )
+        return [
+            {
+                "id": match["id"],
+                "score": match["score"],
+                "metadata": match.get("metadata") or {},
+            }
+            for match in response["matches"]
+        ]
+
+    def delete(self, ids: List[str], namespace: str):
+        for start in range(0, len(ids), self.DELETE_BATCH_SIZE):
+            self.index.delete(
+                ids=ids[start : start + self.DELETE_BATCH_SIZE], namespace=namespace
+            )
+
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        vectors = {}
+        for start in range(0, len(ids), self.FETCH_BATCH_SIZE):
+            response = self.index.fetch(
+                ids=ids[start : start + self.FETCH_BATCH_SIZE], namespace=namespace
+            )
+            vectors.update(
+                {
+                    id: {
+                        "id": id,
+                        "values": list(vector.values),
+                        "metadata": vector.metadata or {},
+                    }
+                    for id, vector in response.vectors.items()
+                }
+            )
+        return vectors
@@ -0,0 +1,400 @@
+import copy
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set
+import numpy as np
+from src.lib.vectorstore.index import Vector, VectorStore
+from src.lib.vectorstore.quantization import (
+    SCORE_BLOCK_SIZE,
+    TRAIN_SAMPLE_SIZE,
+    create_quantizer,
+)
+
+INITIAL_CAPACITY = 1024
+# quantized namespaces are scored exactly until they hold this many vectors
+QUANTIZE_MIN_VECTORS = 4096
+QUANTIZE_RETRAIN_GROWTH = 4
+# candidates re-ranked exactly: RERANK_FACTOR * top_k, at least RERANK_MIN_CANDIDATES
+RERANK_FACTOR = 10
+RERANK_MIN_CANDIDATES = 100
+
+
+def normalize_rows(values: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(values, axis=-1, keepdims=True)
+    return values / np.where(norms == 0, 1, norms)
+
+
+def index_keys(value: Any) -> List[Hashable]:
+    """
+    The keys a metadata value is indexed under. List values are indexed under
+    each of their elements, so {"tags": {"$eq": "ml"}} matches ["ml", "nlp"] as
+    it does in Pinecone.
+    """
+    values = value if isinstance(value, list) else [value]
+    return [value for value in values if isinstance(value, Hashable)]
+
+
+class MetadataIndex:
+    """
+    An inverted index from metadata field values to the rows having them, used
+    to resolve filters without scanning every row's metadata.
+    """
+
+    def __init__(self):
+        # field -> value -> rows whose metadata has that value
+        self.fields: Dict[str, Dict[Hashable, Set[int]]] = {}
+
+    def add(self, row: int, metadata: Dict[str, Any]):
+        for field, value in metadata.items():
+            values = self.fields.setdefault(field, {})
+            for key in index_keys(value):
+                values.setdefault(key, set()).add(row)
+
+    def remove(self, row: int, metadata: Dict[str, Any]):
+        for field, value in metadata.items():
+            values = self.fields[field]
+            for key in index_keys(value):
+                rows = values[key]
+                rows.discard(row)
+                if not rows:
+                    del values[key]
+
+    def resolve(self, filter: Dict[str, Any], rows: Iterable[int]) -> Set[int]:
+        """
+        Resolve a metadata filter to the rows matching it. Supports plain values
+        and the $eq, $ne, $in and $nin operators.
+
+        Args:
+            filter (dict): A Pinecone style metadata filter.
+            rows (Iterable[int]): Every live row, used by the negated operators.
+
+        Returns:
+            Set[int]: The matching rows.
+        """
+        matching: Optional[Set[int]] = None
+        for field, condition in filter.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            values = self.fields.get(field, {})
+            for op, expected in condition.items():
+                if op in ("$eq", "$ne"):
+                    found = set(values.get(expected, ()))
+                elif op in ("$in", "$nin"):
+                    found = set().union(*(values.get(key, ()) for key in expected))
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                if op in ("$ne", "$nin"):
+                    found = set(rows) - found
+                matching = found if matching is None else matching & found
+        return matching if matching is not None else set(rows)
+
+
+class Namespace:
+    """
+    The vectors of one namespace, stored as the first count rows of a contiguous
+    float32 matrix. Deleting a vector moves the last row into its place, so the
+    live rows always form one block that is scored with a single matrix product.
+
+    With a quantizer, candidates are scored on compact codes kept in memory and
+    only the best ones are re-ranked exactly against the float32 matrix, which
+    then lives in a memory-mapped scratch file in directory. The quantizer is
+    trained on a background thread, queries are scored exactly until it is ready.
+
+    lock guards every access to the namespace, including the training thread's.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        quantizer=None,
+        directory: str = None,
+        lock: threading.RLock = None,
+    ):
+        self.dimension = dimension
+        self.quantizer = quantizer
+        self.directory = directory
+        self.lock = lock or threading.RLock()
+        self.trained_count = 0  # vectors in the namespace when the quantizer was fit
+        self.codes = None
+        self.training: Optional[threading.Thread] = None
+        # rows written while the quantizer trains, encoded again when it is done
+        self.dirty: Optional[Set[int]] = None
+        self.matrix = self.allocate(INITIAL_CAPACITY)
+        self.count = 0
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.filter_index = MetadataIndex()
+
+    def allocate(self, capacity: int) -> np.ndarray:
+        if self.quantizer is None or self.directory is None:
+            return np.zeros((capacity, self.dimension), dtype=np.float32)
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".f32") as f:
+            # the mapping keeps the pages alive after the file is unlinked
+            return np.memmap(f.name, np.float32, "w+", shape=(capacity, self.dimension))
+
+    def grow(self):
+        matrix = self.allocate(2 * len(self.matrix))
+        matrix[: self.count] = self.matrix[: self.count]
+        self.matrix = matrix
+        if self.codes is not None:
+            codes = np.zeros((len(matrix), self.codes.shape[1]), dtype=np.uint8)
+            codes[: self.count] = self.codes[: self.count]
+            self.codes = codes
+
+    def needs_training(self) -> bool:
+        """
+        Whether the quantizer should be fit: once there are enough vectors and
+        again whenever their number grew QUANTIZE_RETRAIN_GROWTH times.
+        """
+        if self.quantizer is None or self.count < QUANTIZE_MIN_VECTORS:
+            return False
+        return (
+            not self.trained_count
+            or self.count >= QUANTIZE_RETRAIN_GROWTH * self.trained_count
+        )
+
+    def schedule_training(self):
+        """
+        Start training the quantizer on a background thread if it is due. Must
+        hold the lock.
+        """
+        if self.training is None and self.needs_training():
+            self.dirty = set()
+            self.training = threading.Thread(
+                target=self.train, name="quantizer-training", daemon=True
+            )
+            self.training.start()
+
+    def wait_for_training(self, timeout: float = None):
+        training = self.training
+        if training is not None:
+            training.join(timeout)
+
+    def train(self):
+        """
+        Fit a copy of the quantizer on a sample of the vectors and encode them
+        without holding the lock, then swap the new codes in, encoding again the
+        rows written in the meantime.
+        """
+        try:
+            with self.lock:
+                count, matrix = self.count, self.matrix
+                sample = np.random.default_rng(0).choice(
+                    count, min(count, TRAIN_SAMPLE_SIZE), replace=False
+                )
+                vectors = np.array(matrix[np.sort(sample)])
+            quantizer = copy.deepcopy(self.quantizer).fit(vectors)
+            encoded = np.concatenate(
+                [
+                    quantizer.encode(
+                        matrix[start : min(start + SCORE_BLOCK_SIZE, count)]
+                    )
+                    for start in range(0, count, SCORE_BLOCK_SIZE)
+                ]
+            )
+
+            with self.lock:
+                codes = np.zeros((len(self.matrix), encoded.shape[1]), dtype=np.uint8)
+                kept = min(count, self.count)
+                codes[:kept] = encoded[:kept]
+                stale = {row for row in self.dirty or () if row < kept}
+                stale.update(range(kept, self.count))
+                if stale:
+                    rows = np.fromiter(sorted(stale), dtype=np.int64)
+                    codes[rows] = quantizer.encode(self.matrix[rows])
+                self.quantizer, self.codes = quantizer, codes
+                self.trained_count = count
+        finally:
+            with self.lock:
+                self.dirty = None
+                self.training = None
+
+    def upsert(self, id: str, values: np.ndarray, metadata: Dict[str, Any]):
+        row = self.rows.get(id)
+        if row is None:
+            if self.count == len(self.matrix):
+                self.grow()
+            row = self.count
+            self.count += 1
+            self.rows[id] = row
+            self.ids.append(id)
+            self.metadata.append({})
+        self.matrix[row] = values
+        if self.dirty is not None:
+            self.dirty.add(row)
+        if self.codes is not None:
+            self.codes[row] = self.quantizer.encode(values[None, :])[0]
+        self.set_metadata(row, metadata)
+
+    def search(self, query: np.ndarray, top_k: int, rows: Optional[np.ndarray]):
+        """
+        Return the top_k (row, score) pairs among rows, or among every row if None.
+        """
+        count = self.count if rows is None else len(rows)
+        candidates = max(top_k * RERANK_FACTOR, RERANK_MIN_CANDIDATES)
+        if self.codes is not None and count > candidates:
+            codes = self.codes[: self.count] if rows is None else self.codes[rows]
+            approximate = self.quantizer.scores(codes, query)
+            best = np.argpartition(-approximate, candidates - 1)[:candidates]
+            rows = best if rows is None else rows[best]
+            rows.sort()  # sequential reads from the memory-mapped matrix
+
+        scores = (
+            self.matrix[: self.count] @ query
+            if rows is None
+            else self.matrix[rows] @ query
+        )
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top_rows = rows[top] if rows is not None else top
+        return list(zip(top_rows.tolist(), scores[top].tolist()))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The bytes of vector data the live vectors keep in process memory.
+        """
+        codes = self.codes[: self.count].nbytes if self.codes is not None else 0
+        if isinstance(self.matrix, np.memmap):
+            return codes
+        return self.matrix[: self.count].nbytes + codes
+
+    def set_metadata(self, row: int, metadata: Dict[str, Any]):
+        self.filter_index.remove(row, self.metadata[row])
+        self.metadata[row] = metadata
+        self.filter_index.add(row, metadata)
+
+    def delete(self, id: str):
+        row = self.rows.pop(id, None)
+        if row is None:
+            return
+        last = self.count - 1
+        self.filter_index.remove(row, self.metadata[row])
+        if row != last:
+            moved = self.ids[last]
+            self.filter_index.remove(last, self.metadata[last])
+            self.matrix[row] = self.matrix[last]
+            if self.dirty is not None:
+                self.dirty.add(row)
+            if self.codes is not None:
+                self.codes[row] = self.codes[last]
+            self.ids[row] = moved
+            self.metadata[row] = self.metadata[last]
+            self.rows[moved] = row
+            self.filter_index.add(row, self.metadata[row])
+        self.ids.pop()
+        self.metadata.pop()
+        self.count = last
+
+    def filter_rows(self, filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Return the sorted rows matching a metadata filter.
+        """
+        rows = self.filter_index.resolve(filter, range(self.count))
+        return np.fromiter(sorted(rows), dtype=np.int64)
+
+
+class InMemoryVectorStore(VectorStore):
+    """
+    An exact, in-process VectorStore for small deployments, tests and benchmarks.
+
+    Vectors are normalized on insert, so the dot product of a query with the
+    matrix gives cosine scores, and the top_k rows are selected with argpartition
+    instead of a full sort. fetch returns the normalized values. Nothing is persisted.
+
+    quantization ("int8" or "pq") scores candidates on 8-bit codes and re-ranks the
+    best of them exactly, keeping the float32 vectors in scratch files in directory.
+    """
+
+    persistent = False
+
+    def __init__(self, quantization: str = None, directory: str = None):
+        self.quantization = quantization
+        self.directory = directory
+        self._namespaces: Dict[str, Namespace] = {}
+        self._lock = threading.RLock()
+
+    def upsert(self, vectors: List[Vector], namespace: str):
+        if not vectors:
+            return
+        values = normalize_rows(
+            np.asarray([vector[1] for vector in vectors], dtype=np.float32)
+        )
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if space is None:
+                space = self._namespaces[namespace] = Namespace(
+                    values.shape[1],
+                    create_quantizer(self.quantization) if self.quantization else None,
+                    self.directory,
+                    self._lock,
+                )
+            if values.shape[1] != space.matrix.shape[1]:
+                raise ValueError(
+                    f"Expected vectors of dimension {space.matrix.shape[1]}, "
+                    f"got {values.shape[1]}"
+                )
+            for (id, _, metadata), row_values in zip(vectors, values):
+                space.upsert(id, row_values, dict(metadata or {}))
+            space.schedule_training()
+
+    def update(self, id: str, set_metadata: Dict[str, Any], namespace: str):
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            row = space.rows.get(id) if space else None
+            if row is not None:
+                space.set_metadata(row, {**space.metadata[row], **set_metadata})
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        namespace: str,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        query = normalize_rows(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if space is None or not space.count or top_k <= 0:
+                return []
+            rows = space.filter_rows(filter) if filter else None
+            return [
+                {
+                    "id": space.ids[row],
+                    "score": score,
+                    "metadata": dict(space.metadata[row]),
+                }
+                for row, score in space.search(query, top_k, rows)
+            ]
+
+    def delete(self, ids: List[str], namespace: str):
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if space:
+                for id in ids:
+                    space.delete(id)
+
+    def fetch(self, ids: List[str], namespace: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            space = self._namespaces.get(namespace)
+            if not space:
+                return {}
+            return {
+                id: {
+                    "id": id,
+                    "values": space.matrix[space.rows[id]].tolist(),
+                    "metadata": dict(space.metadata[space.rows[id]]),
+                }
+                for id in ids
+                if id in space.rows
+            }
+
+    def count(self, namespace: str) -> int:
+        space = self._namespaces.get(namespace)
+        return space.count if space else 0
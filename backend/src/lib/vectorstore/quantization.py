@@ -0,0 +1,139 @@
+import math
+import numpy as np
+
+# rows scored per step, bounds the float32 copy made while scoring codes
+SCORE_BLOCK_SIZE = 4096
+# vectors sampled to train a quantizer
+TRAIN_SAMPLE_SIZE = 20000
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension 8-bit scalar quantization: each dimension is mapped linearly
+    from its trained [min, max] range to 0..255, one byte per dimension (4x
+    smaller than float32).
+    """
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        self.low = vectors.min(axis=0)
+        self.scale = (vectors.max(axis=0) - self.low) / 255
+        self.scale[self.scale == 0] = 1
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Dot products of the query with the decoded vectors, computed on the codes
+        as codes @ (query * scale) + query @ low.
+        """
+        weights = (query * self.scale).astype(np.float32)
+        offset = float(query @ self.low)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_SIZE):
+            block = codes[start : start + SCORE_BLOCK_SIZE]
+            scores[start : start + len(block)] = (
+                block.astype(np.float32) @ weights + offset
+            )
+        return scores
+
+
+class ProductQuantizer:
+    """
+    Product quantization: vectors are split into subspaces and each slice is
+    replaced by the index of its nearest of 256 k-means centroids, one byte per
+    subspace. With 64 subspaces a 1024-dim vector takes 64 bytes instead of 4 KB.
+    The number of subspaces is lowered to a divisor of the dimension if needed.
+
+    Queries are scored with one lookup table of query-centroid dot products per
+    subspace, so no vector is decoded.
+    """
+
+    def __init__(self, subspaces: int = 64, iterations: int = 20, seed: int = 0):
+        self.subspaces = subspaces
+        self.iterations = iterations
+        self.seed = seed
+
+    def fit(self, vectors: np.ndarray) -> "ProductQuantizer":
+        self.subspaces = math.gcd(vectors.shape[1], self.subspaces)
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > TRAIN_SAMPLE_SIZE:
+            vectors = vectors[
+                rng.choice(len(vectors), TRAIN_SAMPLE_SIZE, replace=False)
+            ]
+        self.centroids = np.stack(
+            [
+                kmeans(part, min(256, len(vectors)), self.iterations, rng)
+                for part in self.split(vectors)
+            ]
+        )
+        return self
+
+    def split(self, vectors: np.ndarray):
+        return np.split(vectors.astype(np.float32), self.subspaces, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.stack(
+            [
+                nearest(part, centroids)
+                for part, centroids in zip(self.split(vectors), self.centroids)
+            ],
+            axis=1,
+        ).astype(np.uint8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # tables[s, c]: dot product of the query's slice s with centroid c of subspace s
+        parts = self.split(query[None, :])
+        tables = np.stack(
+            [centroids @ part[0] for part, centroids in zip(parts, self.centroids)]
+        )
+        subspaces = np.arange(self.subspaces)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_SIZE):
+            block = codes[start : start + SCORE_BLOCK_SIZE]
+            scores[start : start + len(block)] = tables[subspaces, block].sum(axis=1)
+        return scores
+
+
+def nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    distances = (
+        -2 * vectors @ centroids.T + np.einsum("ij,ij->i", centroids, centroids)[None]
+    )
+    return distances.argmin(axis=1)
+
+
+def kmeans(
+    vectors: np.ndarray, count: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Lloyd's k-means, returning count centroids padded to 256 rows with copies of
+    the first one, which argmin never picks over the original.
+    """
+    centroids = vectors[rng.choice(len(vectors), count, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest(vectors, centroids)
+        sums = np.stack(
+            [
+                np.bincount(assignments, weights=column, minlength=count)
+                for column in vectors.T
+            ],
+            axis=1,
+        )
+        counts = np.bincount(assignments, minlength=count)[:, None]
+        # keep empty clusters where they were
+        centroids = np.where(
+            counts > 0, sums / np.maximum(counts, 1), centroids
+        ).astype(np.float32)
+    padded = np.repeat(centroids[:1], 256, axis=0).astype(np.float32)
+    padded[:count] = centroids
+    return padded
+
+
+def create_quantizer(kind: str):
+    if kind == "int8":
+        return ScalarQuantizer()
+    if kind == "pq":
+        return ProductQuantizer()
+    raise ValueError(f"Unknown quantization: {kind}")
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from src.db.mongodb import get_collection
 
 Searches = get_collection("searches")
+SearchEpochs = get_collection("search_epochs")
 
 
 class SearchFilter(BaseModel):
@@ -44,6 +44,10 @@ class IterateBucket(BaseModel):
     description: str
 
 
+class BatchBuckets(BaseModel):
+    bucketIds: list[str]
+
+
 class LikeBucket(BaseModel):
     bucketId: str
 
@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+from src.db.mongodb import get_collection
+
+# bucket images and their resized variants, one document per original S3 key
+Images = get_collection("images")
+
+
+class ImageVariant(BaseModel):
+    width: int
+    height: int
+    format: Literal["webp", "avif"]
+    key: str
+
+
+class BucketImage(BaseModel):
+    key: str
+    bucketId: str
+    status: Literal["pending", "processing", "ready", "failed"]
+    attempts: int
+    enqueued: datetime
+    nextAttempt: datetime
+    claim: Optional[str]
+    leaseUntil: Optional[datetime]
+    lastError: Optional[str]
+    hash: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    variants: List[ImageVariant] = []
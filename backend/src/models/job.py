@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+from src.db.mongodb import get_collection
+
+Jobs = get_collection("jobs")
+
+
+class Job(BaseModel):
+    jobId: str
+    type: Literal["delete_bucket"]
+    status: Literal["pending", "running", "done", "failed"]
+    stage: str
+    attempts: int
+    payload: dict
+    leaseUntil: Optional[datetime]
+    lastError: Optional[str]
+    created: datetime
+    updated: datetime
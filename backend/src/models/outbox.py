@@ -0,0 +1,34 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+from src.db.mongodb import get_collection
+
+# buckets whose vector in the buckets namespace is out of date, one entry per bucket
+Outbox = get_collection("outbox")
+
+
+class OutboxEntry(BaseModel):
+    bucketId: str
+    status: Literal["pending", "processing"]
+    attempts: int
+    enqueued: datetime
+    nextAttempt: datetime
+    claim: Optional[str]
+    leaseUntil: Optional[datetime]
+    lastError: Optional[str]
+
+
+# sources whose passages in the sources namespace are out of date, one entry per source
+PassageOutbox = get_collection("passage_outbox")
+
+
+class PassageOutboxEntry(BaseModel):
+    sourceId: str
+    bucketId: str
+    status: Literal["pending", "processing"]
+    attempts: int
+    enqueued: datetime
+    nextAttempt: datetime
+    claim: Optional[str]
+    leaseUntil: Optional[datetime]
+    lastError: Optional[str]
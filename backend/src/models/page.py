@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from src.db.mongodb import get_collection
+
+# fetched webpages shared by every website source of the same canonical URL
+Pages = get_collection("pages")
+
+
+class Page(BaseModel):
+    url: str
+    html: bytes  # zlib compressed
+    htmlHash: str
+    title: str
+    contentHash: str  # the source body, in the contents collection
+    textLength: int
+    etag: Optional[str]
+    lastModified: Optional[str]
+    fetched: datetime
+    checked: datetime
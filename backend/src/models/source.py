@@ -4,6 +4,10 @@ from datetime import datetime
 from src.db.mongodb import get_collection
 
 Sources = get_collection("sources")
+# immutable source bodies shared by reference between a source and its forks
+Contents = get_collection("contents")
+# the hashes of the passages of each source indexed in the sources namespace
+SourcePassages = get_collection("source_passages")
 
 
 class Source(BaseModel):
@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import datetime
+from src.db.mongodb import get_collection
+
+# multipart uploads clients send straight to S3, one document per upload
+UploadSessions = get_collection("upload_sessions")
+
+# the source types a file upload can create
+UploadFileType = Literal["document"]
+
+
+class CreateUploadSession(BaseModel):
+    bucketId: str
+    filename: str
+    size: int = Field(..., gt=0)
+    contentType: Optional[str] = None
+    # "source" uploads become a source of type fileType, "bucketImage" uploads
+    # are added to the bucket's images
+    target: Literal["source", "bucketImage"] = "source"
+    # also the S3 folder of the upload, so never free-form
+    fileType: UploadFileType = "document"
+
+
+class UploadedPart(BaseModel):
+    partNumber: int = Field(..., ge=1)
+    etag: str
+
+
+class CompleteUploadSession(BaseModel):
+    parts: List[UploadedPart]
+
+
+class UploadSession(BaseModel):
+    uploadId: str
+    s3UploadId: str
+    key: str
+    bucketId: str
+    userId: str
+    filename: str
+    size: int
+    contentType: Optional[str]
+    target: Literal["source", "bucketImage"]
+    fileType: UploadFileType
+    partSize: int
+    partCount: int
+    status: Literal["pending", "completed", "aborted"]
+    sourceId: Optional[str]
+    created: datetime
+    expires: datetime
@@ -1,26 +1,68 @@
 from fastapi import APIRouter, Depends, UploadFile, File
 from src.routes.auth.oauth2 import manager
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+import asyncio
 from typing import Optional, Literal
-import os
 from werkzeug.utils import secure_filename
 import uuid
 from src.lib.s3.index import S3Bucket
+from src.lib.s3.urls import URL_SIGNER
+from src.lib.images.index import pick_variant
+from src.models.image import Images
+from src.workers.images import (
+    derivative_keys,
+    enqueue_image_derivatives,
+    unreferenced_derivative_keys,
+)
 from pytz import UTC
 from src.utils.exceptions import check_user
-from src.utils.search import run_semantic_search
+from src.utils.search import (
+    KEYWORD_INDEX_FIELDS,
+    SEARCH_RESULT_CACHE,
+    bump_search_epoch,
+    index_bucket,
+    unindex_bucket,
+    run_search,
+)
+from src.utils.pagination import keyset_paginate
 from src.models.user import User, Users
-from src.models.analytics import Search, Searches
+from src.models.analytics import Search
 from src.models.source import Sources
+from src.models.connection import Connections
 from datetime import datetime
-from src.models.bucket import Buckets, BucketConfig, UpdateBucket, IterateBucket
+from src.models.bucket import (
+    Buckets,
+    BatchBuckets,
+    BucketConfig,
+    UpdateBucket,
+    IterateBucket,
+)
 from fastapi.exceptions import HTTPException
 from botocore.exceptions import ClientError
 from src.lib.logger.index import logger
 from pymongo import ReturnDocument
 from src.core.config import settings
 import boto3
-from src.lib.pinecone.index import PCINDEX, PC, generate_bucket_embeddings
+from src.lib.pinecone.index import PC, EMBEDDER, QUERY_EMBEDDING_CACHE
+from src.service.buckets import (
+    BUCKET_CARDS_LIMIT,
+    BUCKET_CARD_FIELDS,
+    fork_bucket,
+    get_bucket_cards,
+)
+from src.service.snapshots import (
+    SNAPSHOT_CACHE,
+    SNAPSHOT_SOURCE_FIELDS,
+    BUMP_VERSION,
+    snapshot_etag,
+    invalidate_snapshot,
+)
+from src.workers.embeddings import enqueue_bucket_embedding
+from src.db.mongodb import run_in_transaction
+from src.workers.deletion import enqueue_bucket_deletion
+from src.workers.analytics import SEARCH_ANALYTICS
 
 router = APIRouter()
 
@@ -30,23 +72,23 @@ s3 = boto3.client("s3")
 
 @router.get("/all/user")
 def get_user_buckets(
-    page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     criteria: Optional[str] = None,
     user: User = Depends(manager),
 ):
     """
-    Retrieve paginated buckets belonging to a user, sorted by creation date in descending order,
-    with an optional limit on the total number of buckets.
+    Retrieve a page of buckets belonging to a user, most recently updated first.
 
     Args:
-        page (int): The current page number.
         page_size (int): The number of items per page.
-        limit (int, optional): Maximum number of buckets to fetch.
+        cursor (str, optional): An opaque cursor returned by a previous page.
+        criteria (str, optional): "public" or "private" to filter on visibility.
         user (User): The user whose buckets are to be retrieved.
 
     Returns:
-        dict: A JSON response containing the paginated list of buckets and pagination metadata.
+        dict: A JSON response containing the page of buckets and the cursors to the
+        neighbouring pages. The total count is only included on the first page.
     """
     check_user(user)
 
@@ -62,42 +104,33 @@ def get_user_buckets(
         else:
             visibility = None
 
+        query = {"userId": user["id"]}
         if visibility:
-            buckets = list(
-                Buckets.find(
-                    {"visibility": visibility, "userId": user["id"]}, {"_id": 0}
-                )
-            )
-        else:
-            buckets = list(
-                Buckets.find({"userId": user["id"]}, {"_id": 0}, sort=[("updated", -1)])
-            )
-
-        # pagination
-        total_buckets = len(buckets)
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        paginated_buckets = buckets[start_index:end_index]
+            query["visibility"] = visibility
 
-        next_cursor = page + 1 if end_index < total_buckets else None
-        prev_cursor = page - 1 if page > 1 else None
+        page = keyset_paginate(
+            Buckets, query, ("updated", "bucketId"), page_size, cursor
+        )
 
-        return {
-            "items": paginated_buckets,
-            "total": total_buckets,
-            "page": page,
+        response = {
+            "items": page["items"],
             "page_size": page_size,
-            "nextCursor": next_cursor,
-            "prevCursor": prev_cursor,
+            "nextCursor": page["nextCursor"],
+            "prevCursor": page["prevCursor"],
         }
+        if not cursor:
+            response["total"] = Buckets.count_documents(query)
+        return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching buckets: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching buckets {e}")
 
 
 @router.get("/all/public")
-async def get_public_buckets(limit: int = 20, cursor: str = None):
+def get_public_buckets(limit: int = Query(20, ge=1, le=100), cursor: str = None):
     """
     Retrieve public buckets with cursor-based pagination.
 
@@ -106,73 +139,93 @@ async def get_public_buckets(limit: int = 20, cursor: str = None):
     limit : int
         Number of buckets to return per page
     cursor : str
-        Timestamp-based cursor for pagination
+        Opaque cursor returned by the previous page
 
     Returns
     -------
     dict
         Dictionary containing buckets and next cursor
     """
-    query = {"visibility": "Public"}
-
-    if cursor:
-        query["updated"] = {"$lt": datetime.fromisoformat(cursor)}
-
-    buckets_list = list(
-        Buckets.find(query, {"_id": 0}).sort("updated", -1).limit(limit + 1)
+    page = keyset_paginate(
+        Buckets, {"visibility": "Public"}, ("updated", "bucketId"), limit, cursor
     )
+    return {"result": page["items"], "nextCursor": page["nextCursor"]}
+
 
-    has_next_page = len(buckets_list) > limit
-    next_cursor = None
+@router.get("/popular")
+def get_popular_buckets(limit: int = Query(10, ge=1, le=100)):
+    """
+    Retrieve the most liked buckets.
 
-    if has_next_page:
-        buckets_list = buckets_list[:-1]
-        next_cursor = buckets_list[-1]["updated"]
+    Parameters
+    ----------
+    limit : int
+        Number of buckets to return
 
-    return {"result": buckets_list, "nextCursor": next_cursor}
+    Returns
+    -------
+    dict
+        Dictionary containing buckets
+    """
+    top_buckets = list(
+        Buckets.find({"visibility": "Public"}, {"_id": 0})
+        .sort([("likesCount", -1), ("bucketId", -1)])
+        .limit(limit)
+    )
+    return {"result": top_buckets}
 
 
-@router.get("/popular")
-def get_popular_buckets(limit: int = 10):
+@router.get("/trending")
+def get_trending_buckets(limit: int = Query(10, ge=1, le=100)):
     """
-    Retrieve popular buckets with cursor-based pagination.
+    Retrieve trending buckets, ranked by likes decayed by bucket age.
 
     Parameters
     ----------
     limit : int
-        Number of buckets to return per page
+        Number of buckets to return
 
     Returns
     -------
     dict
-        Dictionary containing buckets and next cursor
+        Dictionary containing buckets
     """
-    pipeline = [
-        {"$addFields": {"likesCount": {"$size": "$likes"}}},
-        {"$sort": {"likesCount": -1}},
-        {"$limit": limit},
-        {"$project": {"_id": 0, "likesCount": 0}},
-    ]
-    top_buckets = list(Buckets.aggregate(pipeline))
-    return {"result": top_buckets}
+    trending_buckets = list(
+        Buckets.find({"visibility": "Public"}, {"_id": 0})
+        .sort([("trendingScore", -1), ("bucketId", -1)])
+        .limit(limit)
+    )
+    return {"result": trending_buckets}
 
 
 @router.get("/liked/user")  # get all liked buckets belonging to a user
-def get_user_liked_buckets(user: User = Depends(manager)):
+def get_user_liked_buckets(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user: User = Depends(manager),
+):
     """
-    Retrieve all buckets liked by a user.
+    Retrieve a page of buckets liked by a user.
 
     Args:
+        limit (int): The number of buckets per page.
+        cursor (str, optional): An opaque cursor returned by a previous page.
         user (User): The user whose liked buckets are to be retrieved.
 
     Returns:
-        dict: A JSON response containing a list of liked buckets sorted by creation date in descending order.
+        dict: A JSON response containing the liked bucket cards, most recently updated
+        first, and the cursor to the next page.
     """
     check_user(user)
-    likedBuckets = Buckets.find(
-        {"likes": user["id"]}, {"_id": 0}, sort=[("created", -1)]
+    page = keyset_paginate(
+        Buckets,
+        {"likes": user["id"]},
+        ("updated", "bucketId"),
+        limit,
+        cursor,
+        projection=BUCKET_CARD_FIELDS,
     )
-    return {"result": likedBuckets}
+    return {"result": page["items"], "nextCursor": page["nextCursor"]}
 
 
 @router.post("/create")
@@ -201,23 +254,19 @@ def create_bucket(config: BucketConfig, user=Depends(manager)):
             "visibility": config.visibility,
             "tags": config.tags or [],
             "likes": [],
+            "likesCount": 0,
+            "trendingStale": True,
             "iterations": [],
             "imageKeys": [],
         }
 
-        # pinecone pipeline
-        vectors = generate_bucket_embeddings(config.name, config.description)
-        pincone_insert = bucket_to_insert.copy()
-        pincone_insert["created"] = str(bucket_to_insert["created"])
-        pincone_insert["updated"] = str(bucket_to_insert["updated"])
-        embedding_data = [(bucketId, vectors, pincone_insert)]
-        PCINDEX.upsert(
-            vectors=embedding_data,
-            namespace="buckets",
-        )
+        def write(session):
+            Buckets.insert_one(bucket_to_insert, session=session)
+            enqueue_bucket_embedding(bucketId, session=session)
 
-        # mongo insert
-        Buckets.insert_one(bucket_to_insert)
+        run_in_transaction(write)
+        index_bucket(bucket_to_insert)
+        bump_search_epoch()
         return {"result": bucketId}
 
     except Exception as e:
@@ -233,52 +282,47 @@ async def upload_file(
 ):
 
     check_user(user)
-    uploaded_image_urls = []
 
     try:
-        for file in files:
-            # sanitize filename
-            safe_filename = secure_filename(file.filename)
-            object_name = f"files/{user['id']}/{bucket_id}/images/{safe_filename}"
-
-            temp_dir = "/tmp/bucket_uploads"
-            os.makedirs(temp_dir, exist_ok=True)
-
-            temp_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{safe_filename}")
-
-            try:
-                contents = await file.read()
-                with open(temp_path, "wb") as buffer:
-                    buffer.write(contents)
-
-                s3_bucket.upload_file(
-                    temp_path,
-                    object_name,
-                )
-
-                url = f"https://{s3_bucket.bucket_name}.s3.{s3_bucket.region_name}.amazonaws.com/{object_name}"
-                uploaded_image_urls.append(url)
-
-                result = Buckets.update_one(
-                    {"bucketId": bucket_id, "userId": user["id"]},
-                    {
-                        "$push": {"imageKeys": object_name},
-                        "$set": {"updated": datetime.now(UTC)},
-                    },
-                )
-
-                if result.modified_count == 0:
-                    raise HTTPException(status_code=404, detail="Bucket not found")
-
-            except Exception as e:
-                logger.error(f"Error uploading file {safe_filename}: {str(e)}")
-                raise HTTPException(
-                    status_code=500, detail=f"Error uploading file: {str(e)}"
-                )
-            finally:
-                # clean up
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+        # sanitize filenames
+        object_names = [
+            f"files/{user['id']}/{bucket_id}/images/{secure_filename(file.filename)}"
+            for file in files
+        ]
+
+        try:
+            # stream the spooled files to S3 in parallel
+            await asyncio.to_thread(
+                s3_bucket.upload_fileobjs,
+                [
+                    (file.file, object_name, file.content_type)
+                    for file, object_name in zip(files, object_names)
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Error uploading files to bucket {bucket_id}: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail=f"Error uploading file: {str(e)}"
+            )
+
+        uploaded_image_urls = [
+            f"https://{s3_bucket.bucket_name}.s3.{s3_bucket.region_name}.amazonaws.com/{object_name}"
+            for object_name in object_names
+        ]
+
+        result = Buckets.update_one(
+            {"bucketId": bucket_id, "userId": user["id"]},
+            {
+                "$push": {"imageKeys": {"$each": object_names}},
+                "$set": {"updated": datetime.now(UTC)},
+                "$inc": BUMP_VERSION,
+            },
+        )
+        invalidate_snapshot(bucket_id)
+
+        if result.modified_count == 0:
+            raise HTTPException(status_code=404, detail="Bucket not found")
+        enqueue_image_derivatives(object_names, bucket_id)
 
         return {"imageUrls": uploaded_image_urls}
 
@@ -295,26 +339,40 @@ def delete_image(bucket_id: str, image_name: str, user=Depends(manager)):
 
     result = Buckets.update_one(
         {"bucketId": bucket_id, "userId": user["id"], "imageKeys": filepath},
-        {"$pull": {"imageKeys": filepath}, "$set": {"updated": datetime.now(UTC)}},
+        {
+            "$pull": {"imageKeys": filepath},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
     )
+    invalidate_snapshot(bucket_id)
 
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Bucket not found")
 
     s3.delete_object(Bucket=s3_bucket.bucket_name, Key=filepath)
+    image = Images.find_one_and_delete({"key": filepath}, {"_id": 0, "variants": 1})
+    if image:
+        s3_bucket.delete_objects(unreferenced_derivative_keys(derivative_keys([image])))
     return {"result": "Image deleted"}
 
 
 @router.get("/images/bucket/{bucket_id}")
-def get_bucket_images(bucket_id: str):
+def get_bucket_images(bucket_id: str, width: int = Query(640, ge=1, le=4096)):
     """
     Retrieve all image URLs associated with a given bucket.
 
+    Images with resized variants are served as the smallest WebP variant at
+    least width pixels wide, the others as the original until their variants
+    are generated.
+
     Args:
         bucket_id (str): The ID of the bucket to retrieve images for.
+        width (int): The width in pixels the images are displayed at.
 
     Returns:
-        dict: A JSON response containing a list of image URLs.
+        dict: A JSON response containing a list of image URLs, and for each image
+        its original URL and the URLs of all its variants, e.g. for a srcset.
 
     Raises:
         HTTPException: If the bucket is not found, raises a 404 error.
@@ -326,15 +384,38 @@ def get_bucket_images(bucket_id: str):
         raise HTTPException(status_code=404, detail=f"Bucket not found!")
 
     imageKeys = bucket.get("imageKeys", [])
+    variants = {
+        image["key"]: image["variants"]
+        for image in Images.find(
+            {"key": {"$in": imageKeys}, "status": "ready"},
+            {"_id": 0, "key": 1, "variants": 1},
+        )
+    }
     urls = []
+    images = []
     try:
         for key in imageKeys:
-            url = f"https://{settings.cloudfront_domain}/{key}"
+            variant = pick_variant(variants.get(key, []), width)
+            url = URL_SIGNER.public_url(variant["key"] if variant else key)
             urls.append(url)
+            images.append(
+                {
+                    "original": URL_SIGNER.public_url(key),
+                    "variants": [
+                        {
+                            "width": variant["width"],
+                            "height": variant["height"],
+                            "format": variant["format"],
+                            "url": URL_SIGNER.public_url(variant["key"]),
+                        }
+                        for variant in variants.get(key, [])
+                    ],
+                }
+            )
     except ClientError as e:
         raise HTTPException(status_code=500, detail=str(e))
     logger.info(f"Urls generated {urls}")
-    return {"result": urls}
+    return {"result": urls, "images": images}
 
 
 @router.delete("/delete")
@@ -342,29 +423,30 @@ def delete_bucket(bucketId: str, user=Depends(manager)):
     """
     Delete a bucket.
 
+    The bucket is removed right away; its sources, connections, files and vector
+    are cleaned up by a background deletion job.
+
     Args:
         bucketId (str): The ID of the bucket to delete.
         user (User): The user making the request.
 
     Returns:
-        dict: A JSON response with a result key.
+        dict: A JSON response with a result key and the ID of the deletion job.
 
     Raises:
         HTTPException: If the bucket is not found or the user is not the owner of the bucket.
 
     """
     check_user(user)
-    Buckets.delete_one({"bucketId": bucketId, "userId": user["id"]})
-
-    PCINDEX.delete(ids=[bucketId], namespace="buckets")
+    jobId = enqueue_bucket_deletion(bucketId, user["id"])
+    if not jobId:
+        raise HTTPException(status_code=404, detail="Bucket not found")
 
-    sourcesForBucket = Sources.find({"bucketId": bucketId})
-    for source in sourcesForBucket:
-        if source["type"] == "document":
-            s3.delete_object(Bucket=s3_bucket.bucket_name, Key=source["url"])
-        Sources.delete_one({"sourceId": source["sourceId"]})
+    invalidate_snapshot(bucketId)
+    unindex_bucket(bucketId)
+    bump_search_epoch()
 
-    return {"result": "Bucket deleted"}
+    return {"result": "Bucket deleted", "jobId": jobId}
 
 
 @router.patch("/update/{bucketId}")
@@ -388,31 +470,25 @@ def update_bucket(bucketId: str, config: UpdateBucket, user=Depends(manager)):
     update_fields = config.model_dump()
     update_fields["updated"] = datetime.now(UTC)
 
-    vector_updates = {}
-    if "name" in update_fields:
-        vector_updates["name"] = update_fields["name"]
-    if "description" in update_fields:
-        vector_updates["description"] = update_fields["description"]
-
-    if vector_updates:
-        vectors = generate_bucket_embeddings(
-            vector_updates["name"], vector_updates["description"]
-        )
-        PCINDEX.update(
-            id=bucketId,
-            values=vectors,
-            set_metadata=update_fields,
-            namespace="buckets",
+    def write(session):
+        result = Buckets.update_one(
+            {"bucketId": bucketId, "userId": user["id"]},
+            {"$set": update_fields, "$inc": BUMP_VERSION},
+            session=session,
         )
+        if result.modified_count:
+            enqueue_bucket_embedding(bucketId, session=session)
+        return result
 
-    result = Buckets.update_one(
-        {"bucketId": bucketId, "userId": user["id"]}, {"$set": update_fields}
-    )
+    result = run_in_transaction(write)
+    invalidate_snapshot(bucketId)
 
     if result.modified_count == 0:
         raise HTTPException(
             status_code=404, detail="Bucket not found or no changes applied"
         )
+    index_bucket({**bucket, **update_fields})
+    bump_search_epoch()
 
     return {"result": "Bucket updated"}
 
@@ -445,6 +521,77 @@ def get_bucket_by_id(bucketId: str, user=Depends(manager.optional)):
         return {"result": bucket}
 
 
+@router.get("/{bucket_id}/snapshot")
+async def get_bucket_snapshot(
+    bucket_id: str,
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(manager.optional),
+):
+    """
+    Retrieve a bucket together with its sources and connections in one response.
+
+    The response carries the bucket version as its ETag. A request whose
+    If-None-Match matches the current version gets a 304, and unchanged
+    snapshots are served from an in-process cache.
+
+    Args:
+        bucket_id (str): The ID of the bucket to retrieve.
+        if_none_match (str, optional): The ETag of a snapshot the client already has.
+        user (Optional[User]): The user making the request. Defaults to None.
+
+    Returns:
+        dict: A JSON response containing the bucket, its sources (without their
+        content) and its connections.
+
+    Raises:
+        HTTPException: If the bucket is not found or is private to another user, raises a 404 error.
+    """
+    if user:
+        check_user(user)
+
+    bucket = await asyncio.to_thread(
+        Buckets.find_one,
+        {"bucketId": bucket_id},
+        {"_id": 0, "bucketId": 1, "version": 1, "visibility": 1, "userId": 1},
+    )
+    if not bucket or (
+        bucket["visibility"] == "Private"
+        and (not user or user["id"] != bucket["userId"])
+    ):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    etag = snapshot_etag(bucket)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+
+    cached = SNAPSHOT_CACHE.get(bucket_id)
+    if cached and cached[0] == etag:
+        return JSONResponse(cached[1], headers=headers)
+
+    bucket, sources, connections = await asyncio.gather(
+        asyncio.to_thread(Buckets.find_one, {"bucketId": bucket_id}, {"_id": 0}),
+        asyncio.to_thread(
+            lambda: list(Sources.find({"bucketId": bucket_id}, SNAPSHOT_SOURCE_FIELDS))
+        ),
+        asyncio.to_thread(
+            lambda: list(Connections.find({"bucketId": bucket_id}, {"_id": 0}))
+        ),
+    )
+    if not bucket:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    snapshot = jsonable_encoder(
+        {"result": {"bucket": bucket, "sources": sources, "connections": connections}}
+    )
+    # a write that landed during the reads may be missing from the sources or
+    # connections, so only a snapshot whose version did not move is cached. It
+    # is sent with the version read first, which the client revalidates.
+    if snapshot_etag(bucket) == etag:
+        SNAPSHOT_CACHE.set(bucket_id, (etag, snapshot))
+    return JSONResponse(snapshot, headers=headers)
+
+
 @router.post("/like/{bucket_id}")
 def like_bucket(bucket_id: str, user=Depends(manager)):
     """
@@ -464,11 +611,16 @@ def like_bucket(bucket_id: str, user=Depends(manager)):
 
     result = Buckets.find_one_and_update(
         {"bucketId": bucket_id, "likes": {"$ne": user["id"]}},
-        {"$addToSet": {"likes": user["id"]}},
+        {
+            "$addToSet": {"likes": user["id"]},
+            "$inc": {"likesCount": 1, **BUMP_VERSION},
+            "$set": {"trendingStale": True},
+        },
         return_document=ReturnDocument.AFTER,
     )
     if not result:
         raise HTTPException(status_code=400, detail="Already liked or bucket not found")
+    invalidate_snapshot(bucket_id)
     return {"result": len(result["likes"])}
 
 
@@ -491,19 +643,65 @@ def unlike_bucket(bucket_id: str, user=Depends(manager)):
 
     result = Buckets.find_one_and_update(
         {"bucketId": bucket_id, "likes": user["id"]},
-        {"$pull": {"likes": user["id"]}},
+        {
+            "$pull": {"likes": user["id"]},
+            "$inc": {"likesCount": -1, **BUMP_VERSION},
+            "$set": {"trendingStale": True},
+        },
         return_document=ReturnDocument.AFTER,
     )
     if not result:
         raise HTTPException(status_code=400, detail="Not liked yet or bucket not found")
+    invalidate_snapshot(bucket_id)
     return {"result": len(result["likes"])}
 
 
+@router.post("/batch")
+def get_buckets_batch(payload: BatchBuckets, user=Depends(manager.optional)):
+    """
+    Retrieve bucket cards for a list of bucket IDs in one round trip.
+
+    Args:
+        payload (BatchBuckets): The IDs of the buckets, at most BUCKET_CARDS_LIMIT.
+        user (Optional[User]): The user making the request. Defaults to None.
+
+    Returns:
+        dict: A JSON response containing the bucket cards in the requested order.
+    """
+    if user:
+        check_user(user)
+    if len(payload.bucketIds) > BUCKET_CARDS_LIMIT:
+        raise HTTPException(
+            status_code=400, detail=f"At most {BUCKET_CARDS_LIMIT} buckets per request"
+        )
+    return {"result": get_bucket_cards(payload.bucketIds, user["id"] if user else None)}
+
+
+def get_user_bucket_list(user, field: str, limit: int, offset: int):
+    bucket_ids = user.get(field) or []
+    cards = get_bucket_cards(bucket_ids[offset : offset + limit], user["id"])
+    next_offset = offset + limit if offset + limit < len(bucket_ids) else None
+    return {"result": cards, "nextOffset": next_offset}
+
+
 @router.get("/saved/user")
-def get_user_saved_buckets(user=Depends(manager)):
+def get_user_saved_buckets(
+    limit: int = Query(50, ge=1, le=BUCKET_CARDS_LIMIT),
+    offset: int = Query(0, ge=0),
+    user=Depends(manager),
+):
+    check_user(user)
+    return get_user_bucket_list(user, "bucketsSaved", limit, offset)
+
+
+@router.get("/hidden/user")
+def get_user_hidden_buckets(
+    limit: int = Query(50, ge=1, le=BUCKET_CARDS_LIMIT),
+    offset: int = Query(0, ge=0),
+    user=Depends(manager),
+):
     check_user(user)
-    result = Buckets.find_one({"bucketId": {"$in": user["bucketsSaved"]}}, {"_id": 0})
-    return {"result": result}
+    return get_user_bucket_list(user, "bucketsHidden", limit, offset)
 
 
 @router.patch("/add/tag/{bucket_id}/{tag}")
@@ -511,10 +709,20 @@ def add_tag(bucket_id: str, tag: str, user=Depends(manager)):
     check_user(user)
 
     formatted_tag = tag.lower()
-    Buckets.update_one(
+    bucket = Buckets.find_one_and_update(
         {"bucketId": bucket_id, "userId": user["id"]},
-        {"$addToSet": {"tags": formatted_tag}},
+        {
+            "$addToSet": {"tags": formatted_tag},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
+        projection=KEYWORD_INDEX_FIELDS,
+        return_document=ReturnDocument.AFTER,
     )
+    invalidate_snapshot(bucket_id)
+    if bucket:
+        index_bucket(bucket)
+        bump_search_epoch()
     return {"result": "Tag added"}
 
 
@@ -523,20 +731,34 @@ def remove_tag(bucket_id: str, tag: str, user=Depends(manager)):
     check_user(user)
 
     formatted_tag = tag.lower()
-    Buckets.update_one(
+    bucket = Buckets.find_one_and_update(
         {"bucketId": bucket_id, "userId": user["id"]},
-        {"$pull": {"tags": formatted_tag}},
+        {
+            "$pull": {"tags": formatted_tag},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
+        projection=KEYWORD_INDEX_FIELDS,
+        return_document=ReturnDocument.AFTER,
     )
+    invalidate_snapshot(bucket_id)
+    if bucket:
+        index_bucket(bucket)
+        bump_search_epoch()
     return {"result": "Tag added"}
 
 
 @router.post("/iterate/{bucket_id}")
 def iterate_bucket(
-    bucket_id: str, iteratePayload: IterateBucket, user=Depends(manager)
+    bucket_id: str,
+    iteratePayload: IterateBucket,
+    user=Depends(manager),
 ):
     """
     Iterate over a given bucket and create a new bucket with the same sources but with a new name and description.
 
+    The new bucket's embedding is generated by the embedding worker.
+
     Args:
         bucket_id (str): The ID of the bucket to iterate over.
         iteratePayload (IterateBucket): The payload containing the new name and description for the new bucket.
@@ -550,80 +772,47 @@ def iterate_bucket(
     """
     check_user(user)
 
-    bucketToIterate = Buckets.find_one({"bucketId": bucket_id})
-    associatedUser = Users.find_one({"id": bucketToIterate["userId"]}, {"_id": 0})
+    bucketToIterate = Buckets.find_one({"bucketId": bucket_id}, {"_id": 0})
+    associatedUser = (
+        Users.find_one({"id": bucketToIterate["userId"]}, {"_id": 0})
+        if bucketToIterate
+        else None
+    )
 
     if not bucketToIterate or not associatedUser:
         raise HTTPException(status_code=404, detail="Bucket or owner not found")
 
     try:
-
-        newBucketId = str(uuid.uuid4())
-        newSourceIds = []
-        bucketToIterateSources = bucketToIterate.get("sourceIds", [])
-        for sourceId in bucketToIterateSources:
-
-            sourceToCopy = Sources.find_one({"sourceId": sourceId})
-            if not sourceToCopy:
-                continue
-
-            newSourceId = str(uuid.uuid4())
-
-            sourceToInsert = {
-                "sourceId": newSourceId,
-                "bucketId": newBucketId,
-                "userId": user["id"],
-                "name": sourceToCopy["name"],
-                "content": (
-                    sourceToCopy["content"]
-                    if sourceToCopy["type"] != "document"
-                    else None
-                ),
-                "url": sourceToCopy["url"],
-                "type": sourceToCopy["type"],
-                "size": sourceToCopy["size"],
-                "created": datetime.now(UTC),
-                "updated": datetime.now(UTC),
-            }
-            Sources.insert_one(sourceToInsert)
-            newSourceIds.append(newSourceId)
-
-        bucket_to_insert = {
-            "bucketId": newBucketId,
-            "name": iteratePayload.name,
-            "description": iteratePayload.description,
-            "userId": user["id"],
-            "sourceIds": newSourceIds,
-            "created": datetime.now(UTC),
-            "updated": datetime.now(UTC),
-            "visibility": "Private",
-            "tags": bucketToIterate["tags"],
-            "iteratedFrom": associatedUser["id"],
-            "likes": [],
-            "iterations": [],
-        }
-
-        vectors = generate_bucket_embeddings(iteratePayload.name, iteratePayload.description)
-        pincone_insert = bucket_to_insert.copy()
-
-        pincone_insert["created"] = str(bucket_to_insert["created"])
-        pincone_insert["updated"] = str(bucket_to_insert["updated"])
-        embedding_data = [(newBucketId, vectors, pincone_insert)]
-        PCINDEX.upsert(
-            vectors=embedding_data,
-            namespace="buckets",
-        )
-
-        Buckets.insert_one(bucket_to_insert)
-        Buckets.find_one_and_update(
-            {"bucketId": bucketToIterate["bucketId"]},
-            {"$push": {"iterations": user["id"]}},
+        newBucket = fork_bucket(
+            bucketToIterate,
+            iteratePayload.name,
+            iteratePayload.description,
+            user["id"],
+            associatedUser["id"],
         )
-
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error iterating bucket: {str(e)}")
 
-    return {"result": newBucketId}
+    return {"result": newBucket["bucketId"]}
+
+
+@router.get("/search/stats")
+def get_search_stats():
+    """
+    Retrieve hit and miss statistics of the search caches, and the counters of the
+    embedding batcher and of the search analytics buffer.
+
+    Returns:
+        dict: A JSON response containing the statistics of each cache and counter.
+    """
+    return {
+        "result": {
+            "queryEmbeddings": QUERY_EMBEDDING_CACHE.stats(),
+            "embedder": EMBEDDER.stats(),
+            "results": SEARCH_RESULT_CACHE.stats(),
+            "analytics": SEARCH_ANALYTICS.stats(),
+        }
+    }
 
 
 @router.get("/search")
@@ -634,8 +823,24 @@ def search_buckets(
     ),
     userId: Optional[str] = None,
     bucketId: Optional[str] = None,
+    mode: Literal["hybrid", "keyword", "semantic"] = "hybrid",
     user=Depends(manager.optional),
 ):
+    """
+    Search buckets by name, description and tags.
+
+    Args:
+        query (str): The search query.
+        visibility (str, optional): Only return buckets with this visibility.
+        userId (str, optional): Only return buckets owned by this user.
+        bucketId (str, optional): Only return the bucket with this ID.
+        mode (str): "keyword" for BM25 over the keyword index, "semantic" for vector
+            search, or "hybrid" to run both and merge them with reciprocal rank fusion.
+        user (Optional[User]): The user making the request.
+
+    Returns:
+        dict: A JSON response containing the matching buckets, best first.
+    """
     if user:
         check_user(user)
 
@@ -653,16 +858,13 @@ def search_buckets(
         "userId": user["id"] if user else None,
         "filters": filter,
     }
-    Searches.insert_one(search_info)
+    SEARCH_ANALYTICS.add(search_info)
 
     try:
-        results = run_semantic_search(query, 10, filter)
-        logger.info(f"Semantic search results: {results}")
+        results = run_search(mode, query, 10, filter)
+        logger.info(f"Search results ({mode}): {results}")
     except Exception as e:
-        logger.info(f"Error running semantic search: {e}")
-        logger.error(f"Error running semantic search: {e}")
-        raise HTTPException(
-            status_code=500, detail=f"Error running semantic search: {e}"
-        )
+        logger.error(f"Error running {mode} search: {e}")
+        raise HTTPException(status_code=500, detail=f"Error running {mode} search: {e}")
 
     return {"result": results}
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends
 from src.routes.auth.oauth2 import manager
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 import uuid
 from pytz import UTC
 from src.utils.exceptions import check_user
+from src.utils.pagination import keyset_paginate
 from datetime import datetime
 from src.models.connection import (
     Connections,
@@ -13,15 +15,21 @@ from src.models.connection import (
 )
 from fastapi.exceptions import HTTPException
 from src.lib.logger.index import logger
+from src.service.snapshots import bump_bucket_version
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
 
 @router.get("/all/bucket/{bucket_id}")
-def get_all_connections(bucket_id: str):
+def get_all_connections(
+    bucket_id: str, limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None
+):
 
-    bucketConnections = list(Connections.find({"bucketId": bucket_id}, {"_id": 0}))
-    return {"result": bucketConnections}
+    page = keyset_paginate(
+        Connections, {"bucketId": bucket_id}, ("updated", "connectionId"), limit, cursor
+    )
+    return {"result": page["items"], "nextCursor": page["nextCursor"]}
 
 
 @router.get("/outgoing/{bucket_id}/{source_id}")
@@ -75,6 +83,7 @@ def create_connection(connection_data: CreateConnection, user=Depends(manager)):
             "updated": datetime.now(UTC),
         }
         Connections.insert_one(connection.copy())
+        bump_bucket_version(connection["bucketId"])
 
         return {"result": connection}
     except Exception as e:
@@ -92,9 +101,14 @@ def update_connection(
     updates["updated"] = datetime.now(UTC)
 
     try:
-        connection = Connections.update_one(
-            {"connectionId": connection_id}, {"$set": updates}, return_document=True
+        connection = Connections.find_one_and_update(
+            {"connectionId": connection_id},
+            {"$set": updates},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
         )
+        if connection:
+            bump_bucket_version(connection["bucketId"])
         return {"result": connection}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -105,7 +119,11 @@ def delete_connection(connection_id: str, user=Depends(manager)):
     check_user(user)
 
     try:
-        Connections.delete_one({"connectionId": connection_id})
+        connection = Connections.find_one_and_delete(
+            {"connectionId": connection_id}, projection={"bucketId": 1}
+        )
+        if connection:
+            bump_bucket_version(connection["bucketId"])
         return {"result": "Connection deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
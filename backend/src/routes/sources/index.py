@@ -1,30 +1,55 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query
+from typing import List, Optional
 from src.models.source import Source, UpdateSource
 from src.routes.auth.oauth2 import manager
 from src.utils.exceptions import check_user
-from src.lib.s3.index import S3Bucket
-from src.db.mongodb import get_collection, insert_item
+from src.utils.pagination import keyset_paginate
+from src.service.sources import hydrate_contents
+from src.service.snapshots import (
+    BUMP_VERSION,
+    bump_bucket_version,
+    invalidate_snapshot,
+)
+from src.lib.s3.index import S3Bucket, multipart_etag
+from src.lib.s3.urls import URL_SIGNER
+from src.lib.pinecone.index import VECTOR_STORE, get_query_embedding
+from src.workers.passages import PASSAGE_NAMESPACE, enqueue_source_passages
+from src.workers.images import enqueue_image_derivatives
+from src.db.mongodb import get_collection, insert_item, run_in_transaction
 from src.models.connection import Connections
+from src.models.bucket import Buckets
+from src.models.source import Sources
+from src.models.upload import (
+    CompleteUploadSession,
+    CreateUploadSession,
+    UploadSessions,
+)
 from uuid import uuid4
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.core.config import settings
 from src.utils.youtube import get_video_transcript, get_video_info
-import requests
-from pydantic import BaseModel, HttpUrl
-from bs4 import BeautifulSoup
+from src.utils.webpages import WebpageError
+from src.service.webpages import load_webpage, load_webpages
+from pydantic import BaseModel, Field, HttpUrl
 from src.models.note import CreateNote, UpdateNote
-import boto3
 from urllib.parse import unquote
 from src.lib.logger.index import logger
 from botocore.exceptions import ClientError
-from src.agents.structure_html_agent import process_html
 from pytz import UTC
-import os
+import asyncio
+import math
 
 router = APIRouter()
 s3_bucket = S3Bucket(bucket_name=settings.s3_bucket_name)
-s3 = boto3.client("s3")
+
+# direct uploads: parts of at least 16 MB, S3 allows at most 10,000 parts
+UPLOAD_PART_SIZE = 16 * 1024 * 1024
+UPLOAD_MAX_PARTS = 10000
+UPLOAD_MAX_SIZE = 5 * 1024**3
+UPLOAD_URL_EXPIRY_SECONDS = 3600
+UPLOAD_SESSION_TTL = timedelta(days=1)
+PRESIGN_BATCH_LIMIT = 500
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -63,14 +88,11 @@ async def upload_file(
         f"files/{user_id}/{web_id}/{file_type}/{file.filename.replace(' ', '_')}"
     )
 
-    # save file to temp location
-    temp_path = f"/tmp/{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        buffer.write(await file.read())
-
     try:
-        # upload to S3
-        s3_bucket.upload_file(temp_path, object_name)
+        # stream the upload's spooled file to S3
+        size = await asyncio.to_thread(
+            s3_bucket.upload_fileobj, file.file, object_name, file.content_type
+        )
         sources = get_collection("sources")
         sourceId = str(uuid4())
         sources.insert_one(
@@ -82,7 +104,7 @@ async def upload_file(
                 "content": None,
                 "url": object_name,
                 "type": file_type,
-                "size": os.path.getsize(temp_path),
+                "size": size,
                 "created": datetime.now(UTC),
                 "updated": datetime.now(UTC),
             }
@@ -90,15 +112,276 @@ async def upload_file(
         buckets = get_collection("buckets")
         buckets.update_one(
             {"bucketId": web_id, "userId": user_id},
-            {"$push": {"sourceIds": sourceId}, "$set": {"updated": datetime.now(UTC)}},
+            {
+                "$push": {"sourceIds": sourceId},
+                "$set": {"updated": datetime.now(UTC)},
+                "$inc": BUMP_VERSION,
+            },
         )
+        invalidate_snapshot(web_id)
 
-        return {"result": f"File uploaded to {temp_path}"}
+        return {"result": f"File uploaded to {object_name}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # remove temp file
-        os.remove(temp_path)
+
+
+def upload_part_urls(session: dict, part_numbers: list) -> list:
+    return [
+        {
+            "partNumber": part_number,
+            "url": s3_bucket.presign_upload_part(
+                session["key"],
+                session["s3UploadId"],
+                part_number,
+                UPLOAD_URL_EXPIRY_SECONDS,
+            ),
+        }
+        for part_number in part_numbers
+    ]
+
+
+def upload_result(session: dict) -> dict:
+    return {"sourceId": session.get("sourceId"), "key": session["key"]}
+
+
+@router.post("/uploads")
+def create_upload_session(info: CreateUploadSession, user=Depends(manager)):
+    """
+    Start a direct upload: the client PUTs the file's parts to the presigned URLs
+    returned, in parallel and in any order, then calls the complete endpoint with
+    the ETag S3 returned for each part. The file never goes through the API.
+
+    Args:
+        info (CreateUploadSession): The target bucket and the file's name, size and type.
+        user (User): The user making the request.
+
+    Returns:
+        dict: The upload ID, the part size and a presigned URL for every part.
+
+    Raises:
+        HTTPException: If the file is too large or the bucket is not the user's.
+    """
+    check_user(user)
+    if info.size > UPLOAD_MAX_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    if not Buckets.find_one(
+        {"bucketId": info.bucketId, "userId": user["id"]}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=404, detail="Bucket not found")
+
+    folder = "images" if info.target == "bucketImage" else info.fileType
+    key = f"files/{user['id']}/{info.bucketId}/{folder}/{uuid4()}_{secure_filename(info.filename)}"
+    part_size = max(UPLOAD_PART_SIZE, math.ceil(info.size / UPLOAD_MAX_PARTS))
+    now = datetime.now(UTC)
+    session = {
+        "uploadId": str(uuid4()),
+        "s3UploadId": s3_bucket.create_multipart_upload(key, info.contentType),
+        "key": key,
+        "bucketId": info.bucketId,
+        "userId": user["id"],
+        "filename": info.filename,
+        "size": info.size,
+        "contentType": info.contentType,
+        "target": info.target,
+        "fileType": info.fileType,
+        "partSize": part_size,
+        "partCount": math.ceil(info.size / part_size),
+        "status": "pending",
+        "sourceId": None,
+        "created": now,
+        "expires": now + UPLOAD_SESSION_TTL,
+    }
+    UploadSessions.insert_one(session)
+
+    return {
+        "uploadId": session["uploadId"],
+        "partSize": part_size,
+        "parts": upload_part_urls(session, range(1, session["partCount"] + 1)),
+    }
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(upload_id: str, user=Depends(manager)):
+    """
+    Resume a direct upload: list the parts S3 already has and sign new URLs for
+    the missing ones.
+
+    Args:
+        upload_id (str): The ID of the upload session.
+        user (User): The user making the request.
+
+    Returns:
+        dict: The session status, the uploaded parts and URLs for the missing parts.
+
+    Raises:
+        HTTPException: If the session is not found.
+    """
+    check_user(user)
+    session = UploadSessions.find_one(
+        {"uploadId": upload_id, "userId": user["id"]}, {"_id": 0}
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if session["status"] != "pending":
+        return {"status": session["status"], "result": upload_result(session)}
+
+    uploaded = s3_bucket.list_uploaded_parts(session["key"], session["s3UploadId"])
+    received = {part["PartNumber"] for part in uploaded}
+    missing = [
+        part_number
+        for part_number in range(1, session["partCount"] + 1)
+        if part_number not in received
+    ]
+    return {
+        "status": session["status"],
+        "partSize": session["partSize"],
+        "uploadedParts": [
+            {"partNumber": part["PartNumber"], "etag": part["ETag"]}
+            for part in uploaded
+        ],
+        "parts": upload_part_urls(session, missing),
+    }
+
+
+@router.post("/uploads/{upload_id}/complete")
+def complete_upload_session(
+    upload_id: str, info: CompleteUploadSession, user=Depends(manager)
+):
+    """
+    Finish a direct upload. The object is assembled from the reported parts and
+    checked against the session: its size must be the declared one and its ETag
+    the one derived from the part ETags. Then the source and the bucket's
+    sourceIds (or imageKeys) are written in one transaction.
+
+    Calling it again for a completed upload returns the same result.
+
+    Args:
+        upload_id (str): The ID of the upload session.
+        info (CompleteUploadSession): The number and ETag of every part.
+        user (User): The user making the request.
+
+    Returns:
+        dict: A JSON response with the created source's ID and the object key.
+
+    Raises:
+        HTTPException: If the session is not found or the parts do not match it.
+    """
+    check_user(user)
+    session = UploadSessions.find_one(
+        {"uploadId": upload_id, "userId": user["id"]}, {"_id": 0}
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if session["status"] == "completed":
+        return {"result": upload_result(session)}
+    if session["status"] != "pending":
+        raise HTTPException(status_code=409, detail="Upload was aborted")
+
+    parts = sorted(info.parts, key=lambda part: part.partNumber)
+    if [part.partNumber for part in parts] != list(range(1, session["partCount"] + 1)):
+        raise HTTPException(
+            status_code=400, detail=f"Expected parts 1 to {session['partCount']}"
+        )
+
+    key = session["key"]
+    try:
+        s3_bucket.complete_multipart_upload(
+            key,
+            session["s3UploadId"],
+            [{"PartNumber": part.partNumber, "ETag": part.etag} for part in parts],
+        )
+    except ClientError as e:
+        # a retry after S3 completed the upload finds no upload, but the object
+        logger.error(f"Error completing upload {upload_id}: {e}")
+    try:
+        head = s3_bucket.head_object(key)
+    except ClientError:
+        raise HTTPException(status_code=400, detail="Could not complete the upload")
+
+    if head["ContentLength"] != session["size"] or head["ETag"] != multipart_etag(
+        [part.etag for part in parts]
+    ):
+        s3_bucket.delete_object(key)
+        UploadSessions.update_one(
+            {"uploadId": upload_id}, {"$set": {"status": "aborted"}}
+        )
+        raise HTTPException(
+            status_code=400, detail="The uploaded file does not match the upload"
+        )
+
+    source_id = str(uuid4()) if session["target"] == "source" else None
+
+    def write(db_session):
+        claimed = UploadSessions.update_one(
+            {"uploadId": upload_id, "status": "pending"},
+            {"$set": {"status": "completed", "sourceId": source_id}},
+            session=db_session,
+        )
+        if not claimed.modified_count:
+            return False  # completed by a concurrent call
+
+        now = datetime.now(UTC)
+        if source_id:
+            Sources.insert_one(
+                {
+                    "sourceId": source_id,
+                    "bucketId": session["bucketId"],
+                    "userId": user["id"],
+                    "name": session["filename"],
+                    "content": None,
+                    "url": key,
+                    "type": session["fileType"],
+                    "size": head["ContentLength"],
+                    "created": now,
+                    "updated": now,
+                },
+                session=db_session,
+            )
+            push = {"sourceIds": source_id}
+        else:
+            push = {"imageKeys": key}
+            enqueue_image_derivatives([key], session["bucketId"], session=db_session)
+        result = Buckets.update_one(
+            {"bucketId": session["bucketId"], "userId": user["id"]},
+            {"$push": push, "$set": {"updated": now}, "$inc": BUMP_VERSION},
+            session=db_session,
+        )
+        if not result.matched_count:
+            raise HTTPException(status_code=404, detail="Bucket not found")
+        return True
+
+    if not run_in_transaction(write):
+        session = UploadSessions.find_one({"uploadId": upload_id}, {"_id": 0})
+        return {"result": upload_result(session)}
+
+    invalidate_snapshot(session["bucketId"])
+    return {"result": {"sourceId": source_id, "key": key}}
+
+
+@router.delete("/uploads/{upload_id}")
+def abort_upload_session(upload_id: str, user=Depends(manager)):
+    """
+    Abort a direct upload and free the parts uploaded so far.
+
+    Args:
+        upload_id (str): The ID of the upload session.
+        user (User): The user making the request.
+
+    Returns:
+        dict: A JSON response with a result key.
+
+    Raises:
+        HTTPException: If the session is not found or already completed.
+    """
+    check_user(user)
+    session = UploadSessions.find_one_and_update(
+        {"uploadId": upload_id, "userId": user["id"], "status": "pending"},
+        {"$set": {"status": "aborted"}},
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    s3_bucket.abort_multipart_upload(session["key"], session["s3UploadId"])
+    return {"result": "Upload aborted"}
 
 
 class UrlRequest(BaseModel):
@@ -127,18 +410,10 @@ def add_website(web_id: str, url: UrlRequest, user=Depends(manager)):
     check_user(user)
 
     try:
-        response = requests.get(url.url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        page = load_webpage(str(url.url))
+    except WebpageError as e:
+        logger.error(f"Error fetching {url.url}: {e}")
         raise HTTPException(status_code=400, detail="Could not retrieve the webpage")
-
-    soup = BeautifulSoup(response.content, "html.parser")
-    main_content = soup.get_text(separator=" ")
-
-    cleaned_content = " ".join(main_content.split())
-
-    try:
-        title = process_html(cleaned_content)
     except Exception as e:
         raise HTTPException(status_code=400, detail="Could not parse the webpage")
 
@@ -149,58 +424,164 @@ def add_website(web_id: str, url: UrlRequest, user=Depends(manager)):
             "sourceId": sourceId,
             "bucketId": web_id,
             "userId": user["id"],
-            "name": title,
+            "name": page["title"],
             "url": str(url.url),
             "type": "website",
-            "size": len(cleaned_content) * 200,
-            "content": f"{title}\n{cleaned_content}",
+            "size": page["textLength"] * 200,
+            # the body is shared with every source of the same page
+            "content": None,
+            "contentHash": page["contentHash"],
             "created": datetime.now(UTC),
             "updated": datetime.now(UTC),
         }
     )
+    enqueue_source_passages([{"sourceId": sourceId, "bucketId": web_id}])
     buckets = get_collection("buckets")
     buckets.update_one(
         {"bucketId": web_id, "userId": user["id"]},
-        {"$push": {"sourceIds": sourceId}, "$set": {"updated": datetime.now(UTC)}},
+        {
+            "$push": {"sourceIds": sourceId},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
     )
+    invalidate_snapshot(web_id)
     return {"result": sourceId}
 
 
+WEBSITE_BATCH_LIMIT = 100
+
+
+class UrlsRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., min_length=1, max_length=WEBSITE_BATCH_LIMIT)
+
+
+@router.post("/websites/{web_id}")
+def add_websites(web_id: str, urls: UrlsRequest, user=Depends(manager)):
+    """
+    Add many website sources to a specified web (bucket) at once.
+
+    The pages are downloaded concurrently, and the titles the page markup does not
+    provide are extracted with a few batched LLM calls rather than one per page.
+
+    Args:
+        web_id (str): The ID of the web (bucket) to add the sources to.
+        urls (UrlsRequest): The URLs of the websites to add.
+        user (User): The user making the request.
+
+    Raises:
+        HTTPException: If none of the webpages can be retrieved.
+
+    Returns:
+        dict: A JSON response containing the IDs of the new sources and the URLs
+        that could not be retrieved.
+    """
+    check_user(user)
+
+    url_strings = [str(url) for url in urls.urls]
+    pages = load_webpages(url_strings)
+    if not any(pages):
+        raise HTTPException(status_code=400, detail="Could not retrieve the webpages")
+
+    now = datetime.now(UTC)
+    new_sources = [
+        {
+            "sourceId": str(uuid4()),
+            "bucketId": web_id,
+            "userId": user["id"],
+            "name": page["title"],
+            "url": url,
+            "type": "website",
+            "size": page["textLength"] * 200,
+            "content": None,
+            "contentHash": page["contentHash"],
+            "created": now,
+            "updated": now,
+        }
+        for url, page in zip(url_strings, pages)
+        if page
+    ]
+    source_ids = [source["sourceId"] for source in new_sources]
+    Sources.insert_many(new_sources)
+    enqueue_source_passages(
+        [{"sourceId": sourceId, "bucketId": web_id} for sourceId in source_ids]
+    )
+    Buckets.update_one(
+        {"bucketId": web_id, "userId": user["id"]},
+        {
+            "$push": {"sourceIds": {"$each": source_ids}},
+            "$set": {"updated": now},
+            "$inc": BUMP_VERSION,
+        },
+    )
+    invalidate_snapshot(web_id)
+    return {
+        "result": source_ids,
+        "failed": [url for url, page in zip(url_strings, pages) if not page],
+    }
+
+
 @router.get("/all/{web_id}")
-def get_all_sources(web_id: str):
+def get_all_sources(
+    web_id: str, limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None
+):
     """
-    Retrieve all sources associated with a given web ID.
+    Retrieve a page of sources associated with a given web ID.
 
     Args:
         web_id (str): The ID of the web (bucket) to retrieve sources from.
+        limit (int): The number of sources per page.
+        cursor (str, optional): An opaque cursor returned by a previous page.
 
     Returns:
-        dict: A JSON response containing a list of sources associated with the given web ID.
+        dict: A JSON response containing the sources associated with the given web ID
+        and the cursor to the next page.
     """
     sources = get_collection("sources")
-    sourcesForWeb = sources.find({"bucketId": web_id}, {"_id": 0})
-    return {"result": list(sourcesForWeb)}
+    page = keyset_paginate(
+        sources, {"bucketId": web_id}, ("updated", "sourceId"), limit, cursor
+    )
+    return {"result": hydrate_contents(page["items"]), "nextCursor": page["nextCursor"]}
 
 
 @router.get("/presigned/url/{file_path:path}")
 async def get_presigned_url(file_path: str):
     try:
         decoded_file_path = unquote(file_path)
-        url = s3.generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": s3_bucket.bucket_name,
-                "Key": decoded_file_path,
-                "ResponseContentDisposition": "inline",
-                "ResponseContentType": "application/pdf",
-            },
-            ExpiresIn=3600,
-        )
+        url = URL_SIGNER.sign(decoded_file_path, "application/pdf")
         return {"presigned_url": url}
     except ClientError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class PresignRequest(BaseModel):
+    keys: List[str] = Field(..., max_length=PRESIGN_BATCH_LIMIT)
+
+
+@router.post("/presigned/urls")
+def get_presigned_urls(request: PresignRequest):
+    """
+    Sign the URLs of many source files at once, e.g. every document of a bucket.
+
+    Args:
+        request (PresignRequest): The S3 keys of the files, as stored in the
+            sources' url field.
+
+    Returns:
+        dict: A JSON response mapping each key to its signed URL. Keys that are
+        not the file of a source are left out.
+    """
+    keys = set(request.keys)
+    known = Sources.distinct("url", {"url": {"$in": list(keys)}}) if keys else []
+    try:
+        urls = URL_SIGNER.sign_many(
+            [key for key in known if key in keys], "application/pdf"
+        )
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"result": urls}
+
+
 @router.post("/upload/note/{bucket_id}/")
 def upload_note(bucket_id: str, note: CreateNote, user=Depends(manager)):
     """
@@ -231,11 +612,17 @@ def upload_note(bucket_id: str, note: CreateNote, user=Depends(manager)):
             "updated": datetime.now(UTC),
         }
     )
+    enqueue_source_passages([{"sourceId": sourceId, "bucketId": bucket_id}])
     buckets = get_collection("buckets")
     buckets.update_one(
         {"bucketId": bucket_id, "userId": user["id"]},
-        {"$push": {"sourceIds": sourceId}, "$set": {"updated": datetime.now(UTC)}},
+        {
+            "$push": {"sourceIds": sourceId},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
     )
+    invalidate_snapshot(bucket_id)
     return {"result": sourceId}
 
 
@@ -264,11 +651,17 @@ def add_youtube(web_id: str, video_id: str, user=Depends(manager)):
             "updated": datetime.now(UTC),
         }
     )
+    enqueue_source_passages([{"sourceId": sourceId, "bucketId": web_id}])
     buckets = get_collection("buckets")
     buckets.update_one(
         {"bucketId": web_id, "userId": user["id"]},
-        {"$push": {"sourceIds": sourceId}, "$set": {"updated": datetime.now(UTC)}},
+        {
+            "$push": {"sourceIds": sourceId},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
     )
+    invalidate_snapshot(web_id)
     return {"result": sourceId}
 
 
@@ -299,13 +692,20 @@ def update_note(
         update_data["name"] = update_data["title"]
         update_data.pop("title")
 
+    update = {"$set": update_data}
+    if "content" in update_data:  # copy on write for bodies shared with a fork
+        update["$unset"] = {"contentHash": ""}
+
     result = sources.find_one_and_update(
         {"sourceId": source_id, "bucketId": bucket_id},
-        {"$set": update_data},
+        update,
         return_document=True,
     )
 
     if result:
+        if "content" in update_data:
+            enqueue_source_passages([result])
+        bump_bucket_version(bucket_id)
         return {"result": "Note updated"}
     else:
         return {"error": "Note not found or user not authorized"}, 404
@@ -331,16 +731,17 @@ def delete_source(source_id: str, user=Depends(manager)):
     source = sources.find_one_and_delete({"sourceId": source_id})
     if not source:
         raise HTTPException(status_code=404, detail="Item not found")
-
-    # remove from s3 if it's a document type (commenting out for now for iterations)
-    # if source["type"] == "document":
-    #    s3.delete_object(Bucket=s3_bucket.bucket_name, Key=source["url"])
+    enqueue_source_passages([source])
 
     # clean up bucket
     buckets = get_collection("buckets")
     bucket = buckets.find_one_and_update(
         {"sourceIds": source_id},
-        {"$pull": {"sourceIds": source_id}, "$set": {"updated": datetime.now(UTC)}},
+        {
+            "$pull": {"sourceIds": source_id},
+            "$set": {"updated": datetime.now(UTC)},
+            "$inc": BUMP_VERSION,
+        },
         return_document=True,
     )
 
@@ -348,10 +749,73 @@ def delete_source(source_id: str, user=Depends(manager)):
         raise HTTPException(status_code=404, detail="Item not found")
     
     Connections.delete_many({"$or": [{"fromSourceId": source_id}, {"toSourceId": source_id}]}) #delete connections connected to this source
+    invalidate_snapshot(bucket["bucketId"])
 
     return {"result": "Source deleted"}
 
 
+@router.get("/search")
+def search_sources(
+    bucketId: str,
+    query: str,
+    limit: int = Query(10, ge=1, le=50),
+    user=Depends(manager.optional),
+):
+    """
+    Search the content of a bucket's sources, passage by passage.
+
+    Args:
+        bucketId (str): The ID of the bucket to search in.
+        query (str): The search query.
+        limit (int): The maximum number of passages to return.
+        user (User, optional): The user making the request.
+
+    Returns:
+        dict: A JSON response with the best matching passages, each with its
+        source's ID, name and type, its position in the source, its text and score.
+
+    Raises:
+        HTTPException: If the bucket is not found or is private to another user.
+    """
+    bucket = Buckets.find_one(
+        {"bucketId": bucketId}, {"_id": 0, "visibility": 1, "userId": 1}
+    )
+    if not bucket or (
+        bucket["visibility"] == "Private" and (user or {}).get("id") != bucket["userId"]
+    ):
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    matches = VECTOR_STORE.query(
+        get_query_embedding(query),
+        limit,
+        PASSAGE_NAMESPACE,
+        {"bucketId": {"$eq": bucketId}},
+    )
+    source_ids = list({match["metadata"]["sourceId"] for match in matches})
+    sources = {
+        source["sourceId"]: source
+        for source in get_collection("sources").find(
+            {"sourceId": {"$in": source_ids}},
+            {"_id": 0, "sourceId": 1, "name": 1, "type": 1},
+        )
+    }
+    # passages of sources deleted since are removed by the passage worker shortly
+    return {
+        "result": [
+            {
+                "sourceId": match["metadata"]["sourceId"],
+                "name": sources[match["metadata"]["sourceId"]].get("name"),
+                "type": sources[match["metadata"]["sourceId"]].get("type"),
+                "passage": match["metadata"]["passage"],
+                "text": match["metadata"]["text"],
+                "score": match["score"],
+            }
+            for match in matches
+            if match["metadata"]["sourceId"] in sources
+        ]
+    }
+
+
 @router.get("/{source_id}")
 def get_source(source_id: str):
     """
@@ -371,22 +835,12 @@ def get_source(source_id: str):
     source = sources.find_one({"sourceId": source_id}, {"_id": 0})
     if not source:
         raise HTTPException(status_code=404, detail="Item not found")
+    hydrate_contents([source])
 
     # if the source is a document, get the url from s3
     file_url = ""
     if source["type"] == "document":
-        decoded_file_path = source["url"]
-        url = s3.generate_presigned_url(
-            "get_object",
-            Params={
-                "Bucket": s3_bucket.bucket_name,
-                "Key": decoded_file_path,
-                "ResponseContentDisposition": "inline",
-                "ResponseContentType": "application/pdf",
-            },
-            ExpiresIn=3600,
-        )
-        file_url = url
+        file_url = URL_SIGNER.sign(source["url"], "application/pdf")
 
     return {"result": source, "file_url": file_url}
 
@@ -399,9 +853,13 @@ def edit_source(sourceId: str, info: UpdateSource, user=Depends(manager)):
     update_data["updated"] = datetime.now(UTC)
 
     sources = get_collection("sources")
-    sources.update_one(
-        {"userId": user["id"], "sourceId": sourceId}, {"$set": update_data}
+    source = sources.find_one_and_update(
+        {"userId": user["id"], "sourceId": sourceId},
+        {"$set": update_data},
+        projection={"bucketId": 1},
     )
+    if source:
+        bump_bucket_version(source["bucketId"])
 
     return {"result", "Source updated"}
 
@@ -414,51 +872,43 @@ async def upload_file_to_source(
 ):
 
     check_user(user)
-    uploaded_image_urls = []
 
     try:
-        for file in files:
-            # sanitize filename
-            object_name = f"files/{user['id']}/{source_id}/images/{uuid4()}_{secure_filename(file.filename)}"
-
-            temp_dir = "/tmp/note_uploads"
-            os.makedirs(temp_dir, exist_ok=True)
-
-            temp_path = os.path.join(temp_dir, f"{uuid4()}_{file.filename}")
-
-            try:
-                contents = await file.read()
-                with open(temp_path, "wb") as buffer:
-                    buffer.write(contents)
-
-                s3_bucket.upload_file(
-                    temp_path,
-                    object_name,
-                )
-
-                url = f"https://{settings.cloudfront_domain}/{object_name}"
-                if not url:
-                    raise HTTPException(status_code=500, detail="Error generating URL")
-
-                uploaded_image_urls.append(url)
-
-                sources = get_collection("sources")
-                sources.update_one(
-                    {"sourceId": source_id, "userId": user["id"]},
-                    {
-                        "$set": {"updated": datetime.now(UTC)},
-                    },
-                )
-
-            except Exception as e:
-                logger.error(f"Error uploading file {file.filename}: {str(e)}")
-                raise HTTPException(
-                    status_code=500, detail=f"Error uploading file: {str(e)}"
-                )
-            finally:
-                # clean up
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+        # sanitize filenames
+        object_names = [
+            f"files/{user['id']}/{source_id}/images/{uuid4()}_{secure_filename(file.filename)}"
+            for file in files
+        ]
+
+        try:
+            # stream the spooled files to S3 in parallel
+            await asyncio.to_thread(
+                s3_bucket.upload_fileobjs,
+                [
+                    (file.file, object_name, file.content_type)
+                    for file, object_name in zip(files, object_names)
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Error uploading files to source {source_id}: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail=f"Error uploading file: {str(e)}"
+            )
+
+        uploaded_image_urls = [
+            URL_SIGNER.public_url(object_name) for object_name in object_names
+        ]
+
+        sources = get_collection("sources")
+        source = sources.find_one_and_update(
+            {"sourceId": source_id, "userId": user["id"]},
+            {
+                "$set": {"updated": datetime.now(UTC)},
+            },
+            projection={"bucketId": 1},
+        )
+        if source:
+            bump_bucket_version(source["bucketId"])
 
         return {"imageUrls": uploaded_image_urls}
 
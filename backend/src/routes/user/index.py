@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
 from src.routes.auth.oauth2 import manager
 import re
 from src.db.mongodb import (
@@ -9,18 +10,25 @@ from src.db.mongodb import (
 )
 from src.utils.graph import split_into_sentences_nltk, highlight_match
 from src.utils.exceptions import check_user
+from src.utils.pagination import keyset_paginate
 from src.models.user import User, UpdateUser
+from src.models.analytics import Searches
 from fastapi.exceptions import HTTPException
 
 router = APIRouter()
 
 
 @router.get("/search/history")
-def get_search_history(user: User = Depends(manager)):
+def get_search_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user: User = Depends(manager),
+):
     check_user(user)
-    user = get_item_by_id("users", user["id"])
-    analytics = user["analytics"]
-    return {"result": analytics["searches"]}
+    page = keyset_paginate(
+        Searches, {"userId": user["id"]}, ("timestamp", "_id"), limit, cursor
+    )
+    return {"result": page["items"], "nextCursor": page["nextCursor"]}
 
 
 @router.delete("/search/history")
@@ -31,6 +39,7 @@ def delete_search_history(user: User = Depends(manager)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     clear_search_history(user["email"])
+    Searches.delete_many({"userId": user["id"]})
 
     return {"result": "Search history deleted"}
 
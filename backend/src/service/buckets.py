@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, UploadFile, File
 from src.routes.auth.oauth2 import manager
 from fastapi import APIRouter, Depends, Query
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 import os
 from werkzeug.utils import secure_filename
 import uuid
@@ -9,18 +9,184 @@ from src.lib.s3.index import S3Bucket
 from pytz import UTC
 from src.db.mongodb import get_collection, get_items_by_field
 from src.utils.exceptions import check_user
-from src.utils.search import run_semantic_search
+from src.utils.search import run_semantic_search, index_bucket, bump_search_epoch
 from src.models.user import User
 from src.models.analytics import Search
 from datetime import datetime
-from src.models.bucket import BucketConfig, UpdateBucket, IterateBucket
+from src.models.bucket import Buckets, BucketConfig, UpdateBucket, IterateBucket
+from src.models.source import Sources
+from src.db.mongodb import run_in_transaction
+from src.workers.embeddings import enqueue_bucket_embedding
+from src.workers.passages import enqueue_source_passages
+from src.service.sources import share_contents
+from src.service.snapshots import BUMP_VERSION, invalidate_snapshot
 from fastapi.exceptions import HTTPException
 from botocore.exceptions import ClientError
 from src.lib.logger.index import logger
 from pymongo import ReturnDocument
 from src.core.config import settings
 import boto3
-from src.lib.pinecone.index import PCINDEX, PC, generate_bucket_embeddings
+from src.lib.pinecone.index import PC, generate_bucket_embeddings
+
+
+# upper bound on documents per insert_many call, well under the 48MB batch limit
+FORK_BATCH_SIZE = 1000
+
+# projection of the fields a fork copies from each source
+FORK_SOURCE_FIELDS = {
+    "_id": 0,
+    "sourceId": 1,
+    "name": 1,
+    "content": 1,
+    "contentHash": 1,
+    "url": 1,
+    "type": 1,
+    "size": 1,
+}
+
+
+def fork_bucket(
+    bucket: Dict[str, Any], name: str, description: str, user_id: str, iterated_from: str
+) -> Dict[str, Any]:
+    """
+    Copy a bucket and all of its sources to a new private bucket owned by user_id.
+
+    The sources are read with a single $in query and written with batched
+    insert_many calls. Source bodies are moved to the shared contents collection
+    and referenced by hash, and documents keep pointing at the same S3 key, so no
+    content or file is duplicated. The copies, the new bucket, the iteration
+    count of the original and the embedding outbox entry are committed in one
+    transaction.
+
+    Args:
+        bucket (dict): The bucket to fork.
+        name (str): The name of the new bucket.
+        description (str): The description of the new bucket.
+        user_id (str): The ID of the user forking the bucket.
+        iterated_from (str): The ID of the owner of the original bucket.
+
+    Returns:
+        dict: The new bucket document.
+    """
+    new_bucket_id = str(uuid.uuid4())
+    now = datetime.now(UTC)
+
+    source_ids = bucket.get("sourceIds", [])
+    originals = {
+        source["sourceId"]: source
+        for source in Sources.find({"sourceId": {"$in": source_ids}}, FORK_SOURCE_FIELDS)
+    }
+    to_copy = [originals[source_id] for source_id in source_ids if source_id in originals]
+    hashes = share_contents(
+        [source for source in to_copy if source["type"] != "document"]
+    )
+
+    copies = [
+        {
+            "sourceId": str(uuid.uuid4()),
+            "bucketId": new_bucket_id,
+            "userId": user_id,
+            "name": source["name"],
+            "content": None,
+            "contentHash": hashes.get(source["sourceId"]),
+            "url": source["url"],
+            "type": source["type"],
+            "size": source.get("size"),
+            "originSourceId": source["sourceId"],
+            "created": now,
+            "updated": now,
+        }
+        for source in to_copy
+    ]
+
+    new_bucket = {
+        "bucketId": new_bucket_id,
+        "name": name,
+        "description": description,
+        "userId": user_id,
+        "sourceIds": [copy["sourceId"] for copy in copies],
+        "created": now,
+        "updated": now,
+        "visibility": "Private",
+        "tags": bucket.get("tags", []),
+        "iteratedFrom": iterated_from,
+        "likes": [],
+        "likesCount": 0,
+        "trendingStale": True,
+        "iterations": [],
+    }
+
+    def write(session):
+        for start in range(0, len(copies), FORK_BATCH_SIZE):
+            Sources.insert_many(
+                copies[start : start + FORK_BATCH_SIZE], ordered=False, session=session
+            )
+        Buckets.insert_one(new_bucket, session=session)
+        Buckets.update_one(
+            {"bucketId": bucket["bucketId"]},
+            {"$push": {"iterations": user_id}, "$inc": BUMP_VERSION},
+            session=session,
+        )
+        enqueue_bucket_embedding(new_bucket_id, session=session)
+        enqueue_source_passages(
+            [copy for copy in copies if copy["contentHash"]], session=session
+        )
+
+    run_in_transaction(write)
+    invalidate_snapshot(bucket["bucketId"])
+    index_bucket(new_bucket)
+    bump_search_epoch()
+
+    new_bucket.pop("_id", None)
+    return new_bucket
+
+
+# max buckets hydrated by one get_bucket_cards call
+BUCKET_CARDS_LIMIT = 100
+
+# the compact projection of a bucket used by lists of buckets
+BUCKET_CARD_FIELDS = {
+    "_id": 0,
+    "bucketId": 1,
+    "name": 1,
+    "description": 1,
+    "userId": 1,
+    "tags": 1,
+    "visibility": 1,
+    "likesCount": 1,
+    "iteratedFrom": 1,
+    "created": 1,
+    "updated": 1,
+}
+
+
+def get_bucket_cards(bucket_ids: List[str], viewer_id: Optional[str] = None):
+    """
+    Hydrate bucket ids into bucket cards with a single $in query.
+
+    Args:
+        bucket_ids (List[str]): The IDs of the buckets, at most BUCKET_CARDS_LIMIT are read.
+        viewer_id (str, optional): The ID of the user viewing the cards. Private
+            buckets of other users are left out.
+
+    Returns:
+        List[dict]: The cards in the order of bucket_ids, skipping buckets that do
+        not exist or are not visible to the viewer.
+    """
+    bucket_ids = list(dict.fromkeys(bucket_ids))[:BUCKET_CARDS_LIMIT]
+    found = {
+        bucket["bucketId"]: bucket
+        for bucket in Buckets.find({"bucketId": {"$in": bucket_ids}}, BUCKET_CARD_FIELDS)
+    }
+    return [
+        found[bucket_id]
+        for bucket_id in bucket_ids
+        if bucket_id in found
+        and (
+            found[bucket_id].get("visibility") != "Private"
+            or found[bucket_id].get("userId") == viewer_id
+        )
+    ]
 
 
 class BucketService:
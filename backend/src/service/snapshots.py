@@ -0,0 +1,49 @@
+from typing import Any, Dict
+from src.models.bucket import Buckets
+from src.utils.cache import LRUCache
+
+# bucketId -> (version, snapshot), checked against the bucket's stored version
+# on every read so entries left stale by another worker are never served
+SNAPSHOT_CACHE = LRUCache(maxsize=512)
+
+# merged into any update of a bucket document that changes its snapshot
+BUMP_VERSION = {"version": 1}
+
+# the source fields included in a snapshot, bodies are fetched per source
+SNAPSHOT_SOURCE_FIELDS = {
+    "_id": 0,
+    "sourceId": 1,
+    "bucketId": 1,
+    "userId": 1,
+    "name": 1,
+    "url": 1,
+    "type": 1,
+    "size": 1,
+    "created": 1,
+    "updated": 1,
+}
+
+
+def snapshot_etag(bucket: Dict[str, Any]) -> str:
+    return f'"{bucket["bucketId"]}-{bucket.get("version", 0)}"'
+
+
+def invalidate_snapshot(bucket_id: str):
+    """
+    Evict a bucket's snapshot after a write that already bumped its version.
+    """
+    SNAPSHOT_CACHE.pop(bucket_id)
+
+
+def bump_bucket_version(bucket_id: str, session=None):
+    """
+    Bump a bucket's version after a write to one of its sources or connections.
+
+    Args:
+        bucket_id (str): The ID of the bucket that changed.
+        session (ClientSession, optional): The session to write in.
+    """
+    Buckets.update_one(
+        {"bucketId": bucket_id}, {"$inc": BUMP_VERSION}, session=session
+    )
+    invalidate_snapshot(bucket_id)
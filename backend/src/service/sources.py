@@ -0,0 +1,68 @@
+import hashlib
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from src.models.source import Contents
+
+
+def content_hash(content: str) -> str:
+    """
+    Compute the content address of a source body.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def share_contents(sources: List[Dict[str, Any]], session=None) -> Dict[str, str]:
+    """
+    Store the inline bodies of the given sources in the shared contents collection.
+
+    Bodies are content addressed, so storing one that already exists is a no-op and
+    stored bodies never change.
+
+    Args:
+        sources (List[dict]): Source documents, some of which carry inline content.
+        session (ClientSession, optional): The session to run the writes in.
+
+    Returns:
+        dict: A map from sourceId to the hash of its body, for sources that had one.
+    """
+    hashes = {}
+    writes = {}
+    for source in sources:
+        if source.get("contentHash"):
+            hashes[source["sourceId"]] = source["contentHash"]
+        elif source.get("content") is not None:
+            digest = content_hash(source["content"])
+            hashes[source["sourceId"]] = digest
+            writes[digest] = UpdateOne(
+                {"hash": digest},
+                {"$setOnInsert": {"hash": digest, "content": source["content"]}},
+                upsert=True,
+            )
+    if writes:
+        Contents.bulk_write(list(writes.values()), ordered=False, session=session)
+    return hashes
+
+
+def hydrate_contents(sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fill in the body of sources that reference shared content, in one query.
+
+    Args:
+        sources (List[dict]): Source documents as read from the sources collection.
+
+    Returns:
+        List[dict]: The same documents, with content resolved and contentHash removed.
+    """
+    hashes = {source["contentHash"] for source in sources if source.get("contentHash")}
+    if not hashes:
+        return sources
+
+    bodies = {
+        doc["hash"]: doc["content"]
+        for doc in Contents.find({"hash": {"$in": list(hashes)}}, {"_id": 0})
+    }
+    for source in sources:
+        digest = source.pop("contentHash", None)
+        if digest:
+            source["content"] = bodies.get(digest)
+    return sources
@@ -0,0 +1,181 @@
+import hashlib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pytz import UTC
+from src.agents.structure_html_agent import (
+    process_html,
+    process_html_many,
+    title_from_metadata,
+)
+from src.lib.logger.index import logger
+from src.models.page import Pages
+from src.service.sources import share_contents
+from src.utils.webpages import (
+    WebpageError,
+    canonical_url,
+    extract_main_text,
+    fetch_webpage,
+    parse_html,
+)
+
+# cached pages are served without contacting the site for this long, then
+# revalidated with a conditional GET
+PAGE_FRESH_FOR = timedelta(hours=1)
+
+PAGE_FIELDS = {"_id": 0, "html": 0}
+WEBPAGE_DOWNLOAD_CONCURRENCY = 8
+
+
+def load_webpage(url: str) -> Dict[str, Any]:
+    """
+    Get the title and body of a webpage through the shared page cache.
+
+    A page checked less than PAGE_FRESH_FOR ago is served as is. An older one is
+    revalidated with If-None-Match / If-Modified-Since, and only re-extracted if
+    the site returns a different body; the title extraction (an LLM call) only
+    runs for new content. If the site cannot be reached, the cached page is served.
+
+    Args:
+        url (str): The URL of the page.
+
+    Returns:
+        dict: The canonical url, the title, the contentHash of the source body
+        ("{title}\\n{text}", stored in the contents collection) and the text length.
+
+    Raises:
+        WebpageError: If the page is not cached and cannot be downloaded.
+    """
+    page = download_webpage(url)
+    if "text" not in page:
+        return page
+    return store_webpage(page, page["title"] or process_html(page["text"]))
+
+
+def load_webpages(urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Load many webpages like load_webpage, downloading them concurrently and
+    naming the pages whose markup has no title with batched LLM calls.
+
+    Args:
+        urls (List[str]): The URLs of the pages.
+
+    Returns:
+        List[Optional[dict]]: The page of each URL as returned by load_webpage,
+        or None for the pages that could not be loaded.
+    """
+
+    def download(url: str) -> Optional[Dict[str, Any]]:
+        try:
+            return download_webpage(url)
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=WEBPAGE_DOWNLOAD_CONCURRENCY) as executor:
+        pages = list(executor.map(download, urls))
+
+    untitled = [page for page in pages if page and "text" in page and not page["title"]]
+    if untitled:
+        titles = process_html_many([page["text"] for page in untitled])
+        for page, title in zip(untitled, titles):
+            page["title"] = title
+    # titles the LLM failed to extract are None, those pages are not cached
+    return [
+        store_webpage(page, page["title"]) if page and "text" in page else page
+        for page in pages
+    ]
+
+
+def download_webpage(url: str) -> Dict[str, Any]:
+    """
+    Revalidate a page of the cache, or download and extract a new one.
+
+    Returns:
+        dict: The cached page if it is still current. Otherwise the extracted
+        page to give to store_webpage, with its text and the title read from
+        its markup (None if it has none).
+
+    Raises:
+        WebpageError: If the page is not cached and cannot be downloaded.
+    """
+    key = canonical_url(url)
+    cached = Pages.find_one({"url": key}, PAGE_FIELDS)
+    now = datetime.now(UTC)
+    if cached and UTC.localize(cached["checked"]) > now - PAGE_FRESH_FOR:
+        return cached
+
+    conditional = {}
+    if cached and cached.get("etag"):
+        conditional["If-None-Match"] = cached["etag"]
+    if cached and cached.get("lastModified"):
+        conditional["If-Modified-Since"] = cached["lastModified"]
+    try:
+        page = fetch_webpage(url, conditional)
+    except WebpageError as e:
+        if not cached:
+            raise
+        logger.error(f"Serving the cached copy of {key}: {e}")
+        return cached
+
+    validators = {"etag": page["etag"], "lastModified": page["lastModified"]}
+    if page["html"] is None:  # 304 Not Modified
+        Pages.update_one({"url": key}, {"$set": {"checked": now}})
+        return cached
+
+    html_hash = hashlib.sha256(page["html"]).hexdigest()
+    if cached and cached["htmlHash"] == html_hash:
+        Pages.update_one({"url": key}, {"$set": {"checked": now, **validators}})
+        return cached
+
+    document = parse_html(page["html"], page["encoding"])
+    # the markup names most pages, the LLM only reads the ones it does not
+    title = title_from_metadata(document, page["url"])
+    return {
+        "url": key,
+        "html": page["html"],
+        "htmlHash": html_hash,
+        "title": title,
+        "text": extract_main_text(document),
+        **validators,
+        "fetched": now,
+    }
+
+
+def store_webpage(page: Dict[str, Any], title: Optional[str]) -> Dict[str, Any]:
+    """
+    Store an extracted page in the cache, and its body in the contents collection.
+
+    A page without a title, because the LLM call failed, is named after its URL
+    and not cached, so the next load extracts its title again.
+
+    Args:
+        page (dict): A page extracted by download_webpage.
+        title (str, optional): The title of the page.
+
+    Returns:
+        dict: The page as returned by load_webpage.
+    """
+    key, text = page["url"], page["text"]
+    cache = title is not None
+    title = title or key
+    content = f"{title}\n{text}"
+    stored = {
+        "url": key,
+        "htmlHash": page["htmlHash"],
+        "title": title,
+        "contentHash": share_contents([{"sourceId": key, "content": content}])[key],
+        "textLength": len(text),
+        "etag": page["etag"],
+        "lastModified": page["lastModified"],
+        "fetched": page["fetched"],
+        "checked": page["fetched"],
+    }
+    if cache:
+        Pages.update_one(
+            {"url": key},
+            {"$set": {**stored, "html": zlib.compress(page["html"], 6)}},
+            upsert=True,
+        )
+    return stored
@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+from pymongo.collection import Collection
+from src.lib.logger.index import logger
+
+# queued by stop() to wake the writer thread up
+_STOP = object()
+
+
+class BufferedWriter:
+    """
+    Buffer documents in memory and insert them from a background thread in batches.
+
+    A batch is written once batch_size documents are buffered or flush_interval
+    seconds after its first document arrived, whichever comes first. When the
+    buffer is full new documents are dropped and counted rather than blocking
+    the request that produced them.
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        maxsize: int = 10000,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+
+    def add(self, document: Dict[str, Any]) -> bool:
+        """
+        Buffer a document without blocking.
+
+        Returns:
+            bool: False if the buffer was full and the document was dropped.
+        """
+        try:
+            self._queue.put_nowait(document)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="buffered-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """
+        Stop the background thread once everything buffered has been written.
+        """
+        if self._thread:
+            try:
+                # wakes the thread up if it is waiting for a batch
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass  # a stuck thread, its buffer is drained below
+            self._thread.join(timeout)
+            self._thread = None
+        self._write(self._drain())  # added while stopping, or left by a stuck thread
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while True:
+            try:
+                document = self._queue.get_nowait()
+            except queue.Empty:
+                return batch
+            if document is not _STOP:
+                batch.append(document)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception as e:  # e.g. an InvalidDocument, the thread must go on
+            self.failed += len(batch)
+            logger.error(f"Error writing {len(batch)} buffered documents: {e}")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            document = self._queue.get()
+            if document is _STOP:
+                return
+            batch = [document]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    document = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if document is _STOP:
+                    stopping = True
+                    break
+                batch.append(document)
+            self._write(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of buffered, written, dropped and failed documents.
+        """
+        return {
+            "buffered": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    A thread safe, bounded mapping that evicts the least recently used entry.
+    Entries optionally expire ttl seconds after they were set. When sizeof is
+    given, the approximate number of bytes held by the values is tracked too.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        size = self.sizeof(value) if self.sizeof else 0
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires, value, size)
+            self.bytes += size
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._discard(key)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _discard(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the size of the cache and its hit and miss counts since startup.
+        """
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else 0.0,
+        }
+        if self.sizeof:
+            stats["bytes"] = self.bytes
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
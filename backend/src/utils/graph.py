@@ -1,6 +1,6 @@
 import nltk
 import os
-from src.lib.pinecone.index import PC, PCINDEX
+from src.lib.pinecone.index import PC
 
 # from src.db.neo4j import driver as Neo4jDriver, run_query
 current_dir = os.path.dirname(__file__)
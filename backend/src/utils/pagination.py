@@ -0,0 +1,145 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+from bson import json_util
+from bson.errors import InvalidBSON
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+from pymongo.collection import Collection
+
+
+def encode_cursor(values: List[Any], direction: str = "next") -> str:
+    """
+    Encode the sort key of a boundary document into an opaque, url-safe cursor.
+
+    Args:
+        values (List[Any]): The values of the sort field and the tiebreak field.
+        direction (str): "next" to page forward from the document, "prev" to page back.
+
+    Returns:
+        str: The opaque cursor string.
+    """
+    payload = json_util.dumps({"k": values, "d": direction})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[List[Any], str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor string.
+
+    Returns:
+        Tuple[List[Any], str]: The sort key values and the paging direction.
+
+    Raises:
+        HTTPException: If the cursor is malformed (400).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values, direction = payload["k"], payload["d"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, InvalidBSON):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if direction not in ("next", "prev") or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values, direction
+
+
+def build_keyset_filter(
+    sort_key: Tuple[str, str], values: List[Any], descending: bool = True
+) -> Dict[str, Any]:
+    """
+    Build the filter selecting every document strictly after the given sort key.
+
+    The tiebreak field keeps the ordering total, so documents sharing the same
+    sort field value (e.g. identical timestamps) are never skipped or repeated.
+
+    Args:
+        sort_key (Tuple[str, str]): The sort field and the unique tiebreak field.
+        values (List[Any]): The sort key values of the boundary document.
+        descending (bool): Whether the walk is in descending order.
+
+    Returns:
+        dict: A Mongo filter to combine with the base query.
+    """
+    field, tiebreak = sort_key
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {op: values[0]}},
+            {field: values[0], tiebreak: {op: values[1]}},
+        ]
+    }
+
+
+def keyset_paginate(
+    collection: Collection,
+    query: Dict[str, Any],
+    sort_key: Tuple[str, str],
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+    descending: bool = True,
+) -> Dict[str, Any]:
+    """
+    Fetch one page of a collection using keyset (seek) pagination.
+
+    Each page reads at most limit + 1 documents, so its cost does not depend on
+    how deep into the result set the cursor is. The query should be backed by a
+    compound index ending in (sort field, tiebreak field) in the same order.
+
+    Args:
+        collection (Collection): The collection to page through.
+        query (dict): The base Mongo filter.
+        sort_key (Tuple[str, str]): The sort field and the unique tiebreak field.
+        limit (int): The number of documents per page.
+        cursor (str, optional): A cursor returned by a previous page.
+        projection (dict, optional): The projection applied to the documents.
+        descending (bool): Whether the page walk is newest first.
+
+    Returns:
+        dict: The page items with the next and previous cursors (None at either end).
+    """
+    field, tiebreak = sort_key
+    projection = dict(projection or {"_id": 0})
+    strip_id = tiebreak == "_id" and projection.get("_id") == 0
+    if strip_id:
+        projection.pop("_id")
+
+    direction = "next"
+    filter = query
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        walk_descending = descending if direction == "next" else not descending
+        filter = {"$and": [query, build_keyset_filter(sort_key, values, walk_descending)]}
+
+    order = DESCENDING if descending else ASCENDING
+    if direction == "prev":
+        order = -order
+
+    items = list(
+        collection.find(filter, projection)
+        .sort([(field, order), (tiebreak, order)])
+        .limit(limit + 1)
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+    if direction == "prev":
+        items.reverse()
+
+    next_cursor = prev_cursor = None
+    if items:
+        first, last = items[0], items[-1]
+        if has_more or direction == "prev":
+            next_cursor = encode_cursor([last.get(field), last.get(tiebreak)], "next")
+        if cursor and (has_more or direction == "next"):
+            prev_cursor = encode_cursor([first.get(field), first.get(tiebreak)], "prev")
+
+    if strip_id:
+        for item in items:
+            item.pop("_id", None)
+
+    return {"items": items, "nextCursor": next_cursor, "prevCursor": prev_cursor}
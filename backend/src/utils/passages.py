@@ -0,0 +1,41 @@
+import hashlib
+from typing import List
+
+PASSAGE_WORDS = 200
+PASSAGE_OVERLAP_WORDS = 40
+
+
+def split_passages(
+    content: str, size: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP_WORDS
+) -> List[str]:
+    """
+    Split a text into passages of size words, each starting overlap words before
+    the end of the previous one so a sentence cut at a boundary is whole in one
+    of the two passages.
+
+    Args:
+        content (str): The text to split.
+        size (int): The number of words per passage.
+        overlap (int): The number of words shared by two consecutive passages.
+
+    Returns:
+        List[str]: The passages, in order. Empty for a blank text.
+    """
+    words = content.split() if content else []
+    step = size - overlap
+    return [
+        " ".join(words[start : start + size])
+        for start in range(0, max(len(words) - overlap, 1), step)
+        if words[start : start + size]
+    ]
+
+
+def passage_hash(passage: str) -> str:
+    return hashlib.sha256(passage.encode("utf-8")).hexdigest()
+
+
+def passage_id(source_id: str, index: int) -> str:
+    """
+    The vector id of a source's index-th passage.
+    """
+    return f"{source_id}:{index}"
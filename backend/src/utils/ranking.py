@@ -0,0 +1,152 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check metadata against a Pinecone style filter, e.g. {"visibility": {"$eq": "Public"}}.
+    Supports plain values and the $eq, $ne, $in and $nin operators.
+    """
+    for field, condition in (filter or {}).items():
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+    return True
+
+
+class BM25Index:
+    """
+    An in-memory inverted index scored with Okapi BM25.
+
+    Documents can be added, replaced and removed one at a time, so the index is
+    kept up to date incrementally instead of being rebuilt. generation changes
+    whenever the indexed content does.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.generation = 0
+
+    def upsert(self, doc_id: str, tokens: List[str], metadata: Dict[str, Any] = None):
+        """
+        Add a document, replacing any previous version of it.
+        """
+        counts = Counter(tokens)
+        metadata = metadata or {}
+        with self._lock:
+            if self._terms.get(doc_id) == counts and self._metadata[doc_id] == metadata:
+                return
+            self.remove(doc_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._terms[doc_id] = counts
+            self._lengths[doc_id] = len(tokens)
+            self._metadata[doc_id] = metadata
+            self._total_length += len(tokens)
+            self.generation += 1
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            counts = self._terms.pop(doc_id, None)
+            if counts is None:
+                return
+            for term in counts:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(doc_id)
+            self._metadata.pop(doc_id)
+            self.generation += 1
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._metadata.get(doc_id)
+
+    def search(
+        self, query: str, limit: int = 10, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score the documents containing any query term.
+
+        Args:
+            query (str): The query text.
+            limit (int): The number of results to return.
+            filter (dict, optional): A Pinecone style filter on the document metadata.
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first.
+        """
+        with self._lock:
+            count = len(self._lengths)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self._lengths[doc_id] / average_length
+                    )
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (
+                        self.k1 + 1
+                    ) / (tf + norm)
+            if filter:
+                scores = {
+                    doc_id: score
+                    for doc_id, score in scores.items()
+                    if matches_filter(self._metadata[doc_id], filter)
+                }
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge several rankings of ids, scoring each id by the sum of 1 / (k + rank).
+
+    Args:
+        rankings (Iterable[List[str]]): Lists of ids, best first.
+        k (int): Damps the weight of the top ranks, 60 is the usual choice.
+
+    Returns:
+        List[str]: The fused ranking, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
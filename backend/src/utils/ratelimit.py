@@ -0,0 +1,29 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    A thread safe limiter spacing calls at least 1 / rate seconds apart, shared
+    by every thread calling the same upstream API.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Block until the next call is allowed.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return start - now
@@ -1,23 +1,223 @@
-from src.lib.pinecone.index import PCINDEX, get_query_embedding
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+from pytz import UTC
+from src.lib.pinecone.index import (
+    VECTOR_STORE,
+    get_query_embedding,
+    normalize_query,
+    warm_query_embeddings,
+)
+from src.lib.logger.index import logger
+from src.models.analytics import Searches, SearchEpochs
+from src.models.bucket import Buckets
+from src.utils.cache import LRUCache
+from src.utils.ranking import BM25Index, reciprocal_rank_fusion, tokenize
+
+# bucket names, descriptions and tags, kept in sync by src/workers/keyword_index.py
+BUCKET_KEYWORD_INDEX = BM25Index()
+KEYWORD_NAME_WEIGHT = 3  # same header weighting as the bucket embeddings
+# every bucket field but the trending bookkeeping, like the vector metadata, so
+# keyword hits are returned as complete bucket cards straight from the index
+KEYWORD_INDEX_FIELDS = {"_id": 0, "trendingStale": 0, "trendingScore": 0}
+
+# runs the vector half of hybrid searches while the keyword half runs locally
+SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+# search results keyed by namespace epoch, mode, normalized query, limit and filter.
+# A write bumps the epoch, so older entries are never read again and age out.
+SEARCH_RESULT_CACHE = LRUCache(
+    maxsize=2048, ttl=600, sizeof=lambda results: len(json.dumps(results, default=str))
+)
 
 
 ### execute semantic search
 def run_semantic_search(query: str, limit: int, filter):
     query_embedding = get_query_embedding(query)
-    pinecone_response = PCINDEX.query(
-        vector=query_embedding,
-        top_k=limit,
-        include_metadata=True,
-        namespace="buckets",
-        filter=filter,
-    )
+    matches = VECTOR_STORE.query(query_embedding, limit, "buckets", filter)
     results = []
-    for match in pinecone_response["matches"]:
+    for match in matches:
         result = match["metadata"]
         result["id"] = match["id"]
         results.append(result)
     return results
 
 
-results = run_semantic_search("Test", 10, {"visibility": "Public"})
-print(results)
+### warm the query embedding cache with the most frequent recent searches
+def warm_search_cache(limit: int = 200, days: int = 30) -> int:
+    since = datetime.now(UTC) - timedelta(days=days)
+    try:
+        top_queries = Searches.aggregate(
+            [
+                {"$match": {"timestamp": {"$gte": since}}},
+                {
+                    "$group": {
+                        "_id": {"$toLower": {"$trim": {"input": "$query"}}},
+                        "count": {"$sum": 1},
+                    }
+                },
+                {"$sort": {"count": -1}},
+                {"$limit": limit},
+            ]
+        )
+        warmed = warm_query_embeddings(
+            [doc["_id"] for doc in top_queries if doc["_id"]]
+        )
+        logger.info(f"Warmed the query embedding cache with {warmed} queries")
+        return warmed
+    except Exception as e:
+        logger.error(f"Error warming the query embedding cache: {e}")
+        return 0
+
+
+### shape buckets like the semantic search results
+def search_result(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a search result from a bucket: the vector metadata fields, without null
+    values and with the dates as strings.
+    """
+    result = {
+        key: value
+        for key, value in bucket.items()
+        if key not in KEYWORD_INDEX_FIELDS and value is not None
+    }
+    for field in ("created", "updated"):
+        if field in result:
+            result[field] = str(result[field])
+    result["id"] = bucket["bucketId"]
+    return result
+
+
+### keep the keyword index up to date
+def index_bucket(bucket: Dict[str, Any]):
+    tokens = tokenize(bucket.get("name")) * KEYWORD_NAME_WEIGHT
+    tokens += tokenize(bucket.get("description"))
+    for tag in bucket.get("tags") or []:
+        tokens += tokenize(tag)
+    BUCKET_KEYWORD_INDEX.upsert(bucket["bucketId"], tokens, search_result(bucket))
+
+
+def unindex_bucket(bucket_id: str):
+    BUCKET_KEYWORD_INDEX.remove(bucket_id)
+
+
+### read keyword hits from the index, and from mongo if they left it meanwhile
+def get_keyword_results(bucket_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the search results of keyword hits from the keyword index metadata.
+
+    Returns:
+        dict: The results by bucket ID, without the buckets that no longer exist.
+    """
+    results, missing = {}, []
+    for bucket_id in bucket_ids:
+        metadata = BUCKET_KEYWORD_INDEX.get(bucket_id)
+        if metadata is None:
+            missing.append(bucket_id)
+        else:
+            results[bucket_id] = dict(metadata)
+    if missing:
+        for bucket in Buckets.find(
+            {"bucketId": {"$in": missing}}, KEYWORD_INDEX_FIELDS
+        ):
+            results[bucket["bucketId"]] = search_result(bucket)
+    return results
+
+
+### execute keyword search
+def run_keyword_search(query: str, limit: int, filter):
+    bucket_ids = [
+        bucket_id for bucket_id, _ in BUCKET_KEYWORD_INDEX.search(query, limit, filter)
+    ]
+    results = get_keyword_results(bucket_ids)
+    return [results[bucket_id] for bucket_id in bucket_ids if bucket_id in results]
+
+
+### execute keyword and semantic search concurrently and fuse their rankings
+def run_hybrid_search(query: str, limit: int, filter) -> Tuple[List[Any], bool]:
+    """
+    Run a hybrid search.
+
+    Returns:
+        tuple: The fused results, and whether they are degraded: the keyword
+        results alone, because the vector query failed.
+    """
+    semantic = SEARCH_EXECUTOR.submit(run_semantic_search, query, limit, filter)
+    keyword_ids = [
+        bucket_id for bucket_id, _ in BUCKET_KEYWORD_INDEX.search(query, limit, filter)
+    ]
+    try:
+        semantic_results = semantic.result()
+    except Exception as e:
+        logger.error(f"Error running semantic search, using keyword results: {e}")
+        semantic_results = None
+
+    results = {result["id"]: result for result in semantic_results or []}
+    results.update(
+        get_keyword_results(
+            [bucket_id for bucket_id in keyword_ids if bucket_id not in results]
+        )
+    )
+    if semantic_results is None:
+        ranked = keyword_ids
+    else:
+        ranked = reciprocal_rank_fusion(
+            [[result["id"] for result in semantic_results], keyword_ids]
+        )
+    hits = [results[bucket_id] for bucket_id in ranked if bucket_id in results]
+    return hits[:limit], semantic_results is None
+
+
+### invalidate cached search results of a namespace
+def bump_search_epoch(namespace: str = "buckets"):
+    """
+    Invalidate every cached search result of a namespace, in every worker.
+
+    Called after writes to buckets or to their vectors.
+    """
+    SearchEpochs.update_one({"_id": namespace}, {"$inc": {"epoch": 1}}, upsert=True)
+
+
+def get_search_epoch(namespace: str = "buckets") -> int:
+    epoch = SearchEpochs.find_one({"_id": namespace})
+    return epoch["epoch"] if epoch else 0
+
+
+### execute a search, reusing the results of an identical search since the last write
+def run_search(mode: str, query: str, limit: int, filter):
+    """
+    Run a search through the result cache.
+
+    Args:
+        mode (str): "hybrid", "keyword" or "semantic".
+        query (str): The search query.
+        limit (int): The number of results to return.
+        filter (dict): The Pinecone style metadata filter.
+
+    Returns:
+        list: The matching buckets, best first.
+    """
+    # keyword results also depend on when this worker last synced its keyword index
+    keyword_generation = BUCKET_KEYWORD_INDEX.generation if mode != "semantic" else 0
+    key = (
+        get_search_epoch(),
+        keyword_generation,
+        mode,
+        normalize_query(query),
+        limit,
+        json.dumps(filter, sort_keys=True),
+    )
+    results = SEARCH_RESULT_CACHE.get(key)
+    if results is None:
+        degraded = False
+        if mode == "hybrid":
+            results, degraded = run_hybrid_search(query, limit, filter)
+        elif mode == "keyword":
+            results = run_keyword_search(query, limit, filter)
+        else:
+            results = run_semantic_search(query, limit, filter)
+        # keyword only results of a failed vector query are not cached
+        if not degraded:
+            SEARCH_RESULT_CACHE.set(key, results)
+    return results
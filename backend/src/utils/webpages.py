@@ -0,0 +1,219 @@
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import lxml.etree
+import lxml.html
+import requests
+
+WEBPAGE_CONNECT_TIMEOUT_SECONDS = 3.05
+WEBPAGE_READ_TIMEOUT_SECONDS = 10
+# wall clock limit on the whole download, a server trickling bytes resets the
+# read timeout on every chunk
+WEBPAGE_DEADLINE_SECONDS = 15
+WEBPAGE_MAX_BYTES = 5 * 1024 * 1024
+WEBPAGE_CHUNK_SIZE = 64 * 1024
+WEBPAGE_MAX_TEXT_CHARS = 100_000
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+WEBPAGE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# elements that never hold a page's main content
+BOILERPLATE_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+    "button",
+    "select",
+)
+BOILERPLATE_XPATH = (
+    "//*[@hidden or @aria-hidden='true'"
+    " or @role='navigation' or @role='banner' or @role='contentinfo'"
+    " or @role='complementary' or @role='dialog']"
+)
+
+
+# query parameters that only track where a visitor came from
+TRACKING_PARAMETERS = ("fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so the links users paste for the same page map to one key:
+    the scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped, and the remaining query parameters are sorted.
+
+    Args:
+        url (str): An absolute http(s) URL.
+
+    Returns:
+        str: The canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith("utm_")
+        and name.lower() not in TRACKING_PARAMETERS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class WebpageError(Exception):
+    """
+    The webpage could not be downloaded within the limits, or is not HTML.
+    """
+
+
+def fetch_webpage(url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Download a webpage, streaming the body and stopping at WEBPAGE_MAX_BYTES.
+    Larger pages are truncated, which the HTML parser tolerates.
+
+    Args:
+        url (str): The URL of the page.
+        headers (dict, optional): Extra request headers, e.g. for a conditional GET.
+
+    Returns:
+        dict: The final url after redirects, the HTTP status, the html bytes (None
+        for a 304), the encoding the server declared, and the etag and
+        lastModified validators.
+
+    Raises:
+        WebpageError: On network errors, timeouts, error statuses and non HTML bodies.
+    """
+    deadline = time.monotonic() + WEBPAGE_DEADLINE_SECONDS
+    try:
+        with requests.get(
+            url,
+            headers={**WEBPAGE_HEADERS, **(headers or {})},
+            timeout=(WEBPAGE_CONNECT_TIMEOUT_SECONDS, WEBPAGE_READ_TIMEOUT_SECONDS),
+            stream=True,
+        ) as response:
+            page = {
+                "url": response.url,
+                "status": response.status_code,
+                "html": None,
+                "encoding": declared_charset(response.headers.get("Content-Type")),
+                "etag": response.headers.get("ETag"),
+                "lastModified": response.headers.get("Last-Modified"),
+            }
+            if response.status_code == 304:
+                return page
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "text/html")
+            if content_type.split(";")[0].strip().lower() not in HTML_CONTENT_TYPES:
+                raise WebpageError(f"Not a webpage: {content_type}")
+
+            body = bytearray()
+            for chunk in response.iter_content(WEBPAGE_CHUNK_SIZE):
+                body += chunk
+                if len(body) >= WEBPAGE_MAX_BYTES:
+                    del body[WEBPAGE_MAX_BYTES:]
+                    break
+                if time.monotonic() > deadline:
+                    raise WebpageError("Timed out downloading the webpage")
+            page["html"] = bytes(body)
+            return page
+    except requests.exceptions.RequestException as e:
+        raise WebpageError(str(e)) from e
+
+
+def declared_charset(content_type: Optional[str]) -> Optional[str]:
+    """
+    The charset parameter of a Content-Type header, if any. requests' own
+    fallback to ISO-8859-1 for text/* would override the document's meta charset.
+    """
+    for parameter in (content_type or "").split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip('"')
+    return None
+
+
+def parse_html(html: bytes, encoding: Optional[str] = None):
+    """
+    Parse HTML bytes with lxml. Without a declared encoding, the document's meta
+    charset is used, or UTF-8 if the bytes are valid UTF-8.
+    """
+    if encoding is None and b"charset" not in html[:4096].lower() and is_utf8(html):
+        encoding = "utf-8"
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True)
+        return lxml.html.document_fromstring(html, parser=parser)
+    except LookupError:  # an encoding Python does not know
+        return lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:  # nothing but whitespace
+        return lxml.html.document_fromstring("<html><body></body></html>")
+
+
+def is_utf8(data: bytes) -> bool:
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # a body cut at WEBPAGE_MAX_BYTES can end in the middle of a character
+        return e.start >= len(data) - 3 and e.reason == "unexpected end of data"
+    return True
+
+
+def normalize_text(text: str, max_chars: int = WEBPAGE_MAX_TEXT_CHARS) -> str:
+    """
+    NFKC normalize a text, collapse its whitespace and cut it at max_chars on a
+    word boundary.
+    """
+    text = " ".join(unicodedata.normalize("NFKC", text).split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0]
+    return text
+
+
+def extract_main_text(document, max_chars: int = WEBPAGE_MAX_TEXT_CHARS) -> str:
+    """
+    Extract the main content of a parsed page as normalized text: boilerplate
+    elements (scripts, navigation, headers, footers, sidebars, forms, hidden
+    elements) are dropped, then the text is read from the <main> element, the
+    <article> with the most text, or the body.
+
+    Args:
+        document: A document parsed with parse_html. It is modified.
+        max_chars (int): The maximum length of the text.
+
+    Returns:
+        str: The text of the main content.
+    """
+    for element in document.xpath(
+        " | ".join(f"//{tag}" for tag in BOILERPLATE_TAGS) + " | " + BOILERPLATE_XPATH
+    ):
+        if element.getparent() is not None:
+            element.drop_tree()
+
+    candidates = document.xpath("//main | //*[@role='main']")
+    if not candidates:
+        candidates = sorted(
+            document.xpath("//article"),
+            key=lambda element: len(element.text_content()),
+            reverse=True,
+        )
+    root = candidates[0] if candidates else document.find("body")
+    if root is None:
+        root = document
+    return normalize_text(" ".join(root.itertext()), max_chars)
@@ -0,0 +1,14 @@
+from src.models.analytics import Searches
+from src.utils.batching import BufferedWriter
+
+ANALYTICS_BATCH_SIZE = 100
+ANALYTICS_FLUSH_INTERVAL_SECONDS = 0.5
+ANALYTICS_BUFFER_SIZE = 10000
+
+# search history and analytics, written off the request path
+SEARCH_ANALYTICS = BufferedWriter(
+    Searches,
+    batch_size=ANALYTICS_BATCH_SIZE,
+    flush_interval=ANALYTICS_FLUSH_INTERVAL_SECONDS,
+    maxsize=ANALYTICS_BUFFER_SIZE,
+)
@@ -0,0 +1,228 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from pytz import UTC
+from pymongo import ReturnDocument
+from src.core.config import settings
+from src.db.mongodb import run_in_transaction
+from src.lib.logger.index import logger
+from src.lib.pinecone.index import VECTOR_STORE
+from src.lib.s3.index import S3Bucket
+from src.models.bucket import Buckets
+from src.models.connection import Connections
+from src.models.image import Images
+from src.models.job import Jobs
+from src.models.outbox import Outbox, PassageOutbox
+from src.models.source import SourcePassages, Sources
+from src.utils.passages import passage_id
+from src.utils.search import bump_search_epoch
+from src.workers.images import derivative_keys, unreferenced_derivative_keys
+
+s3_bucket = S3Bucket(bucket_name=settings.s3_bucket_name)
+
+DELETION_POLL_INTERVAL_SECONDS = 5
+DELETION_LEASE = timedelta(minutes=5)
+DELETION_MAX_ATTEMPTS = 5
+
+# every stage is idempotent, so a job whose worker died resumes at the last
+# recorded stage and simply redoes whatever part of it had already run
+DELETION_STAGES = ["collect", "mongo", "s3", "pinecone"]
+
+
+def enqueue_bucket_deletion(bucket_id: str, user_id: str) -> Optional[str]:
+    """
+    Delete a bucket document and record a job to clean up everything it owns.
+
+    Both writes happen in one transaction, so the bucket can never disappear
+    without a job to remove its sources, connections, files and vectors.
+
+    Args:
+        bucket_id (str): The ID of the bucket to delete.
+        user_id (str): The ID of the user owning the bucket.
+
+    Returns:
+        Optional[str]: The ID of the deletion job, or None if the bucket was not found.
+    """
+    job_id = str(uuid.uuid4())
+
+    def write(session):
+        bucket = Buckets.find_one_and_delete(
+            {"bucketId": bucket_id, "userId": user_id},
+            projection={"_id": 0, "bucketId": 1, "imageKeys": 1},
+            session=session,
+        )
+        # forks and older buckets have no imageKeys, an empty projection is a match
+        if bucket is None:
+            return None
+        now = datetime.now(UTC)
+        Jobs.insert_one(
+            {
+                "jobId": job_id,
+                "type": "delete_bucket",
+                "status": "pending",
+                "stage": DELETION_STAGES[0],
+                "attempts": 0,
+                "payload": {
+                    "bucketId": bucket_id,
+                    "userId": user_id,
+                    "imageKeys": bucket.get("imageKeys", []),
+                },
+                "leaseUntil": None,
+                "lastError": None,
+                "created": now,
+                "updated": now,
+            },
+            session=session,
+        )
+        return job_id
+
+    return run_in_transaction(write)
+
+
+def claim_deletion_job(skip: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """
+    Lease the oldest pending deletion job, or one whose previous lease expired.
+
+    Args:
+        skip (Iterable[str]): The IDs of jobs not to claim.
+    """
+    now = datetime.now(UTC)
+    return Jobs.find_one_and_update(
+        {
+            "type": "delete_bucket",
+            "jobId": {"$nin": list(skip)},
+            "$or": [
+                {"status": "pending"},
+                {"status": "running", "leaseUntil": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {"status": "running", "leaseUntil": now + DELETION_LEASE},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def set_stage(job: Dict[str, Any], stage: str, **fields):
+    """
+    Record the stage a job reached, along with any other fields to set.
+    """
+    job["stage"] = stage
+    Jobs.update_one(
+        {"jobId": job["jobId"]},
+        {"$set": {"stage": stage, "updated": datetime.now(UTC), **fields}},
+    )
+
+
+def run_bucket_deletion(job: Dict[str, Any]):
+    """
+    Run the remaining stages of a bucket deletion job.
+
+    collect:  record the S3 keys of the bucket's documents and image variants
+              before their sources and images go
+    mongo:    delete_many the bucket's sources and connections, drop pending embeddings
+    s3:       DeleteObjects the recorded keys no other bucket still references
+    pinecone: delete the bucket's vector and the passages of its sources
+
+    Args:
+        job (dict): The leased job document.
+    """
+    payload = job["payload"]
+    bucket_id = payload["bucketId"]
+    stage = DELETION_STAGES.index(job["stage"])
+
+    if stage <= 0:
+        keys = Sources.distinct("url", {"bucketId": bucket_id, "type": "document"})
+        keys = [key for key in keys if key] + payload.get("imageKeys", [])
+        keys += derivative_keys(
+            list(Images.find({"bucketId": bucket_id}, {"_id": 0, "variants": 1}))
+        )
+        payload["s3Keys"] = keys
+        set_stage(job, "mongo", **{"payload.s3Keys": keys})
+
+    if stage <= 1:
+        Sources.delete_many({"bucketId": bucket_id})
+        Connections.delete_many({"bucketId": bucket_id})
+        Outbox.delete_one({"bucketId": bucket_id})
+        PassageOutbox.delete_many({"bucketId": bucket_id})
+        Images.delete_many({"bucketId": bucket_id})
+        set_stage(job, "s3")
+
+    if stage <= 2:
+        keys = payload.get("s3Keys", [])
+        # documents are shared by reference with forks, keep the ones still in use
+        shared = set(Sources.distinct("url", {"url": {"$in": keys}})) if keys else set()
+        # and so are image variants, with every identical image
+        variants = [key for key in keys if key.startswith("derivatives/")]
+        shared |= set(variants) - set(unreferenced_derivative_keys(variants))
+        failed = s3_bucket.delete_objects([key for key in keys if key not in shared])
+        if failed:
+            raise RuntimeError(f"Could not delete {len(failed)} objects from S3")
+        set_stage(job, "pinecone")
+
+    VECTOR_STORE.delete([bucket_id], "buckets")
+    bump_search_epoch()
+    passages = SourcePassages.find(
+        {"bucketId": bucket_id}, {"_id": 0, "sourceId": 1, "hashes": 1}
+    )
+    VECTOR_STORE.delete(
+        [
+            passage_id(source["sourceId"], i)
+            for source in passages
+            for i in range(len(source["hashes"]))
+        ],
+        "sources",
+    )
+    SourcePassages.delete_many({"bucketId": bucket_id})
+    set_stage(job, "pinecone", status="done", leaseUntil=None)
+
+
+def process_deletion_jobs() -> int:
+    """
+    Run deletion jobs until none are left to claim.
+
+    Returns:
+        int: The number of jobs processed.
+    """
+    processed = 0
+    # jobs that failed in this pass wait for the next poll, without holding up
+    # the jobs behind them
+    failed_jobs = set()
+    while job := claim_deletion_job(failed_jobs):
+        processed += 1
+        try:
+            run_bucket_deletion(job)
+        except Exception as e:
+            logger.error(f"Error running deletion job {job['jobId']}: {e}")
+            failed = job["attempts"] >= DELETION_MAX_ATTEMPTS
+            Jobs.update_one(
+                {"jobId": job["jobId"]},
+                {
+                    "$set": {
+                        "status": "failed" if failed else "pending",
+                        "leaseUntil": None,
+                        "lastError": str(e),
+                        "updated": datetime.now(UTC),
+                    }
+                },
+            )
+            failed_jobs.add(job["jobId"])
+    return processed
+
+
+async def run_deletion_worker(interval: int = DELETION_POLL_INTERVAL_SECONDS):
+    """
+    Poll for deletion jobs until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two polls.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(process_deletion_jobs)
+        except Exception as e:
+            logger.error(f"Error processing deletion jobs: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,228 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from pytz import UTC
+from pymongo import UpdateOne
+from src.lib.logger.index import logger
+from src.lib.pinecone.index import (
+    VECTOR_STORE,
+    EMBEDDING_BATCH_LIMIT,
+    bucket_embedding_input,
+    generate_passage_embeddings,
+)
+from src.models.bucket import Buckets
+from src.models.outbox import Outbox
+from src.utils.search import bump_search_epoch
+
+EMBEDDING_POLL_INTERVAL_SECONDS = 1
+EMBEDDING_LEASE = timedelta(minutes=2)
+EMBEDDING_BACKOFF_BASE_SECONDS = 2
+EMBEDDING_BACKOFF_MAX_SECONDS = 600
+
+# bucket fields that are not stored as vector metadata
+EXCLUDED_METADATA_FIELDS = ("_id", "trendingStale", "trendingScore")
+
+
+def enqueue_bucket_embedding(bucket_id: str, session=None):
+    """
+    Mark a bucket's vector as out of date. Repeated writes to the same bucket
+    before the worker runs coalesce into a single embedding.
+
+    Args:
+        bucket_id (str): The ID of the bucket whose name or description changed.
+        session (ClientSession, optional): The session to write in, to commit the
+            entry together with the bucket write.
+    """
+    Outbox.update_one(
+        {"bucketId": bucket_id}, pending_entry(), upsert=True, session=session
+    )
+
+
+def pending_entry() -> Dict[str, Any]:
+    now = datetime.now(UTC)
+    return {
+        "$set": {
+            "status": "pending",
+            "attempts": 0,
+            "enqueued": now,
+            "nextAttempt": now,
+            "claim": None,
+            "leaseUntil": None,
+        }
+    }
+
+
+def enqueue_all_bucket_embeddings() -> int:
+    """
+    Mark every bucket's vector as out of date, to fill a vector store that does
+    not persist its vectors across restarts.
+
+    Returns:
+        int: The number of buckets enqueued.
+    """
+    update = pending_entry()
+    requests = [
+        UpdateOne({"bucketId": bucket["bucketId"]}, update, upsert=True)
+        for bucket in Buckets.find({}, {"_id": 0, "bucketId": 1})
+    ]
+    for start in range(0, len(requests), 1000):
+        Outbox.bulk_write(requests[start : start + 1000], ordered=False)
+    return len(requests)
+
+
+def bucket_vector_metadata(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the Pinecone metadata for a bucket. Pinecone rejects null values and
+    datetimes, so the former are dropped and the latter stored as strings.
+    """
+    metadata = {
+        key: value
+        for key, value in bucket.items()
+        if key not in EXCLUDED_METADATA_FIELDS and value is not None
+    }
+    metadata["created"] = str(bucket["created"])
+    metadata["updated"] = str(bucket["updated"])
+    return metadata
+
+
+def claim_outbox_entries(limit: int, outbox=Outbox) -> List[Dict[str, Any]]:
+    """
+    Lease up to limit due entries of an outbox collection, including ones whose
+    previous lease expired.
+    """
+    now = datetime.now(UTC)
+    due = {
+        "$or": [
+            {"status": "pending", "nextAttempt": {"$lte": now}},
+            {"status": "processing", "leaseUntil": {"$lt": now}},
+        ]
+    }
+    ids = [entry["_id"] for entry in outbox.find(due, {"_id": 1}).limit(limit)]
+    if not ids:
+        return []
+
+    claim = str(uuid.uuid4())
+    outbox.update_many(
+        {"$and": [{"_id": {"$in": ids}}, due]},
+        {
+            "$set": {
+                "status": "processing",
+                "claim": claim,
+                "leaseUntil": now + EMBEDDING_LEASE,
+            }
+        },
+    )
+    return list(outbox.find({"claim": claim}))
+
+
+def retry_outbox_entries(
+    entries: List[Dict[str, Any]], error: Exception, outbox=Outbox
+):
+    """
+    Release claimed entries after a failure, to be retried with exponential backoff.
+    """
+    now = datetime.now(UTC)
+    for entry in entries:
+        delay = min(
+            EMBEDDING_BACKOFF_BASE_SECONDS * 2 ** entry["attempts"],
+            EMBEDDING_BACKOFF_MAX_SECONDS,
+        )
+        outbox.update_one(
+            {"_id": entry["_id"], "claim": entry["claim"]},
+            {
+                "$set": {
+                    "status": "pending",
+                    "claim": None,
+                    "leaseUntil": None,
+                    "nextAttempt": now + timedelta(seconds=delay),
+                    "lastError": str(error),
+                },
+                "$inc": {"attempts": 1},
+            },
+        )
+
+
+def process_outbox_batch(limit: int = EMBEDDING_BATCH_LIMIT) -> int:
+    """
+    Embed and upsert one batch of outbox entries.
+
+    The buckets are read in one query, embedded in one inference call and
+    upserted in one request. An entry is only removed if it was not enqueued
+    again while the batch ran; failed entries are retried with exponential backoff.
+
+    Args:
+        limit (int): The maximum number of entries to process.
+
+    Returns:
+        int: The number of entries claimed.
+    """
+    entries = claim_outbox_entries(limit)
+    if not entries:
+        return 0
+
+    bucket_ids = [entry["bucketId"] for entry in entries]
+    buckets = {
+        bucket["bucketId"]: bucket
+        for bucket in Buckets.find({"bucketId": {"$in": bucket_ids}}, {"_id": 0})
+    }
+    try:
+        # entries of deleted buckets are dropped below without an upsert
+        to_embed = [buckets[bucket_id] for bucket_id in bucket_ids if bucket_id in buckets]
+        if to_embed:
+            values = generate_passage_embeddings(
+                [
+                    bucket_embedding_input(
+                        bucket.get("name") or "", bucket.get("description") or ""
+                    )
+                    for bucket in to_embed
+                ]
+            )
+            VECTOR_STORE.upsert(
+                [
+                    (bucket["bucketId"], vector, bucket_vector_metadata(bucket))
+                    for bucket, vector in zip(to_embed, values)
+                ],
+                "buckets",
+            )
+            bump_search_epoch()
+    except Exception as e:
+        logger.error(f"Error embedding {len(entries)} buckets: {e}")
+        retry_outbox_entries(entries, e)
+        return len(entries)
+
+    for entry in entries:
+        Outbox.delete_one({"_id": entry["_id"], "claim": entry["claim"]})
+    return len(entries)
+
+
+def drain_outbox() -> int:
+    """
+    Process outbox batches until nothing is due.
+
+    Returns:
+        int: The number of entries processed.
+    """
+    processed = 0
+    while claimed := process_outbox_batch():
+        processed += claimed
+    return processed
+
+
+async def run_embedding_worker(interval: int = EMBEDDING_POLL_INTERVAL_SECONDS):
+    """
+    Poll the outbox until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two polls.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(drain_outbox)
+        except Exception as e:
+            logger.error(f"Error draining embedding outbox: {e}")
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_embedding_worker())
@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pytz import UTC
+from src.core.config import settings
+from src.lib.images.index import CONTENT_TYPES, render_derivatives
+from src.lib.logger.index import logger
+from src.lib.s3.index import S3Bucket
+from src.models.image import Images
+from src.workers.embeddings import (
+    claim_outbox_entries,
+    pending_entry,
+    retry_outbox_entries,
+)
+
+s3_bucket = S3Bucket(bucket_name=settings.s3_bucket_name)
+
+IMAGE_POLL_INTERVAL_SECONDS = 2
+IMAGE_BATCH_SIZE = 8
+IMAGE_MAX_ATTEMPTS = 5
+# variants are content addressed, so they never change once written
+DERIVATIVE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def image_pool() -> ProcessPoolExecutor:
+    """
+    The process pool images are resized in, started on first use. Processes are
+    spawned rather than forked, the API process runs threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.image_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_image_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def enqueue_image_derivatives(keys: List[str], bucket_id: str, session=None):
+    """
+    Schedule the generation of resized variants for newly uploaded bucket images.
+
+    Args:
+        keys (List[str]): The S3 keys of the original images.
+        bucket_id (str): The ID of the bucket the images belong to.
+        session (ClientSession, optional): The session to write in, to commit the
+            entries together with the bucket write.
+    """
+    if not keys:
+        return
+    update = pending_entry()
+    Images.bulk_write(
+        [
+            UpdateOne(
+                {"key": key},
+                {**update, "$setOnInsert": {"bucketId": bucket_id, "variants": []}},
+                upsert=True,
+            )
+            for key in keys
+        ],
+        ordered=False,
+        session=session,
+    )
+
+
+def derivative_keys(images: List[Dict[str, Any]]) -> List[str]:
+    return [variant["key"] for image in images for variant in image.get("variants", [])]
+
+
+def unreferenced_derivative_keys(keys: List[str]) -> List[str]:
+    """
+    Keep the variant keys whose original is no longer used by any image, as
+    identical images share their variants.
+    """
+    hashes = {key.split("/")[1] for key in keys}
+    used = set(Images.distinct("hash", {"hash": {"$in": list(hashes)}}))
+    return [key for key in keys if key.split("/")[1] not in used]
+
+
+def download_original(image: Dict[str, Any]) -> Optional[Tuple[bytes, str, frozenset]]:
+    """
+    Fetch the original of an image and the variants already in S3.
+
+    Returns:
+        tuple: The original bytes, their hash and the existing variant keys, or
+            None when the original did not change since the last run.
+    """
+    data = s3_bucket.get_object_bytes(image["key"])
+    digest = hashlib.sha256(data).hexdigest()
+    if digest == image.get("hash") and image.get("variants"):
+        return None
+
+    existing = frozenset(s3_bucket.list_objects(prefix=f"derivatives/{digest}/"))
+    return data, digest, existing
+
+
+def store_derivatives(digest: str, rendered: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Upload the variants rendered by the process pool that are not in S3 yet.
+
+    Returns:
+        dict: The fields to set on the image document.
+    """
+    for variant in rendered["variants"]:
+        if variant["body"] is not None:
+            s3_bucket.put_object(
+                variant["key"],
+                variant.pop("body"),
+                CONTENT_TYPES[variant["format"]],
+                DERIVATIVE_CACHE_CONTROL,
+            )
+        variant.pop("body", None)
+    return {
+        "hash": digest,
+        "width": rendered["width"],
+        "height": rendered["height"],
+        "variants": rendered["variants"],
+    }
+
+
+def complete_image(image: Dict[str, Any], fields: Dict[str, Any]):
+    # an image enqueued again while it was processed stays pending
+    Images.update_one(
+        {"_id": image["_id"], "claim": image["claim"]},
+        {
+            "$set": {
+                **fields,
+                "status": "ready",
+                "claim": None,
+                "leaseUntil": None,
+                "lastError": None,
+                "updated": datetime.now(UTC),
+            }
+        },
+    )
+
+
+def fail_image(image: Dict[str, Any], error: Exception):
+    logger.error(f"Error generating variants of {image['key']}: {error}")
+    if image["attempts"] + 1 >= IMAGE_MAX_ATTEMPTS:
+        Images.update_one(
+            {"_id": image["_id"], "claim": image["claim"]},
+            {"$set": {"status": "failed", "claim": None, "lastError": str(error)}},
+        )
+    else:
+        retry_outbox_entries([image], error, Images)
+
+
+def process_image_batch(limit: int = IMAGE_BATCH_SIZE) -> int:
+    """
+    Generate the variants of one batch of pending images. Originals are
+    downloaded in parallel and every image is resized in the process pool at
+    once. Failed images are retried with exponential backoff, up to
+    IMAGE_MAX_ATTEMPTS times.
+
+    Args:
+        limit (int): The maximum number of images to process.
+
+    Returns:
+        int: The number of images claimed.
+    """
+    images = claim_outbox_entries(limit, Images)
+    if not images:
+        return 0
+
+    renders = {}
+    with ThreadPoolExecutor(max_workers=len(images)) as executor:
+        downloads = {
+            executor.submit(download_original, image): image for image in images
+        }
+        for future in as_completed(downloads):
+            image = downloads[future]
+            try:
+                original = future.result()
+                if original is None:
+                    complete_image(image, {})
+                    continue
+                render = image_pool().submit(render_derivatives, *original)
+            except Exception as e:
+                fail_image(image, e)
+                continue
+            renders[render] = (image, original[1])
+
+    for future in as_completed(renders):
+        image, digest = renders[future]
+        try:
+            fields = store_derivatives(digest, future.result())
+        except Exception as e:
+            fail_image(image, e)
+            continue
+        complete_image(image, fields)
+    return len(images)
+
+
+def drain_images() -> int:
+    """
+    Process image batches until nothing is due.
+
+    Returns:
+        int: The number of images processed.
+    """
+    processed = 0
+    while claimed := process_image_batch():
+        processed += claimed
+    return processed
+
+
+async def run_image_worker(interval: int = IMAGE_POLL_INTERVAL_SECONDS):
+    """
+    Poll for images to resize until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two polls.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(drain_images)
+        except Exception as e:
+            logger.error(f"Error generating image variants: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+from pytz import UTC
+from src.lib.logger.index import logger
+from src.models.bucket import Buckets
+from src.models.job import Jobs
+from src.utils.search import KEYWORD_INDEX_FIELDS, index_bucket, unindex_bucket
+
+KEYWORD_SYNC_INTERVAL_SECONDS = 10
+# each poll re-reads a little of the previous window so writes committed while
+# the previous poll ran are not missed, re-indexing a bucket is idempotent
+KEYWORD_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def sync_keyword_index(since=None) -> datetime:
+    """
+    Index buckets written and unindex buckets deleted since the given time, by any
+    worker. Writes made by this worker are already indexed by the routes.
+
+    Args:
+        since (datetime, optional): The start of the window, None to load every bucket.
+
+    Returns:
+        datetime: The start of the next window.
+    """
+    started = datetime.now(UTC)
+    query = {"updated": {"$gte": since}} if since else {}
+    indexed = 0
+    for bucket in Buckets.find(query, KEYWORD_INDEX_FIELDS):
+        index_bucket(bucket)
+        indexed += 1
+
+    if since:
+        deletions = Jobs.find(
+            {"type": "delete_bucket", "created": {"$gte": since}},
+            {"_id": 0, "payload.bucketId": 1},
+        )
+        for job in deletions:
+            unindex_bucket(job["payload"]["bucketId"])
+    else:
+        logger.info(f"Loaded {indexed} buckets into the keyword index")
+
+    return started - KEYWORD_SYNC_OVERLAP
+
+
+async def run_keyword_index_sync(interval: int = KEYWORD_SYNC_INTERVAL_SECONDS):
+    """
+    Load the keyword index, then keep it in sync until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two syncs.
+    """
+    since = None
+    while True:
+        try:
+            since = await asyncio.to_thread(sync_keyword_index, since)
+        except Exception as e:
+            logger.error(f"Error syncing the keyword index: {e}")
+        await asyncio.sleep(interval)
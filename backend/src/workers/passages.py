@@ -0,0 +1,229 @@
+import asyncio
+from typing import Any, Dict, List
+from pymongo import DeleteOne, UpdateOne
+from src.lib.logger.index import logger
+from src.lib.pinecone.index import VECTOR_STORE, generate_passage_embeddings
+from src.models.outbox import PassageOutbox
+from src.models.source import SourcePassages, Sources
+from src.service.sources import hydrate_contents
+from src.utils.passages import passage_hash, passage_id, split_passages
+from src.workers.embeddings import (
+    claim_outbox_entries,
+    pending_entry,
+    retry_outbox_entries,
+)
+
+PASSAGE_POLL_INTERVAL_SECONDS = 2
+# sources claimed per batch, their changed passages are embedded together
+PASSAGE_BATCH_SIZE = 16
+PASSAGE_NAMESPACE = "sources"
+
+PASSAGE_SOURCE_FIELDS = {
+    "_id": 0,
+    "sourceId": 1,
+    "bucketId": 1,
+    "content": 1,
+    "contentHash": 1,
+    "originSourceId": 1,
+}
+
+
+def enqueue_source_passages(sources: List[Dict[str, Any]], session=None):
+    """
+    Mark the passages of sources as out of date, after their content changed or
+    they were deleted. Repeated writes to a source coalesce into one re-index.
+
+    Args:
+        sources (List[dict]): Source documents with a sourceId and bucketId.
+        session (ClientSession, optional): The session to write in, to commit the
+            entries together with the source writes.
+    """
+    if not sources:
+        return
+    update = pending_entry()
+    requests = [
+        UpdateOne(
+            {"sourceId": source["sourceId"]},
+            {**update, "$setOnInsert": {"bucketId": source["bucketId"]}},
+            upsert=True,
+        )
+        for source in sources
+    ]
+    for start in range(0, len(requests), 1000):
+        PassageOutbox.bulk_write(
+            requests[start : start + 1000], ordered=False, session=session
+        )
+
+
+def enqueue_all_source_passages() -> int:
+    """
+    Forget every indexed passage and mark every source with content as out of
+    date, to fill a vector store that does not persist its vectors across restarts.
+
+    Returns:
+        int: The number of sources enqueued.
+    """
+    SourcePassages.delete_many({})
+    sources = list(
+        Sources.find(
+            {"$or": [{"content": {"$ne": None}}, {"contentHash": {"$ne": None}}]},
+            {"_id": 0, "sourceId": 1, "bucketId": 1},
+        )
+    )
+    enqueue_source_passages(sources)
+    return len(sources)
+
+
+def index_passages(entries: List[Dict[str, Any]]):
+    """
+    Bring the passages of the sources of claimed entries up to date.
+
+    Only passages whose hash differs from the one indexed at the same position
+    are embedded, all of them in one call. A fork reuses the vector of its origin
+    source's passage when their hashes match, and the passages past the new end
+    of a source, or of a deleted source, are removed.
+    """
+    source_ids = [entry["sourceId"] for entry in entries]
+    sources = {
+        source["sourceId"]: source
+        for source in hydrate_contents(
+            list(Sources.find({"sourceId": {"$in": source_ids}}, PASSAGE_SOURCE_FIELDS))
+        )
+    }
+    origin_ids = [
+        source["originSourceId"]
+        for source in sources.values()
+        if source.get("originSourceId")
+    ]
+    indexed = {
+        passages["sourceId"]: passages["hashes"]
+        for passages in SourcePassages.find(
+            {"sourceId": {"$in": source_ids + origin_ids}},
+            {"_id": 0, "sourceId": 1, "hashes": 1},
+        )
+    }
+
+    to_embed = []  # (vector id, passage, metadata)
+    to_copy = []  # (origin vector id, vector id, passage, metadata)
+    stale = []
+    writes = []
+    for entry in entries:
+        source_id = entry["sourceId"]
+        previous = indexed.get(source_id, [])
+        source = sources.get(source_id)
+        if source is None:
+            stale += [passage_id(source_id, i) for i in range(len(previous))]
+            writes.append(DeleteOne({"sourceId": source_id}))
+            continue
+
+        passages = split_passages(source.get("content") or "")
+        hashes = [passage_hash(passage) for passage in passages]
+        origin_id = source.get("originSourceId")
+        origin = indexed.get(origin_id, [])
+        for i, (passage, digest) in enumerate(zip(passages, hashes)):
+            if i < len(previous) and previous[i] == digest:
+                continue
+            metadata = {
+                "bucketId": source["bucketId"],
+                "sourceId": source_id,
+                "passage": i,
+                "text": passage,
+            }
+            if i < len(origin) and origin[i] == digest:
+                to_copy.append(
+                    (
+                        passage_id(origin_id, i),
+                        passage_id(source_id, i),
+                        passage,
+                        metadata,
+                    )
+                )
+            else:
+                to_embed.append((passage_id(source_id, i), passage, metadata))
+        stale += [passage_id(source_id, i) for i in range(len(hashes), len(previous))]
+        writes.append(
+            UpdateOne(
+                {"sourceId": source_id},
+                {"$set": {"bucketId": source["bucketId"], "hashes": hashes}},
+                upsert=True,
+            )
+        )
+
+    vectors = []
+    if to_copy:
+        copied = VECTOR_STORE.fetch([item[0] for item in to_copy], PASSAGE_NAMESPACE)
+        for origin_vector_id, vector_id, passage, metadata in to_copy:
+            if origin_vector_id in copied:
+                vectors.append(
+                    (vector_id, copied[origin_vector_id]["values"], metadata)
+                )
+            else:
+                to_embed.append((vector_id, passage, metadata))
+    if to_embed:
+        values = generate_passage_embeddings([item[1] for item in to_embed])
+        vectors += [
+            (vector_id, vector, metadata)
+            for (vector_id, _, metadata), vector in zip(to_embed, values)
+        ]
+
+    VECTOR_STORE.upsert(vectors, PASSAGE_NAMESPACE)
+    if stale:
+        VECTOR_STORE.delete(stale, PASSAGE_NAMESPACE)
+    if writes:
+        SourcePassages.bulk_write(writes, ordered=False)
+
+
+def process_passage_batch(limit: int = PASSAGE_BATCH_SIZE) -> int:
+    """
+    Re-index the passages of one batch of passage outbox entries. An entry is only
+    removed if it was not enqueued again while the batch ran; failed entries are
+    retried with exponential backoff.
+
+    Args:
+        limit (int): The maximum number of entries to process.
+
+    Returns:
+        int: The number of entries claimed.
+    """
+    entries = claim_outbox_entries(limit, PassageOutbox)
+    if not entries:
+        return 0
+
+    try:
+        index_passages(entries)
+    except Exception as e:
+        logger.error(f"Error indexing the passages of {len(entries)} sources: {e}")
+        retry_outbox_entries(entries, e, PassageOutbox)
+        return len(entries)
+
+    for entry in entries:
+        PassageOutbox.delete_one({"_id": entry["_id"], "claim": entry["claim"]})
+    return len(entries)
+
+
+def drain_passage_outbox() -> int:
+    """
+    Process passage outbox batches until nothing is due.
+
+    Returns:
+        int: The number of entries processed.
+    """
+    processed = 0
+    while claimed := process_passage_batch():
+        processed += claimed
+    return processed
+
+
+async def run_passage_worker(interval: int = PASSAGE_POLL_INTERVAL_SECONDS):
+    """
+    Poll the passage outbox until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two polls.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(drain_passage_outbox)
+        except Exception as e:
+            logger.error(f"Error draining passage outbox: {e}")
+        await asyncio.sleep(interval)
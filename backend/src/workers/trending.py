@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+from pytz import UTC
+from src.models.bucket import Buckets
+from src.lib.logger.index import logger
+
+# "hot" ranking: a 10x increase in likes is worth TRENDING_DECAY_SECONDS of recency.
+# the score only depends on likesCount and created, so it is stable over time and
+# a bucket only needs rescoring when its likes change
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=UTC)
+TRENDING_DECAY_SECONDS = 45000
+TRENDING_REFRESH_INTERVAL_SECONDS = 60
+
+
+def refresh_trending_scores() -> int:
+    """
+    Recompute the trending score of every bucket flagged by a like or unlike since
+    the last run. The whole batch is scored server-side in a single update.
+
+    Returns:
+        int: The number of buckets rescored.
+    """
+    result = Buckets.update_many(
+        {"trendingStale": True},
+        [
+            {
+                "$set": {
+                    "trendingScore": {
+                        "$add": [
+                            {"$log10": {"$max": [{"$ifNull": ["$likesCount", 0]}, 1]}},
+                            {
+                                "$divide": [
+                                    {
+                                        "$subtract": [
+                                            {"$ifNull": ["$created", TRENDING_EPOCH]},
+                                            TRENDING_EPOCH,
+                                        ]
+                                    },
+                                    TRENDING_DECAY_SECONDS * 1000,
+                                ]
+                            },
+                        ]
+                    }
+                }
+            },
+            {"$unset": "trendingStale"},
+        ],
+    )
+    return result.modified_count
+
+
+async def run_trending_job(interval: int = TRENDING_REFRESH_INTERVAL_SECONDS):
+    """
+    Periodically rescore stale buckets until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two refreshes.
+    """
+    while True:
+        try:
+            rescored = await asyncio.to_thread(refresh_trending_scores)
+            if rescored:
+                logger.info(f"Rescored {rescored} trending buckets")
+        except Exception as e:
+            logger.error(f"Error refreshing trending scores: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+from botocore.exceptions import ClientError
+from pytz import UTC
+from src.core.config import settings
+from src.lib.logger.index import logger
+from src.lib.s3.index import S3Bucket
+from src.models.upload import UploadSessions
+
+s3_bucket = S3Bucket(bucket_name=settings.s3_bucket_name)
+
+UPLOAD_SWEEP_INTERVAL_SECONDS = 300
+# pending uploads are aborted this long before the TTL index drops their session,
+# leaving the sweep a few passes to get through to S3
+UPLOAD_ABORT_LEAD = timedelta(hours=1)
+
+
+def abort_expired_uploads() -> int:
+    """
+    Abort the S3 multipart uploads of pending sessions about to expire, so their
+    parts are freed before the session holding the S3 upload ID is deleted.
+
+    A session is only marked aborted once S3 confirmed, a failed abort is retried
+    on the next pass.
+
+    Returns:
+        int: The number of uploads aborted.
+    """
+    deadline = datetime.now(UTC) + UPLOAD_ABORT_LEAD
+    aborted = 0
+    for session in UploadSessions.find(
+        {"status": "pending", "expires": {"$lte": deadline}},
+        {"_id": 0, "uploadId": 1, "key": 1, "s3UploadId": 1},
+    ):
+        try:
+            s3_bucket.abort_multipart_upload(session["key"], session["s3UploadId"])
+        except ClientError as e:
+            # already completed or aborted in S3
+            if e.response["Error"]["Code"] != "NoSuchUpload":
+                logger.error(f"Error aborting upload {session['uploadId']}: {e}")
+                continue
+        result = UploadSessions.update_one(
+            {"uploadId": session["uploadId"], "status": "pending"},
+            {"$set": {"status": "aborted"}},
+        )
+        aborted += result.modified_count
+    return aborted
+
+
+async def run_upload_sweeper(interval: int = UPLOAD_SWEEP_INTERVAL_SECONDS):
+    """
+    Periodically abort expiring uploads until cancelled.
+
+    Args:
+        interval (int): The number of seconds between two sweeps.
+    """
+    while True:
+        try:
+            aborted = await asyncio.to_thread(abort_expired_uploads)
+            if aborted:
+                logger.info(f"Aborted {aborted} expired uploads")
+        except Exception as e:
+            logger.error(f"Error aborting expired uploads: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,73 @@
+import threading
+import time
+from src.utils.batching import BufferedWriter
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+
+def test_flushes_full_batches_and_on_stop():
+    collection = RecordingCollection()
+    writer = BufferedWriter(collection, batch_size=3, flush_interval=60)
+    writer.start()
+    for i in range(4):
+        writer.add({"i": i})
+
+    deadline = time.monotonic() + 5
+    while not collection.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert collection.batches == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+
+    writer.stop()
+    assert collection.batches[-1] == [{"i": 3}]
+    assert writer.stats()["written"] == 4
+
+
+def test_drops_when_full():
+    writer = BufferedWriter(RecordingCollection(), maxsize=2)
+    assert writer.add({}) and writer.add({})
+    assert not writer.add({})
+    assert writer.stats()["dropped"] == 1
+
+
+class FailingCollection(RecordingCollection):
+    def insert_many(self, documents, ordered=True):
+        documents = list(documents)
+        if any(document.get("bad") for document in documents):
+            raise ValueError("cannot encode object")
+        super().insert_many(documents, ordered)
+
+
+def test_keeps_writing_after_a_failed_batch():
+    collection = FailingCollection()
+    writer = BufferedWriter(collection, batch_size=1, flush_interval=60)
+    writer.start()
+    writer.add({"bad": True})
+    writer.add({"i": 1})
+
+    deadline = time.monotonic() + 5
+    while not collection.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.stop()
+    assert collection.batches == [[{"i": 1}]]
+    assert writer.stats()["failed"] == 1
+
+
+def test_stop_does_not_block_on_a_full_buffer():
+    collection = RecordingCollection()
+    writer = BufferedWriter(collection, maxsize=1)
+    stuck = threading.Event()
+    writer._thread = threading.Thread(target=stuck.wait, daemon=True)
+    writer._thread.start()
+    writer.add({"i": 0})
+
+    started = time.monotonic()
+    writer.stop(timeout=0.1)
+    stuck.set()
+    assert time.monotonic() - started < 2
+    assert collection.batches == [[{"i": 0}]]
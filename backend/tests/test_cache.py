@@ -0,0 +1,48 @@
+from src.utils.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_pop():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+
+def test_lru_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.utils.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_tracks_bytes():
+    cache = LRUCache(maxsize=2, sizeof=len)
+    cache.set("a", "xx")
+    cache.set("b", "yyy")
+    cache.set("a", "z")
+    assert cache.stats()["bytes"] == 4
+
+    cache.set("c", "wwww")  # evicts "b"
+    assert cache.bytes == 5
+    cache.pop("a")
+    assert cache.bytes == 4
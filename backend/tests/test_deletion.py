@@ -0,0 +1,51 @@
+import os
+
+# the deletion worker imports the configured vector store, keep it in process
+os.environ.setdefault("VECTOR_STORE", "memory")
+
+import mongomock
+import pytest
+import src.workers.deletion as deletion
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock.MongoClient().db
+    monkeypatch.setattr(deletion, "Buckets", database.buckets)
+    monkeypatch.setattr(deletion, "Jobs", database.jobs)
+    monkeypatch.setattr(deletion, "run_in_transaction", lambda write: write(None))
+    return database
+
+
+def test_enqueue_bucket_deletion_of_bucket_without_images(db):
+    # forked buckets have no imageKeys field
+    db.buckets.insert_one({"bucketId": "b1", "userId": "u1"})
+
+    job_id = deletion.enqueue_bucket_deletion("b1", "u1")
+
+    assert job_id is not None
+    assert db.buckets.count_documents({}) == 0
+    job = db.jobs.find_one({"jobId": job_id})
+    assert job["payload"]["imageKeys"] == []
+    assert deletion.enqueue_bucket_deletion("b1", "u1") is None
+
+
+def test_failing_deletion_job_does_not_block_the_next(db, monkeypatch):
+    for bucket_id in ("b1", "b2"):
+        db.buckets.insert_one({"bucketId": bucket_id, "userId": "u1"})
+        deletion.enqueue_bucket_deletion(bucket_id, "u1")
+    ran = []
+
+    def run(job):
+        ran.append(job["payload"]["bucketId"])
+        if job["payload"]["bucketId"] == "b1":
+            raise RuntimeError("S3 unavailable")
+        db.jobs.update_one({"jobId": job["jobId"]}, {"$set": {"status": "done"}})
+
+    monkeypatch.setattr(deletion, "run_bucket_deletion", run)
+
+    assert deletion.process_deletion_jobs() == 2
+    assert ran == ["b1", "b2"]
+    failed = db.jobs.find_one({"payload.bucketId": "b1"})
+    assert failed["status"] == "pending"
+    assert failed["lastError"] == "S3 unavailable"
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.lib.embeddings.batching import BatchingEmbedder
+from src.lib.embeddings.index import Embedder
+
+
+class LengthEmbedder(Embedder):
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def embed(self, inputs, input_type):
+        with self.lock:
+            self.calls.append((list(inputs), input_type))
+        return [
+            [float(len(text)), 1.0 if input_type == "query" else 0.0] for text in inputs
+        ]
+
+
+def test_concurrent_calls_are_coalesced():
+    backend = LengthEmbedder()
+    embedder = BatchingEmbedder(backend, max_batch_size=64, max_wait=0.05)
+    texts = ["x" * i for i in range(1, 41)]
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        results = list(pool.map(lambda text: embedder.embed([text], "query"), texts))
+
+    assert [result[0][0] for result in results] == [float(len(text)) for text in texts]
+    assert len(backend.calls) < len(texts)
+    assert all(input_type == "query" for _, input_type in backend.calls)
+
+
+def test_large_calls_are_split_into_batches():
+    backend = LengthEmbedder()
+    embedder = BatchingEmbedder(backend, max_batch_size=4, max_wait=0.001)
+    texts = ["x" * i for i in range(1, 11)]
+    results = embedder.embed(texts, "passage")
+
+    assert [result[0] for result in results] == [float(len(text)) for text in texts]
+    assert all(len(inputs) <= 4 for inputs, _ in backend.calls)
+    assert all(result[1] == 0.0 for result in results)
+
+
+def test_identical_inputs_in_flight_are_embedded_once():
+    backend = LengthEmbedder()
+    embedder = BatchingEmbedder(backend, max_batch_size=64, max_wait=0.05)
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(lambda _: embedder.embed(["same"], "query"), range(10)))
+
+    assert all(result == [[4.0, 1.0]] for result in results)
+    assert sum(len(inputs) for inputs, _ in backend.calls) < 10
+    assert embedder.stats()["deduplicated"] > 0
@@ -0,0 +1,74 @@
+import numpy as np
+from src.lib.vectorstore.hnsw import HNSWVectorStore
+
+
+def random_vectors(count, dimension=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dimension))
+
+
+def test_incremental_inserts_deletes_and_reload(tmp_path):
+    vectors = random_vectors(200)
+    store = HNSWVectorStore(str(tmp_path))
+    store.upsert(
+        [
+            (f"b{i}", vector, {"visibility": "Public" if i % 2 else "Private"})
+            for i, vector in enumerate(vectors)
+        ],
+        "buckets",
+    )
+    assert store.query(vectors[7], 1, "buckets")[0]["id"] == "b7"
+
+    store.delete(["b7"], "buckets")
+    assert "b7" not in [match["id"] for match in store.query(vectors[7], 5, "buckets")]
+
+    matches = store.query(vectors[3], 5, "buckets", {"visibility": {"$eq": "Public"}})
+    assert matches[0]["id"] == "b3"
+    assert all(match["metadata"]["visibility"] == "Public" for match in matches)
+
+    # a second process on the same directory replays the log, without a checkpoint
+    reloaded = HNSWVectorStore(str(tmp_path))
+    assert reloaded.query(vectors[9], 1, "buckets")[0]["id"] == "b9"
+    assert reloaded.fetch(["b7", "b9"], "buckets").keys() == {"b9"}
+
+    # and sees later writes made by the first one
+    store.upsert([("new", vectors[7], {"visibility": "Public"})], "buckets")
+    assert reloaded.query(vectors[7], 1, "buckets")[0]["id"] == "new"
+
+    store.close()
+    checkpointed = HNSWVectorStore(str(tmp_path))
+    assert checkpointed.query(vectors[7], 1, "buckets")[0]["id"] == "new"
+    assert len(checkpointed.namespace("buckets").labels) == 200
+
+
+def test_reload_after_a_crash_during_a_checkpoint(tmp_path, monkeypatch):
+    vectors = random_vectors(20)
+    store = HNSWVectorStore(str(tmp_path))
+    store.upsert([(f"b{i}", vectors[i], {}) for i in range(10)], "buckets")
+    store.close()
+    store.upsert([(f"b{i}", vectors[i], {}) for i in range(10, 20)], "buckets")
+    store.delete(["b0"], "buckets")
+
+    # the new checkpoint is committed, the process dies before starting a new log
+    def crash():
+        raise SystemExit
+
+    space = store.namespace("buckets")
+    monkeypatch.setattr(space, "start_log", crash)
+    with space.locked():
+        try:
+            space.save()
+        except SystemExit:
+            pass
+    monkeypatch.undo()
+
+    reloaded = HNSWVectorStore(str(tmp_path))
+    assert len(reloaded.namespace("buckets").labels) == 19
+    assert reloaded.query(vectors[15], 1, "buckets")[0]["id"] == "b15"
+
+    # writes after the crash go to a new log, on top of the checkpoint
+    reloaded.upsert([("new", vectors[0], {})], "buckets")
+    assert HNSWVectorStore(str(tmp_path)).fetch(["new", "b0"], "buckets").keys() == {
+        "new"
+    }
+    reloaded.close()
+    assert [path.name for path in tmp_path.glob("*.hnsw")] == ["buckets.3.hnsw"]
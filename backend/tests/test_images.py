@@ -0,0 +1,89 @@
+import os
+
+# the image worker imports the configured vector store, keep it in process
+os.environ.setdefault("VECTOR_STORE", "memory")
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import mongomock
+from PIL import Image
+from pytz import UTC
+import src.workers.images as images
+from src.lib.images.index import derivative_key, pick_variant, render_derivatives
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_render_derivatives_resizes_without_upscaling():
+    rendered = render_derivatives(png(1000, 500), "abc")
+    assert (rendered["width"], rendered["height"]) == (1000, 500)
+
+    webp = [v for v in rendered["variants"] if v["format"] == "webp"]
+    assert [(v["width"], v["height"]) for v in webp] == [
+        (320, 160),
+        (640, 320),
+        (1000, 500),
+    ]
+    assert webp[0]["key"] == "derivatives/abc/320.webp"
+    assert Image.open(io.BytesIO(webp[0]["body"])).format == "WEBP"
+
+
+def test_render_derivatives_skips_existing_variants():
+    existing = frozenset({derivative_key("abc", 200, "webp")})
+    rendered = render_derivatives(png(200, 100), "abc", existing)
+    webp = [v for v in rendered["variants"] if v["format"] == "webp"]
+    assert [(v["width"], v["body"]) for v in webp] == [(200, None)]
+
+
+def test_pick_variant_prefers_smallest_wide_enough():
+    variants = [
+        {"width": width, "format": "webp", "key": str(width)}
+        for width in (320, 640, 1000)
+    ]
+    assert pick_variant(variants, 500)["width"] == 640
+    assert pick_variant(variants, 2000)["width"] == 1000
+    assert pick_variant(variants, 500, "avif") is None
+
+
+class FakeBucket:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object_bytes(self, key):
+        return self.objects[key]
+
+    def list_objects(self, prefix):
+        return [key for key in self.objects if key.startswith(prefix)]
+
+    def put_object(self, key, body, content_type, cache_control):
+        self.objects[key] = body
+
+
+def test_process_image_batch_renders_every_image(monkeypatch):
+    database = mongomock.MongoClient().db
+    bucket = FakeBucket({"a.png": png(400, 200), "b.png": png(100, 100)})
+    executor = ThreadPoolExecutor()
+    monkeypatch.setattr(images, "Images", database.images)
+    monkeypatch.setattr(images, "s3_bucket", bucket)
+    monkeypatch.setattr(images, "image_pool", lambda: executor)
+    due = datetime.now(UTC) - timedelta(seconds=1)
+    for key in ("a.png", "b.png", "missing.png"):
+        database.images.insert_one(
+            {"key": key, "status": "pending", "attempts": 0, "nextAttempt": due}
+        )
+
+    assert images.process_image_batch() == 3
+
+    by_key = {image["key"]: image for image in database.images.find()}
+    assert by_key["a.png"]["status"] == "ready"
+    assert (by_key["a.png"]["width"], by_key["a.png"]["height"]) == (400, 200)
+    assert by_key["b.png"]["status"] == "ready"
+    assert by_key["missing.png"]["status"] == "pending"
+    assert by_key["missing.png"]["attempts"] == 1
+    for variant in by_key["a.png"]["variants"]:
+        assert variant["key"] in bucket.objects
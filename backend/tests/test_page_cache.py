@@ -0,0 +1,58 @@
+import mongomock
+import pytest
+import src.service.webpages as webpages
+
+HTML = b"<html><body><p>A page without any title markup.</p></body></html>"
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    collection = mongomock.MongoClient().db.pages
+    monkeypatch.setattr(webpages, "Pages", collection)
+    monkeypatch.setattr(
+        webpages,
+        "share_contents",
+        lambda items: {item["sourceId"]: hash(item["content"]) for item in items},
+    )
+    monkeypatch.setattr(
+        webpages,
+        "fetch_webpage",
+        lambda url, headers=None: {
+            "url": url,
+            "status": 200,
+            "html": HTML,
+            "encoding": None,
+            "etag": None,
+            "lastModified": None,
+        },
+    )
+    return collection
+
+
+def test_failed_title_extraction_is_not_cached(pages, monkeypatch):
+    monkeypatch.setattr(webpages, "process_html", lambda text: None)
+
+    page = webpages.load_webpage("https://example.org/post")
+
+    assert page["title"] == "https://example.org/post"
+    assert pages.count_documents({}) == 0
+
+    monkeypatch.setattr(webpages, "process_html", lambda text: "A page - Example")
+    page = webpages.load_webpage("https://example.org/post")
+
+    assert page["title"] == "A page - Example"
+    assert pages.find_one()["title"] == "A page - Example"
+
+
+def test_pages_left_untitled_by_a_bulk_import_are_not_cached(pages, monkeypatch):
+    monkeypatch.setattr(
+        webpages, "process_html_many", lambda texts: [None, "Second - Example"]
+    )
+
+    first, second = webpages.load_webpages(
+        ["https://example.org/1", "https://example.org/2"]
+    )
+
+    assert first["title"] == "https://example.org/1"
+    assert second["title"] == "Second - Example"
+    assert [page["url"] for page in pages.find()] == ["https://example.org/2"]
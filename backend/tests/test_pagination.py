@@ -0,0 +1,33 @@
+import pytest
+from datetime import datetime
+from fastapi import HTTPException
+from src.utils.pagination import encode_cursor, decode_cursor, build_keyset_filter
+
+
+def test_cursor_round_trip():
+    updated = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor([updated, "bucket-1"], "prev")
+
+    values, direction = decode_cursor(cursor)
+    assert values[0].replace(tzinfo=None) == updated
+    assert values[1] == "bucket-1"
+    assert direction == "prev"
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("not-a-cursor")
+    assert e.value.status_code == 400
+
+
+def test_keyset_filter_breaks_ties():
+    keyset = build_keyset_filter(("updated", "bucketId"), [5, "b"], descending=True)
+    assert keyset == {
+        "$or": [
+            {"updated": {"$lt": 5}},
+            {"updated": 5, "bucketId": {"$lt": "b"}},
+        ]
+    }
+
+    keyset = build_keyset_filter(("updated", "bucketId"), [5, "b"], descending=False)
+    assert keyset["$or"][1]["bucketId"] == {"$gt": "b"}
@@ -0,0 +1,31 @@
+from src.utils.passages import passage_hash, split_passages
+
+
+def words(count, start=0):
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def test_split_passages_overlaps_consecutive_passages():
+    passages = split_passages(words(400), size=200, overlap=40)
+    assert [len(passage.split()) for passage in passages] == [200, 200, 80]
+    assert passages[1].split()[:40] == passages[0].split()[-40:]
+    assert passages[-1].split()[-1] == "w399"
+
+
+def test_split_passages_short_and_blank_text():
+    assert split_passages("") == []
+    assert split_passages("  \n ") == []
+    assert split_passages(words(150), size=200, overlap=40) == [words(150)]
+    assert split_passages(words(200), size=200, overlap=40) == [words(200)]
+
+
+def test_edit_only_changes_hashes_of_touched_passages():
+    before = split_passages(words(600), size=200, overlap=40)
+    after = split_passages(words(560) + " edited" + words(39, 561), 200, 40)
+    changed = [
+        i
+        for i, (old, new) in enumerate(zip(before, after))
+        if passage_hash(old) != passage_hash(new)
+    ]
+    assert len(before) == len(after)
+    assert changed == [3]
@@ -0,0 +1,46 @@
+from src.utils.ranking import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def build_index():
+    index = BM25Index()
+    index.upsert("a", tokenize("rust async runtime"), {"visibility": "Public"})
+    index.upsert("b", tokenize("python async tutorial"), {"visibility": "Private"})
+    index.upsert("c", tokenize("gardening notes"), {"visibility": "Public"})
+    return index
+
+
+def test_bm25_ranks_matching_documents():
+    index = build_index()
+    results = index.search("rust async")
+    assert [doc_id for doc_id, _ in results] == ["a", "b"]
+    assert results[0][1] > results[1][1]
+
+
+def test_bm25_filter_and_remove():
+    index = build_index()
+    results = index.search("async", filter={"visibility": {"$eq": "Public"}})
+    assert [doc_id for doc_id, _ in results] == ["a"]
+
+    index.remove("a")
+    assert len(index) == 2
+    assert index.search("rust") == []
+
+    index.upsert("b", tokenize("rust book"), {"visibility": "Public"})
+    assert [doc_id for doc_id, _ in index.search("rust")] == ["b"]
+    assert index.search("python") == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c"}
+
+
+def test_generation_only_changes_with_content():
+    index = build_index()
+    generation = index.generation
+    index.upsert("a", tokenize("rust async runtime"), {"visibility": "Public"})
+    assert index.generation == generation
+
+    index.upsert("a", tokenize("rust runtime"), {"visibility": "Public"})
+    assert index.generation > generation
@@ -0,0 +1,39 @@
+import io
+import pytest
+from botocore.stub import ANY, Stubber
+from src.lib.s3.index import S3Bucket
+
+
+@pytest.fixture
+def stubbed_bucket(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    bucket = S3Bucket(bucket_name="test-bucket")
+    with Stubber(bucket.s3.meta.client) as stubber:
+        yield bucket, stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_upload_fileobjs_returns_sizes_of_single_part_uploads(stubbed_bucket):
+    bucket, stubber = stubbed_bucket
+    # the files are uploaded in parallel, in any order
+    for _ in range(2):
+        stubber.add_response(
+            "put_object",
+            {"ETag": '"etag"'},
+            {
+                "Bucket": "test-bucket",
+                "Key": ANY,
+                "Body": ANY,
+                "ContentType": "text/plain",
+                "ChecksumAlgorithm": ANY,
+            },
+        )
+    first, second = io.BytesIO(b"first"), io.BytesIO(b"second file")
+
+    sizes = bucket.upload_fileobjs(
+        [(first, "stream-1.txt", "text/plain"), (second, "stream-2.txt", "text/plain")]
+    )
+
+    assert sizes == [5, 11]
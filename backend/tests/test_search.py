@@ -0,0 +1,100 @@
+import os
+
+# search imports the configured vector store, keep it in process
+os.environ.setdefault("VECTOR_STORE", "memory")
+
+from datetime import datetime
+import mongomock
+import pytest
+import src.utils.search as search
+from src.utils.ranking import BM25Index
+
+
+@pytest.fixture
+def buckets(monkeypatch):
+    collection = mongomock.MongoClient().db.buckets
+    monkeypatch.setattr(search, "Buckets", collection)
+    monkeypatch.setattr(search, "BUCKET_KEYWORD_INDEX", BM25Index())
+    for bucket_id, name in (("a", "rust async runtime"), ("b", "python async")):
+        bucket = {
+            "bucketId": bucket_id,
+            "name": name,
+            "visibility": "Public",
+            "likes": ["u1"],
+            "iterations": [],
+            "imageKeys": [],
+            "trendingScore": 1.5,
+            "created": datetime(2024, 1, 1),
+            "updated": datetime(2024, 1, 2),
+        }
+        collection.insert_one(dict(bucket))
+        search.index_bucket(bucket)
+    return collection
+
+
+def test_keyword_hits_are_complete_bucket_cards(buckets):
+    buckets.delete_many({})  # read from the keyword index, not mongo
+    results = search.run_keyword_search("rust async", 10, None)
+
+    assert [result["id"] for result in results] == ["a", "b"]
+    assert results[0]["likes"] == ["u1"]
+    assert results[0]["iterations"] == [] and results[0]["imageKeys"] == []
+    assert results[0]["created"] == "2024-01-01 00:00:00"
+    assert "trendingScore" not in results[0]
+
+
+def test_keyword_hits_missing_from_the_index_are_read_from_mongo(buckets, monkeypatch):
+    index = search.BUCKET_KEYWORD_INDEX
+    monkeypatch.setattr(index, "get", lambda doc_id: {} if doc_id == "a" else None)
+    buckets.update_one({"bucketId": "b"}, {"$set": {"likes": ["u3"]}})
+
+    results = search.get_keyword_results(["a", "b", "gone"])
+
+    assert results["a"] == {}
+    assert results["b"]["likes"] == ["u3"] and results["b"]["id"] == "b"
+    assert "gone" not in results
+
+
+def test_hybrid_search_falls_back_to_complete_keyword_hits(buckets, monkeypatch):
+    def failing_semantic_search(query, limit, filter):
+        raise RuntimeError("vector store down")
+
+    monkeypatch.setattr(search, "run_semantic_search", failing_semantic_search)
+
+    results, degraded = search.run_hybrid_search("rust async", 10, None)
+
+    assert degraded
+    assert [result["id"] for result in results] == ["a", "b"]
+    assert all("likes" in result for result in results)
+
+
+def test_hybrid_search_only_reads_keyword_only_hits(buckets, monkeypatch):
+    semantic = {"id": "b", "bucketId": "b", "likes": ["u2"]}
+    monkeypatch.setattr(search, "run_semantic_search", lambda *args: [semantic])
+
+    results, degraded = search.run_hybrid_search("rust", 10, None)
+
+    assert not degraded
+    assert {result["id"] for result in results} == {"a", "b"}
+    assert next(result for result in results if result["id"] == "b") is semantic
+    assert next(result for result in results if result["id"] == "a")["likes"] == ["u1"]
+
+
+def test_degraded_hybrid_results_are_not_cached(buckets, monkeypatch):
+    calls = []
+
+    def semantic_search(query, limit, filter):
+        calls.append(query)
+        if len(calls) == 1:
+            raise RuntimeError("vector store down")
+        return []
+
+    monkeypatch.setattr(search, "run_semantic_search", semantic_search)
+    monkeypatch.setattr(search, "get_search_epoch", lambda: 0)
+    monkeypatch.setattr(search, "SEARCH_RESULT_CACHE", search.LRUCache(16))
+
+    search.run_search("hybrid", "rust", 10, None)
+    search.run_search("hybrid", "rust", 10, None)
+    search.run_search("hybrid", "rust", 10, None)
+
+    assert len(calls) == 2
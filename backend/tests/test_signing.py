@@ -0,0 +1,29 @@
+from src.lib.s3.signing import URLSigner
+
+
+class CountingS3Client:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://s3/{Params['Bucket']}/{Params['Key']}?n={self.calls}"
+
+
+def test_signed_urls_are_cached_per_key():
+    client = CountingS3Client()
+    signer = URLSigner(client, "files", cloudfront_domain="cdn.example.com")
+
+    first = signer.sign_many(["a.pdf", "b.pdf"], "application/pdf")
+    again = signer.sign_many(["a.pdf", "b.pdf", "c.pdf"], "application/pdf")
+
+    assert client.calls == 3
+    assert again["a.pdf"] == first["a.pdf"]
+    assert again["c.pdf"].startswith("https://s3/files/c.pdf")
+
+
+def test_public_url_without_cloudfront_key_is_unsigned():
+    client = CountingS3Client()
+    signer = URLSigner(client, "files", cloudfront_domain="cdn.example.com")
+    assert signer.public_url("img/a.png") == "https://cdn.example.com/img/a.png"
+    assert client.calls == 0
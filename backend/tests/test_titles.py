@@ -0,0 +1,110 @@
+import json
+from types import SimpleNamespace
+import src.agents.structure_html_agent as agent
+from src.agents.structure_html_agent import title_from_metadata
+from src.utils.ratelimit import RateLimiter
+from src.utils.webpages import parse_html
+
+URL = "https://www.example.org/posts/1"
+
+
+def title(html: str, url: str = URL):
+    return title_from_metadata(parse_html(html.encode("utf-8")), url)
+
+
+def test_open_graph_title_and_site_name():
+    html = """<head><title>ignored</title>
+    <meta property="og:title" content="Cooking rice">
+    <meta property="og:site_name" content="Food52"></head>"""
+    assert title(html) == "Cooking rice - Food52"
+
+
+def test_site_suffix_of_title_element():
+    assert (
+        title("<title>Cooking rice | Food Blog</title>") == "Cooking rice - Food Blog"
+    )
+    assert title("<title>A - B - Food Blog</title>") == "A - B - Food Blog"
+    assert title("<title>Food Blog: cooking rice</title>") == (
+        "Food Blog: cooking rice - example.org"
+    )
+
+
+def test_json_ld_headline_and_single_heading():
+    html = """<script type="application/ld+json">
+    {"@graph": [{"@type": "Article", "headline": "Rice, explained"}]}</script>"""
+    assert title(html) == "Rice, explained - example.org"
+    assert title("<h1>Rice</h1><p>text</p>") == "Rice - example.org"
+
+
+def test_no_usable_title_falls_back_to_the_llm():
+    assert title("<h1>One</h1><h1>Two</h1>") is None
+    assert title("<title>Home</title>") is None
+    assert title("<p>just text</p>") is None
+
+
+class FakeCompletions:
+    """
+    Answers batch prompts with JSON titles for every page but the ones listed in
+    skip, and single page prompts with a plain title.
+    """
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.calls = []
+
+    def create(self, messages, response_format=None, **kwargs):
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt)
+        if response_format:
+            pages = prompt.split("Pages:\n", 1)[1].split("\n\n")
+            content = json.dumps(
+                {
+                    page.split("]")[0][1:]: page.split("\n", 1)[1].upper()
+                    for page in pages
+                    if page.split("\n", 1)[1] not in self.skip
+                }
+            )
+        else:
+            content = "single " + prompt.rsplit("\n", 1)[1]
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def fake_client(monkeypatch, completions):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(agent, "CLIENT", client)
+    monkeypatch.setattr(agent, "TITLE_RATE_LIMITER", RateLimiter(1000))
+
+
+def test_process_html_many_batches_pages(monkeypatch):
+    completions = FakeCompletions()
+    fake_client(monkeypatch, completions)
+    texts = [f"page{i}" for i in range(25)]
+
+    titles = agent.process_html_many(texts)
+
+    assert titles == [text.upper() for text in texts]
+    assert len(completions.calls) == 3
+
+
+def test_process_html_many_retries_missing_titles_one_by_one(monkeypatch):
+    completions = FakeCompletions(skip={"page3"})
+    fake_client(monkeypatch, completions)
+
+    titles = agent.process_html_many([f"page{i}" for i in range(5)])
+
+    assert titles[3] == "single page3"
+    assert titles[:3] == ["PAGE0", "PAGE1", "PAGE2"]
+    assert len(completions.calls) == 2
+
+
+def test_rate_limiter_spaces_calls(monkeypatch):
+    now, slept = [100.0], []
+    monkeypatch.setattr("src.utils.ratelimit.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("src.utils.ratelimit.time.sleep", slept.append)
+    limiter = RateLimiter(2)
+
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0.5
+    assert limiter.acquire() == 1.0
+    assert slept == [0.5, 1.0]
@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timedelta
+import mongomock
+import pytest
+from botocore.exceptions import ClientError
+from pydantic import ValidationError
+from pytz import UTC
+import src.workers.uploads as uploads
+from src.lib.s3.index import multipart_etag
+from src.models.upload import CreateUploadSession
+
+
+def test_multipart_etag_matches_s3_format():
+    # parts "abc" and "message digest", the RFC 1321 MD5 test vectors
+    etags = ['"900150983cd24fb0d6963f7d28e17f72"', '"f96b697d7cb7938d525a2f31aaf161d0"']
+    assert multipart_etag(etags) == '"dd18751f7ea93aa3d325ee90fa54f474-2"'
+
+
+def test_multipart_etag_depends_on_part_order():
+    etags = [f'"{hashlib.md5(part).hexdigest()}"' for part in (b"x", b"y")]
+    assert multipart_etag(etags) != multipart_etag(etags[::-1])
+
+
+def test_upload_session_file_type_is_restricted():
+    session = {"bucketId": "b", "filename": "a.pdf", "size": 1}
+    assert CreateUploadSession(**session).fileType == "document"
+    with pytest.raises(ValidationError):
+        CreateUploadSession(**session, fileType="../images")
+
+
+class FakeBucket:
+    def __init__(self, failing):
+        self.failing = failing
+        self.aborted = []
+
+    def abort_multipart_upload(self, key, upload_id):
+        if upload_id in self.failing:
+            code = self.failing[upload_id]
+            raise ClientError({"Error": {"Code": code}}, "AbortMultipartUpload")
+        self.aborted.append(upload_id)
+
+
+def test_abort_expired_uploads(monkeypatch):
+    sessions = mongomock.MongoClient().db.upload_sessions
+    bucket = FakeBucket({"s3-gone": "NoSuchUpload", "s3-down": "InternalError"})
+    monkeypatch.setattr(uploads, "UploadSessions", sessions)
+    monkeypatch.setattr(uploads, "s3_bucket", bucket)
+    now = datetime.now(UTC)
+    for upload_id, status, expires in (
+        ("expiring", "pending", now + timedelta(minutes=30)),
+        ("gone", "pending", now),
+        ("down", "pending", now),
+        ("fresh", "pending", now + timedelta(hours=12)),
+        ("done", "completed", now),
+    ):
+        sessions.insert_one(
+            {
+                "uploadId": upload_id,
+                "s3UploadId": f"s3-{upload_id}",
+                "key": f"documents/{upload_id}",
+                "status": status,
+                "expires": expires,
+            }
+        )
+
+    assert uploads.abort_expired_uploads() == 2
+
+    assert bucket.aborted == ["s3-expiring"]
+    statuses = {s["uploadId"]: s["status"] for s in sessions.find()}
+    assert statuses == {
+        "expiring": "aborted",
+        "gone": "aborted",
+        "down": "pending",  # retried on the next pass
+        "fresh": "pending",
+        "done": "completed",
+    }
@@ -0,0 +1,121 @@
+import threading
+import numpy as np
+from src.lib.vectorstore.memory import InMemoryVectorStore
+from src.lib.vectorstore.quantization import ScalarQuantizer
+
+
+def build_store():
+    store = InMemoryVectorStore()
+    store.upsert(
+        [
+            ("a", [1, 0, 0], {"visibility": "Public", "tags": ["ml"]}),
+            ("b", [0.9, 0.1, 0], {"visibility": "Private", "tags": ["ml", "nlp"]}),
+            ("c", [0, 1, 0], {"visibility": "Public", "tags": []}),
+        ],
+        "buckets",
+    )
+    return store
+
+
+def test_query_ranks_by_cosine_similarity():
+    store = build_store()
+    matches = store.query([1, 0, 0], 2, "buckets")
+    assert [match["id"] for match in matches] == ["a", "b"]
+    assert np.isclose(matches[0]["score"], 1.0)
+    assert store.query([1, 0, 0], 2, "articles") == []
+
+
+def test_query_with_filter():
+    store = build_store()
+    matches = store.query([1, 0, 0], 10, "buckets", {"visibility": {"$eq": "Public"}})
+    assert [match["id"] for match in matches] == ["a", "c"]
+
+    matches = store.query([1, 0, 0], 10, "buckets", {"tags": {"$in": ["nlp"]}})
+    assert [match["id"] for match in matches] == ["b"]
+
+    matches = store.query([1, 0, 0], 10, "buckets", {"visibility": {"$ne": "Public"}})
+    assert [match["id"] for match in matches] == ["b"]
+
+
+def test_update_delete_and_fetch():
+    store = build_store()
+    store.update("c", {"visibility": "Private"}, "buckets")
+    store.delete(["a", "missing"], "buckets")
+
+    assert store.count("buckets") == 2
+    matches = store.query([1, 0, 0], 10, "buckets", {"visibility": "Private"})
+    assert [match["id"] for match in matches] == ["b", "c"]
+
+    fetched = store.fetch(["a", "c"], "buckets")
+    assert list(fetched) == ["c"]
+    assert fetched["c"]["metadata"]["visibility"] == "Private"
+    assert np.allclose(fetched["c"]["values"], [0, 1, 0])
+
+
+def test_quantized_search_reranks_exactly(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.lib.vectorstore.memory.QUANTIZE_MIN_VECTORS", 100)
+    vectors = np.random.default_rng(0).normal(size=(2000, 32))
+    for quantization in ("int8", "pq"):
+        store = InMemoryVectorStore(quantization, str(tmp_path))
+        store.upsert([(str(i), vector, {}) for i, vector in enumerate(vectors)], "n")
+        store._namespaces["n"].wait_for_training()
+        matches = store.query(vectors[42], 3, "n")
+        assert matches[0]["id"] == "42"
+        assert np.isclose(matches[0]["score"], 1.0, atol=1e-5)  # exact re-ranked score
+
+        space = store._namespaces["n"]
+        assert space.codes is not None
+        assert space.nbytes < vectors.size * 4 / 3
+
+
+class BlockingQuantizer(ScalarQuantizer):
+    def __init__(self, release: threading.Event):
+        self.release = release
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def fit(self, vectors):
+        self.release.wait(5)
+        return super().fit(vectors)
+
+
+def test_quantizer_trains_outside_queries_and_writes(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.lib.vectorstore.memory.QUANTIZE_MIN_VECTORS", 100)
+    release = threading.Event()
+    monkeypatch.setattr(
+        "src.lib.vectorstore.memory.create_quantizer",
+        lambda kind: BlockingQuantizer(release),
+    )
+    vectors = np.random.default_rng(0).normal(size=(500, 16))
+    store = InMemoryVectorStore("int8", str(tmp_path))
+    store.upsert([(str(i), vector, {}) for i, vector in enumerate(vectors[:400])], "n")
+
+    # queries and writes go on, exactly scored, while the quantizer trains
+    assert store.query(vectors[7], 1, "n")[0]["id"] == "7"
+    store.upsert(
+        [(str(i), vector, {}) for i, vector in enumerate(vectors[400:], 400)], "n"
+    )
+    store.upsert([("3", vectors[499], {})], "n")
+    store.delete(["5"], "n")
+    release.set()
+    space = store._namespaces["n"]
+    space.wait_for_training()
+
+    assert space.codes is not None and space.training is None
+    expected = space.quantizer.encode(space.matrix[: space.count])
+    assert np.array_equal(space.codes[: space.count], expected)
+
+
+def test_train_runs_outside_a_scheduled_training(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.lib.vectorstore.memory.QUANTIZE_MIN_VECTORS", 100)
+    vectors = np.random.default_rng(0).normal(size=(300, 16))
+    store = InMemoryVectorStore("int8", str(tmp_path))
+    store.upsert([(str(i), vector, {}) for i, vector in enumerate(vectors)], "n")
+    space = store._namespaces["n"]
+    space.wait_for_training()
+
+    space.train()
+    assert np.array_equal(
+        space.codes[: space.count], space.quantizer.encode(space.matrix[: space.count])
+    )
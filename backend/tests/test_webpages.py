@@ -0,0 +1,46 @@
+from src.utils.webpages import (
+    canonical_url,
+    declared_charset,
+    extract_main_text,
+    normalize_text,
+    parse_html,
+)
+
+PAGE = """<html><head><title>Site</title><script>track()</script></head><body>
+<nav>Home About</nav><header>Site header</header>
+<article><p>Related</p></article>
+<article><h2>Café notes</h2><p>First part.</p><p>Second&nbsp;part.</p>
+<div aria-hidden="true">icon</div></article>
+<footer>Copyright</footer></body></html>"""
+
+
+def test_extract_main_text_keeps_only_the_main_article():
+    text = extract_main_text(parse_html(PAGE.encode("utf-8")))
+    assert text == "Café notes First part. Second part."
+
+
+def test_extract_main_text_prefers_main_element_and_caps_length():
+    html = b"<body><aside>ads</aside><main>" + b"word " * 100 + b"</main></body>"
+    assert extract_main_text(parse_html(html), max_chars=22) == "word word word word"
+
+
+def test_parse_html_handles_encodings_and_empty_bodies():
+    latin = '<meta charset="iso-8859-1"><p>Café</p>'.encode("latin-1")
+    assert extract_main_text(parse_html(latin)) == "Café"
+    assert extract_main_text(parse_html("<p>Café</p>".encode("utf-8"))) == "Café"
+    assert extract_main_text(parse_html(b"  ")) == ""
+
+
+def test_declared_charset_and_normalize_text():
+    assert declared_charset('text/html; charset="UTF-8"') == "UTF-8"
+    assert declared_charset("text/html") is None
+    assert normalize_text("ﬁne \n\t text") == "fine text"
+
+
+def test_canonical_url_maps_variants_of_a_link_to_one_key():
+    expected = "https://example.com/post?a=1&b=2"
+    assert canonical_url("HTTPS://Example.com:443/post?b=2&a=1#comments") == expected
+    assert canonical_url("https://example.com/post?a=1&utm_source=x&b=2") == expected
+    assert canonical_url("https://example.com/post?fbclid=abc&b=2&a=1") == expected
+    assert canonical_url("http://example.com") == "http://example.com/"
+    assert canonical_url("http://example.com:8080/") == "http://example.com:8080/"
@@ -10,25 +10,27 @@ import {
 export function useFetchUserBuckets(criteria?: string) {
   return useInfiniteQuery({
     queryKey: ["user", "buckets", criteria],
-    queryFn: async ({ pageParam = { page: 1, direction: "forward" } }) => {
+    queryFn: async ({ pageParam }) => {
       const response = await api.get(`/buckets/all/user`, {
         params: {
-          page: pageParam.page,
+          cursor: pageParam.cursor,
           page_size: 10,
           criteria: criteria,
         },
       });
       return {
         ...response.data,
+        page: pageParam.page,
       };
     },
-    initialPageParam: { page: 1, direction: "forward" },
-    getPreviousPageParam: (lastPage, allPages) => {
-      return lastPage.prevCursor;
+    initialPageParam: { page: 1, cursor: null as string | null },
+    getPreviousPageParam: (firstPage) => {
+      if (!firstPage.prevCursor) return undefined;
+      return { page: firstPage.page - 1, cursor: firstPage.prevCursor };
     },
     getNextPageParam: (lastPage) => {
       if (!lastPage.nextCursor) return undefined;
-      return { page: lastPage.nextCursor, direction: "forward" };
+      return { page: lastPage.page + 1, cursor: lastPage.nextCursor };
     },
   });
 }
@@ -1,13 +1,12 @@
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
-import api from "@/lib/api";
+import api, { fetchAllPages } from "@/lib/api";
 import { CreateConnection, UpdateConnection } from "@/types/connection";
 
 export const useFetchAllConnectionsForBucket = (bucketId: string) => {
   return useQuery({
     queryKey: ["connections", "all", "bucket", bucketId],
     queryFn: async () => {
-      const response = await api.get(`/connections/all/bucket/${bucketId}`);
-      return response.data.result;
+      return fetchAllPages(`/connections/all/bucket/${bucketId}`);
     },
     staleTime: 1000 * 60,
   });
@@ -1,4 +1,4 @@
-import api from "@/lib/api";
+import api, { fetchAllPages } from "@/lib/api";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 
 export const useFileUpload = (
@@ -32,8 +32,7 @@ export const useFetchSourcesForBucket = (webId: string) => {
   return useQuery({
     queryKey: ["sources", webId],
     queryFn: async () => {
-      const response = await api.get(`/sources/all/${webId}`);
-      return response.data.result;
+      return fetchAllPages(`/sources/all/${webId}`);
     },
     enabled: !!webId,
     staleTime: 60000, //1 minute stale time
@@ -34,4 +34,15 @@ api.interceptors.response.use(
   }
 );
 
+export async function fetchAllPages(url: string, limit = 500) {
+  const items: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const response = await api.get(url, { params: { limit, cursor } });
+    items.push(...response.data.result);
+    cursor = response.data.nextCursor;
+  } while (cursor);
+  return items;
+}
+
 export default api;
@@ -0,0 +1,106 @@
+"""
+Measure recall@10, memory and latency of the quantized in-memory vector store
+against exact float32 search.
+
+    python scripts/evaluate_quantization.py                   # synthetic vectors
+    python scripts/evaluate_quantization.py --vectors e5.npy  # real embeddings
+
+Queries are dataset vectors with a little noise added, the ground truth is the
+exact top 10 of the unquantized store.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.lib.vectorstore.memory import InMemoryVectorStore  # noqa: E402
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    # clustered like real embeddings, rather than uniform on the sphere
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 100, 1), dimension))
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors += 0.5 * rng.normal(size=(count, dimension))
+    return vectors.astype(np.float32)
+
+
+def build_store(vectors: np.ndarray, quantization, directory: str):
+    store = InMemoryVectorStore(quantization, directory)
+    for start in range(0, len(vectors), 1000):
+        store.upsert(
+            [
+                (str(i), vectors[i], {})
+                for i in range(start, min(start + 1000, len(vectors)))
+            ],
+            "eval",
+        )
+    return store
+
+
+def top_ids(store, queries: np.ndarray, k: int):
+    started = time.perf_counter()
+    results = [
+        [match["id"] for match in store.query(query, k, "eval")] for query in queries
+    ]
+    elapsed = (time.perf_counter() - started) / len(queries)
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vectors", help="a .npy file of embeddings, one per row")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = synthetic_vectors(args.count, args.dimension)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+
+    print(f"{len(vectors)} vectors of {vectors.shape[1]} dimensions")
+    print(
+        f"{'mode':<8}{'recall@' + str(args.k):>12}{'bytes/vector':>15}{'ms/query':>11}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        exact = build_store(vectors, None, directory)
+        truth, elapsed = top_ids(exact, queries, args.k)
+        space = exact._namespaces["eval"]
+        print(
+            f"{'float32':<8}{1:>12.3f}{space.nbytes / space.count:>15.0f}{elapsed * 1000:>11.2f}"
+        )
+
+        for quantization in ("int8", "pq"):
+            store = build_store(vectors, quantization, directory)
+            space = store._namespaces["eval"]
+            # upserts start training in the background, catch up on any
+            # retraining that came due while an earlier one was running
+            while True:
+                space.wait_for_training()
+                with space.lock:
+                    space.schedule_training()
+                    if space.training is None:
+                        break
+            results, elapsed = top_ids(store, queries, args.k)
+            recall = np.mean(
+                [len(set(a) & set(b)) / args.k for a, b in zip(results, truth)]
+            )
+            print(
+                f"{quantization:<8}{recall:>12.3f}"
+                f"{space.nbytes / space.count:>15.0f}{elapsed * 1000:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
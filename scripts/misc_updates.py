@@ -187,5 +187,20 @@ def delete_connections_wiith_nonexisting_sources():
 
     print(f"Total connections deleted: {updated_count}")
 
+def add_likes_count_to_buckets():
+    # backfill the counter maintained by like/unlike and flag for the trending job
+    result = buckets.update_many(
+        {"likesCount": {"$exists": False}},
+        [
+            {
+                "$set": {
+                    "likesCount": {"$size": {"$ifNull": ["$likes", []]}},
+                    "trendingStale": True,
+                }
+            }
+        ],
+    )
+    print(f"Total buckets updated: {result.modified_count}")
+
 if __name__ == "__main__":
-    delete_connections_wiith_nonexisting_sources()
\ No newline at end of file
+    add_likes_count_to_buckets()
\ No newline at end of file